@@ -1,13 +1,36 @@
 import streamlit as st
 import pandas as pd
-import re
 import datetime
 from io import BytesIO
 from docx import Document
-import json
 import os
 from PIL import Image  
 
+from classifier import FORMATS, RuleStats
+from statement_io import (
+    classify_batch,
+    check_statement,
+    classify_cached,
+    read_statement,
+    review_rows,
+    stream_classify_to_xlsx,
+    write_accounts_xlsx,
+    write_classified_arrow,
+    write_classified_parquet,
+    write_classified_xlsx,
+)
+from transaction_index import NEW, classify_incremental, import_corrections
+from fallback_model import add_suggestions, suggestion_columns
+from record_store import (
+    PAYMENT_INSTRUCTIONS,
+    RECEIPTS,
+    ROW_ID,
+    RecordView,
+    add_record,
+    clear_records,
+    delete_record,
+)
+
 
 st.markdown("""
 <style>
@@ -327,15 +350,15 @@ st.markdown("""
 # ============================================
 # INITIALIZE SESSION STATE
 # ============================================
-if 'receipts_db' not in st.session_state:
-    st.session_state.receipts_db = []
+@st.cache_resource
+def shared_record_view():
+    """Store reads shared by every session of this process, redone only after the store changed."""
+    return RecordView()
+
 
 if 'invoices_db' not in st.session_state:
     st.session_state.invoices_db = []
 
-if 'payment_instructions_db' not in st.session_state:
-    st.session_state.payment_instructions_db = []
-
 # ============================================
 # HEADER WITH LOGO
 # ============================================
@@ -387,18 +410,6 @@ def docx_bytes_to_pdf_bytes(docx_bytes: bytes):
         shutil.rmtree(tmpdir, ignore_errors=True)
 
 
-def find_all_plots(description):
-    """Find all plot references in description"""
-    PLOTS = [
-        'Y1', 'Y2', 'Y3', 'Y6', 'Y4-7', 'Y8', 'R2', 'R4', 'B5', 'G2',
-        'R5A', 'R5B', 'R5C', 'R5D', 'W2', 'W8', 'B6', 'G1', 'G12', 'G13', 'B9-10-11'
-    ]
-    found = []
-    for plot in PLOTS:
-        if re.search(rf"(?<!\\w){re.escape(plot)}(?!\\w)", description):
-            found.append(plot)
-    return found
-
 # ============================================
 # VILLA OWNERS DATABASE
 # ============================================
@@ -431,1886 +442,6 @@ VILLA_OWNERS = {
     ("R4", "Villa 2"): "Nirit & Ofer Mizrahi",
 }
 
-# ============================================
-# DIAKOFTI PROCESSING FUNCTION
-# ============================================
-def process_diakofti_file(df):
-    """Process Diakofti format files"""
-    df = df.dropna(subset=['ΠΕΡΙΓΡΑΦΗ'])
-    df['ΠΟΣΟ'] = df['ΠΟΣΟ'].astype(str).str.replace('.', '').str.replace(',', '.').astype(float)
-    
-    results = []
-    for _, row in df.iterrows():
-        original_desc = str(row['ΠΕΡΙΓΡΑΦΗ'])
-        desc = original_desc.upper()
-        amount = abs(row['ΠΟΣΟ'])
-        plots = find_all_plots(desc)
-        
-        if len(plots) == 1:
-            plot_val = plots[0]
-        elif len(plots) > 1:
-            plot_val = "Multiple"
-        else:
-            plot_val = "All Plots"
-        
-        is_income = row['ΠΟΣΟ'] > 0
-        
-        entry = {
-            "Date": row['ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ'],
-            "Income/outcome": "Income" if is_income else "Outcome",
-            "Plot": plot_val,
-            "Expenses Type": "Soft Cost",
-            "Type": "",
-            "Supplier": "",
-            "Description": desc,
-            "In": amount if is_income else "",
-            "Out": -amount if not is_income else "",
-            "Total": amount if is_income else -amount,
-            "Progressive Ledger Balance": "",
-            "Payment details": "",
-            "Original Description": original_desc
-        }
-        
-        filled = False
-        
-        # ============================================
-        # 🔴 Diakofti RULES - ADD YOUR RULES HERE
-        
-        if "COM POI" in desc or "COM POO" in desc:
-            entry["Type"] = "Bank"
-            entry["Supplier"] = "Bank"
-            entry["Description"] = "Bank fees"
-            filled = True
-
-        if "ELECTRICAL INSTALLATION" in desc.upper():
-            entry["Type"] = "Electricity"
-            entry["Supplier"] = "Engineer"
-            entry["Description"] = "Construction works"
-            filled = True
-
-        if amount == 1006.77:
-            entry["Type"] = "Operation cost"
-            entry["Supplier"] = "Worker 1"
-            entry["Description"] = "Salary"
-            filled = True
-
-        if "ΠΛΗΡΩΜΗ ΒΕΒΑΙΩΜΕΝΕΣ ΣΤΙΣ Δ.Ο.Υ. ΟΦΕΙΛΕΣ" in desc.upper() and amount == 100.16:
-            entry["Type"] = "Operation cost"
-            entry["Supplier"] = "Worker 1"
-            entry["Description"] = "TEKA"
-            filled = True
-
-        if "STAVROU" in desc.upper() or "SKANDIA" in desc.upper() or "PLATANOS" in desc.upper() or "TO LIMAN KYTHI GR" in desc.upper():
-            entry["Type"] = "General"
-            entry["Supplier"] = "F&B"
-            entry["Description"] = "F&B"
-            filled = True
-
-        if "RF549086180000334044" in desc.upper():
-            entry["Plot"] = "G2"
-            entry["Expenses Ty"] = "Soft Cost"
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            filled = True
-
-        if "MOREAS S" in desc.upper():
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Transportation"
-            filled = True
-   
-        if "AIOLOS DIAKOFTI EKMETALLEFSI AKINIT" in desc.upper():
-            entry["Location"] = "Diakofti"
-            entry["Type"] = "Aiolos Diakofti"
-            entry["Supplier"] = "Operation cost"
-            entry["Description"] = "Reimbursement of expenses"
-            filled = True
-            
-        if "CANVA" in desc.upper():
-            entry["Type"] = "General"
-            entry["Supplier"] = "Office expenses"
-            entry["Description"] = "Office expense"
-            entry["Payment details"] = "CANVA"  
-            filled = True
-
-        if "ARID" in desc.upper():
-            entry["Type"] = "Architect"
-            entry["Supplier"] = "ARID"
-            entry["Description"] = "Planning"
-            filled = True
-
-        if "CLAUDE" in desc.upper():
-            entry["Type"] = "General"
-            entry["Supplier"] = "Claude AI"
-            entry["Description"] = "Office expense"
-            filled = True
-
-
-        if "HERTZ" in desc.upper():
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Panayotis"
-            entry["Description"] = "Car rent fees"
-            filled = True
-
-        if "AVIS" in desc.upper():
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Panayotis"
-            entry["Description"] = "Car rent fees"
-            filled = True
-
-        if "SIXT" in desc.upper():
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Panayotis"
-            entry["Description"] = "Car rent fees"
-            filled = True
-
-        if "PANAYOTIS" in desc.upper():
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Panayotis"
-            entry["Description"] = "Car rent fees"
-            filled = True
-
-
-        if "EDEN" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Accommodation"
-            entry["Description"] = "Hotel"
-            filled = True
-
-        if any(keyword in desc.upper() for keyword in ["TRANSPORT KALLI GR","GRIGORAK KYTHI GR", "O MAGOS KYTHI GR", "STAMATIS KYTHI GR", "KONTOLEO KYTHI GR", "VITSIO KYTHI GR", "BOURNAKI KYTHI GR", "STAVROU KYTHI GR"]):
-            entry["Type"] = "General"
-            entry["Supplier"] = "F&B"
-            entry["Description"] = "F&B"
-            filled = True
-
-
-        if "ALL PLOTS MARKETING" in desc:
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "Marketing"
-            entry["Description"] = "Marketing Services fee"
-            filled = True
-
-        if "CALEN" in desc or "HARD COST" in desc:
-            entry["Expenses Type"] = "Hard Cost"
-            entry["Type"] = "Contractor"
-            entry["Supplier"] = "Calen"
-            entry["Description"] = "Construction works"
-            filled = True
-
-        if "SUPERVISION" in desc:
-            entry["Type"] = "Supervision"
-            entry["Supplier"] = "TAG ARCHITECTS"
-            entry["Description"] = "Supervision"
-            filled = True
-
-        if "HOLIDAYS TEL" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Flight"
-            filled = True
-
-        if "EL AL" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Flight"
-            filled = True
-
-        if any(keyword in desc.upper() for keyword in ["FACEBOOK", "FACEBK", "FB.ME", "META"]):
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "Marketing"
-            entry["Description"] = "Marketing Services fee"
-            filled = True
-
-
-        if any(term in desc for term in ["ACCOUNTING", "BOOKKEEP", "ECOVIS"]) and not any(word in desc for word in ["YAG", "TAG"]):
-            entry["Type"] = "Accounting"
-            entry["Supplier"] = "Ecovis"
-            entry["Description"] = "Accountant monthly fees"
-            filled = True
-
-        if "GAS" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Gas station"
-            filled = True
-
-        if "DRAKAKIS" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Drakakis Tours"
-            entry["Description"] = "Car rent fees"
-            filled = True
-
-        if "FLIGHT" in desc or "AEGEAN" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Flight"
-            filled = True
-
-        if "TONY S" in desc or "Tony S" in desc or "tony s" in desc or "eat" in desc or "EAT" in desc:
-            entry["Type"] = "General"
-            entry["Supplier"] = "F&B"
-            entry["Description"] = "F&B"
-            filled = True
-
-
-        if any(word in desc for word in ["AEGEANWEB", "AEGEAN", "OLYMPIC", "SKY", "ISRAIR", "WIZZ"]):
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Flight"
-            filled = True
-
-        if any(word in desc for word in ["DINNER", "FOOD", "CAFE", "COFFEE", "LUNCH", "BREAKFAST"]):
-            entry["Type"] = "General"
-            entry["Supplier"] = "F&B"
-            entry["Description"] = "F&B"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and (
-            "villa 1" in desc or "Villa 1" in desc or "VILLA 1" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 1"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and (
-            "villa 2" in desc or "Villa 2" in desc or "VILLA 2" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 2"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if "RF919086180000334" in desc:
-            entry["Plot"] = "R4"
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            filled = True
-
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and (
-            "villa 3" in desc or "Villa 3" in desc or "VILLA 3" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 3"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and (
-            "villa 4" in desc or "Villa 4" in desc or "VILLA 4" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 4"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and (
-            "villa 5" in desc or "Villa 5" in desc or "VILLA 5" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 5"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and (
-            "villa 6" in desc or "Villa 6" in desc or "VILLA 6" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 6"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-
-        if "GOOGLE" in desc:
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "Marketing"
-            entry["Description"] = "Marketing Services fee"
-            filled = True
-
-        if "CRM" in desc:
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "reWire"
-            entry["Description"] = "CRM"
-            filled = True
-
-        if "RF91908618000033404472101" in desc or "PROT-RF549086180000334" in desc:
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            entry["Plot"] = "G2"
-            filled = True
-
-        if "RF38908618000033404445701" in desc or "RF389086180000334044" in desc:  
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            entry["Plot"] = "Y3"
-            filled = True
-
-        if "RF91908618000033404472101" in desc or "PROT-919086180000334" in desc:
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            entry["Plot"] = "R4"
-            filled = True
-
-        if "UBER" in desc or "TAXI" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Athens Taxi"
-            filled = True
-
-        if "BEAUTIFU SAN" in desc.upper():
-            entry["Type"] = "General"
-            entry["Supplier"] = "BEAUTIFUL"
-            entry["Description"] = "Office expense"
-            filled = True
-
-        if "OPENAI" in desc:
-            entry["Type"] = "General"
-            entry["Supplier"] = "Office expenses"
-            entry["Description"] = "Office expense"
-            filled = True
-
-        if "TAG" in desc:
-            entry["Type"] = "Architect"
-            entry["Supplier"] = "TAG ARCHITECTS"
-            if "SUP" in desc:
-                entry["Description"] = "Supervision"
-            else:
-                entry["Description"] = "Planning"
-            filled = True
-
-        if "OASA" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Transportation"
-            filled = True
-
-        if "ΔΗΜΟ-RF369029090000097" in desc:
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Water"
-            entry["Plot"] = "Y3"
-            filled = True
-
-
-        if any(term in desc for term in ["MANAGEMENT", "MANAG.", "MGMT", "MNGMT"]) and row['ΠΟΣΟ'] in [-1550, -1550.00, -1550.0, 1550.00, 1550.0, 2055, 2055.0, 2057.0, 1550]:
-            entry["Type"] = "Worker 1"
-            entry["Supplier"] = "Aiolos Athens"
-            entry["Description"] = "management fees"
-            filled = True
-
-        if any(term in desc for term in ["COSM", "COSMOTE", "PHONE"]):
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Cosmote"
-            entry["Description"] = "Phone bill"
-            filled = True
-
-        if "RF389086180000334" in desc:
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            entry["Plot"] = "Y3"
-            filled = True
-
-
-
-        # END OF Diakofti RULES
-        # ============================================
-        
-        if not filled:
-            entry["Description"] = f"🟨 {entry['Description']}"
-        
-        results.append(entry)
-    
-    return pd.DataFrame(results)
-
-# ============================================
-# Athens PROCESSING FUNCTION
-# ============================================
-def process_athens_file(df):
-    """Process Athens format files"""
-    df = df.copy()
-    df['Ημερομηνία'] = pd.to_datetime(df['Ημερομηνία'], dayfirst=True, errors='coerce')
-    df = df.dropna(subset=['Περιγραφή'])
-    
-    results = []
-    for _, row in df.iterrows():
-        original_desc = str(row['Περιγραφή'])
-        desc = original_desc.upper()
-        amount = abs(float(str(row['Ποσό συναλλαγής']).replace(',', '.')))
-        
-        entry = {
-            "Date": row['Ημερομηνία'].strftime('%d/%m/%Y') if not pd.isnull(row['Ημερομηνία']) else '',
-            "Income/Outcome": "Income" if row['Ποσό εντολής'] > 0 else "Outcome",
-            "Expenses Type": "Soft Cost",
-            "Location": "All Projects",
-            "Project": "All Projects",
-            "Supplier": "",
-            "Type": "",
-            "Description": desc,
-            "Income": amount if row['Ποσό εντολής'] > 0 else "",
-            "Outcome": -amount if row['Ποσό εντολής'] < 0 else "",
-            "Total": amount if row['Ποσό εντολής'] > 0 else -amount,
-            "Balance": "",
-            "Repayment": "",
-            "Original Description": original_desc
-        }
-        
-        filled = False
-        
-        # ============================================
-        # 🔵 Athens RULES - ADD YOUR RULES HERE
-        if any(word in desc for word in ["DINNER", "FOOD", "CAFE", "COFFEE", "LUNCH", "BREAKFAST", "ΦΑΓΗΤΟ", "ΕΣΤΙΑΤΟΡΙΟ", "ΚΑΦΕ"]):
-            entry["Type"] = "F&B"
-            entry["Supplier"] = "General"
-            entry["Description"] = "F&B"
-            filled = True
-
-        if "TEKA" in desc and round(amount, 2) == 76.66:
-            entry["Supplier"] = "Worker 1"
-            entry["Type"] = "Operation cost"
-            entry["Description"] = "TEKA"
-            filled = True
-
-        if "EPASSNAODOSGR" in desc.upper():
-            entry["Supplier"] = "Transportation"
-            entry["Type"] = "General"
-            entry["Description"] = "Toll road"
-            filled = True
-
-        if any(keyword in desc.upper() for keyword in ["FACEBOOK", "FACEBK", "FB.ME", "META"]):
-            entry["Supplier"] = "Marketing"
-            entry["Type"] = "Marketing"
-            entry["Description"] = "Marketing Services fee"
-            filled = True
-
-        if "BAGELDB" in desc:
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "BagelDB"
-            entry["Description"] = "Website"
-            filled = True
-
-        if any(variant in desc for variant in ["AP MICHALOPOULOS SIA", "Ap Michalopoulos Sia", "ap michalopoulos sia"]):
-            entry["Type"] = "F&B"
-            entry["Supplier"] = "General"
-            entry["Description"] = "F&B"
-            filled = True
-           
-        if any(word in desc for word in ["AVIS", "HERTZ", "SIXT", "CAR RENTAL"]):
-            entry["Type"] = "Transportation"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Car rental"
-            entry["Plot"] = "All Projects"
-            filled = True
-           
-        if "COSMOTE" in desc:
-            entry["Location"] = "Mobee"
-            entry["Project"] = "Mobee"
-            entry["Supplier"] = "Cosmote"
-            entry["Type"] = "Project Management"
-            entry["Description"] = "Office expenses"
-            filled = True
-
-           
-        if any(word in desc for word in ["BAKERY","KENTRIKI ENOSI EPIME", "CAFFE", "CAFE", "EAT", "BEVERAGE", "PIZA", "BURGER"]):
-            entry["Type"] = "F&B"
-            entry["Supplier"] = "General"
-            entry["Description"] = "F&B"
-            filled = True
-
-        if any(keyword in desc for keyword in ["WEBCCDOMAINCOM", "webccdomaincom", "Webccdomaincom"]):
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "BagelDB"
-            entry["Description"] = "Website"
-            entry["Repayment"] = "DOMAIN"
-            filled = True
-           
-        if round(amount, 2) == 496.00 and any(word in desc for word in ["ECOVIS", "FEE", "FEES"]):
-            entry["Supplier"] = "Accountant"
-            entry["Type"] = "Ecovis"
-            entry["Description"] = "Accountant monthly fees"
-            filled = True
-
-        if abs(row['Ποσό συναλλαγής']) == 256.41 and row['Ποσό συναλλαγής'] < 0:
-            entry["Type"] = "Tax"
-            entry["Supplier"] = "Authorities"
-            entry["Description"] = "EFKA"
-            entry["Repayment"] = "UDI EFKA"
-            filled = True
-           
-        if "MANAGEMENT FEE" in desc or row['Ποσό συναλλαγής'] in [-1810, 1810, -1810.00, 1810.00]:
-            entry["Type"] = "Mobee Management"
-            entry["Supplier"] = "Konstantinos"
-            entry["Description"] = "Management fee"
-            filled = True
-
-        if "ΠΡΟΜΗΘΕΙΕΣ ΕΞΟΔΑ" in desc and amount <= 5:
-            entry["Type"] = "Bank fees"
-            entry["Supplier"] = "Bank"
-            entry["Description"] = "Bank fees"
-            filled = True
-
-        if "AIOLOS DIAKOFTI" in desc and 1520 <= amount <= 1570:
-            entry["Supplier"] = "Aiolos Diakofti"
-            entry["Type"] = "Operation cost"
-            entry["Description"] = "Reimbursement of expenses"
-            filled = True
-
-        if ("ΚΑΛΛΙΦΡΟΝΑ 3" in desc or "ΚΑΛΛΙΦΡΟΝΑ3" in desc) and row['Ποσό συναλλαγής'] > 0:
-            entry["Type"] = "Mobee Management"
-            entry["Supplier"] = "Kalliforna"
-            entry["Description"] = "Management fee"
-            entry["Location"] = "Mobee"
-            filled = True
-           
-        if "ΠΛΗΡΩΜΗ ΕΦΚΑ ΕΡΓΟΔΟΤΙΚΕΣ ΕΙΣΦΟΡΕΣ" in desc:
-            entry["Type"] = "Tax"
-            entry["Supplier"] = "Authorities"
-            entry["Description"] = "EFKA"
-            filled = True
-
-        if "PLAKENTIA" in desc:
-            entry["Type"] = "Transportation"
-            entry["Supplier"] = "General"
-            entry["Description"] = "Metro"
-            filled = True
-
-        if "MICROSOFT" in desc:
-            entry["Type"] = "Project Management"
-            entry["Supplier"] = "Microsoft"
-            entry["Description"] = "Office expenses"
-            filled = True
-
-        if "LEFKES VILLAS PROJECT MONOPROSOPI" in desc:
-            entry["Supplier"] = "Lefkes Villas"
-            entry["Type"] = "Project Management"
-            entry["Description"] = "Management fee"
-
-        if "LEFKES" in desc:
-            entry["Location"] = "Lefkes"
-
-        if "BEN SHAHAR" in desc:
-            entry["Supplier"] = "Ben Shahar"
-            entry["Type"] = "Project Management"
-            entry["Description"] = "Management fee"
-            entry["Location"] = "Lefkes"
-                 
-        if "PARKING" in desc:
-            entry["Type"] = "Transportation"
-            entry["Supplier"] = "Parking"
-            entry["Description"] = "Parking"
-            filled = True
-
-        if "kallifrona 3 ekmetalleysi akiniton" in desc.lower() and amount == 2450:
-            entry["Location"] = "Mobee"
-            entry["Project"] = "Mobee"
-            entry["Supplier"] = "Kalliforna"
-            entry["Type"] = "Mobee Management"
-            entry["Description"] = "Management fee"
-            filled = True
-
-        if "ECOVIS" in desc:
-            entry["Type"] = "Ecovis"
-            entry["Supplier"] = "Accountant"
-            entry["Description"] = "Accountant monthly fees"
-            filled = True
-
-        if row['Ποσό συναλλαγής'] == 4960:
-            entry["Type"] = "Project Management"
-            entry["Supplier"] = "Lefkes Villas"
-            entry["Description"] = "Management fee"
-            entry["Location"] = "Lefkes"
-            entry["Expenses Type"] = "Soft cost"
-            filled = True
-
-        if "HAREL" in desc:
-            entry["Type"] = "Project Management"
-            entry["Supplier"] = "General"
-            entry["Description"] = "Office expenses"
-            filled = True
-
-        if "SHELL" in desc:
-            entry["Type"] = "Transportation"
-            entry["Supplier"] = "General"
-            entry["Description"] = "Gas station"
-            filled = True
-
-        if "OASA" in desc:
-            entry["Type"] = "Transportation"
-            entry["Supplier"] = "General"
-            entry["Description"] = "Metro"
-            filled = True
-
-        if "WORKER 1" in desc:
-            entry["Type"] = "Operation cost"
-            entry["Supplier"] = "Worker 1"
-            entry["Description"] = "Salary"
-            filled = True
-
-        if any(word in desc for word in ["AEGEANWEB", "AEGEAN", "OLYMPIC", "SKY", "ISRAIR", "WIZZ"]):
-            entry["Type"] = "Transportation"
-            entry["Supplier"] = "General"
-            entry["Description"] = "Flight"
-            filled = True
-
-        if ("ΠΛΗΡΩΜΗ ΒΕΒΑΙΩΜΕΝΕΣ ΣΤΙΣ Δ.Ο.Υ. ΟΦΕΙΛΕΣ" in desc and (amount == 76.66 or amount == -76.66)):
-            entry["Supplier"] = "Greek Tax Office"
-            entry["Type"] = "Tax Payment"
-            entry["Description"] = "DOY Confirmed Payment"
-            filled = True
-
-        if "PARKAROUND" in desc:
-            entry["Type"] = "Transportation"
-            entry["Supplier"] = "Parking"
-            entry["Description"] = "Parking"
-            filled = True
-
-        if any(word in desc for word in ["ATTIKI"]):
-            entry["Type"] = "Transportation"
-            entry["Supplier"] = "General"
-            entry["Description"] = "Toll road"
-            filled = True
-
-        if any(word in desc for word in ["UBER", "UBR"]):
-            entry["Type"] = "Transportation"
-            entry["Supplier"] = "General"
-            entry["Description"] = "Uber"
-            filled = True
-
-        if "GOOGLE" in desc:
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "Google"
-            entry["Description"] = "Campaign"
-            filled = True
-
-        if "PETRELION" in desc:
-            entry["Type"] = "Transportation"
-            entry["Supplier"] = "General"
-            entry["Description"] = "Gas station"
-            filled = True
-
-        if any(word in desc for word in ["ΠΡΟΜΗΘ", "ΜΗΝ", "ΠΑΡ", "ΕΞΟΔΑ"]) and amount <= 5:
-            entry["Type"] = "Bank"
-            entry["Supplier"] = "Bank"
-            entry["Description"] = "Bank fees"
-            filled = True
-
-
-        # END OF Athens RULES
-        # ============================================
-        
-        if not filled:
-            entry["Description"] = f"🟨 {entry['Description']}"
-        
-        results.append(entry)
-    
-    result_df = pd.DataFrame(results)
-    
-    # Reorder columns
-    column_order = [
-        "Date", "Income/Outcome", "Expenses Type", "Location", "Project",
-        "Supplier", "Type", "Description", "Income", "Outcome", "Total",
-        "Balance", "Repayment", "Original Description"
-    ]
-    
-    return result_df[column_order]
-
-# ============================================
-# Ilisia NBG PROCESSING FUNCTION
-# ============================================
-def process_ilisia_file(df):
-    """Process Ilisia NBG format files (robust to column names)"""
-    df = df.copy()
-
-    # --- resolve columns (date/desc/amount can arrive with several names) ---
-    def pick(*names):
-        for n in names:
-            if n in df.columns:
-                return n
-        return None
-
-    col_date   = pick('ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ', 'Ημερομηνία', 'Valeur')
-    col_desc   = pick('ΠΕΡΙΓΡΑΦΗ', 'Περιγραφή')
-    col_amount = pick('ΠΟΣΟ', 'Ποσό εντολής', 'Ποσό συναλλαγής')
-
-
-    if col_desc is None or col_amount is None:
-        raise ValueError("Ilisia: description or amount column missing")
-
-    # --- normalize canonical columns expected by your RULES ---
-    # Description -> ΠΕΡΙΓΡΑΦΗ
-    if col_desc != 'ΠΕΡΙΓΡΑΦΗ':
-        df['ΠΕΡΙΓΡΑΦΗ'] = df[col_desc]
-
-    # Date -> ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ  (parse then keep canonical)
-    if col_date:
-        df[col_date] = pd.to_datetime(df[col_date], dayfirst=True, errors='coerce')
-        if col_date != 'ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ':
-            df['ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ'] = df[col_date]
-    else:
-        df['ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ'] = pd.NaT
-
-    # Amount -> ΠΟΣΟ  (keep sign, handle commas/dots)
-    if pd.api.types.is_numeric_dtype(df[col_amount]):
-        df['_signed_amount'] = df[col_amount].astype(float)
-    else:
-        df['_signed_amount'] = (
-            df[col_amount].astype(str)
-            .str.replace('.', '', regex=False)     # thousands dot
-            .str.replace(',', '.', regex=False)    # decimal comma
-            .str.replace(r'[^\d\.\-]', '', regex=True)
-            .replace({'': '0', '-': '0'})
-            .astype(float)
-        )
-    if col_amount != 'ΠΟΣΟ':
-        df['ΠΟΣΟ'] = df['_signed_amount']
-    else:
-        # ensure ΠΟΣΟ is clean float even if read as string
-        if not pd.api.types.is_numeric_dtype(df['ΠΟΣΟ']):
-            df['ΠΟΣΟ'] = (
-                df['ΠΟΣΟ'].astype(str)
-                .str.replace('.', '', regex=False)
-                .str.replace(',', '.', regex=False)
-                .str.replace(r'[^\d\.\-]', '', regex=True)
-                .replace({'': '0', '-': '0'})
-                .astype(float)
-            )
-
-    # clean rows
-    df = df.dropna(subset=['ΠΕΡΙΓΡΑΦΗ'])
-
-    results = []
-    for _, row in df.iterrows():
-        original_desc = str(row['ΠΕΡΙΓΡΑΦΗ'])
-        desc = original_desc.upper()
-        amt = float(row['ΠΟΣΟ'])
-        amount = abs(amt)
-
-        # plot detect
-        plots = find_all_plots(desc)
-        if len(plots) == 1:
-            plot_val = plots[0]
-        elif len(plots) > 1:
-            plot_val = "Multiple"
-        else:
-            plot_val = "G1 - Manolis"
-
-        is_income = amt > 0
-
-        entry = {
-            "Date": row['ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ'].strftime('%d/%m/%Y') if pd.notnull(row['ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ']) else '',
-            "Income/outcome": "Income" if is_income else "Outcome",
-            "Plot": plot_val,
-            "Expenses Type": "Soft Cost",
-            "Type": "",
-            "Supplier": "",
-            "Description": desc,
-            "In": amount if is_income else "",
-            "Out": -amount if not is_income else "",
-            "Vat": "",
-            "Total": amount if is_income else -amount,
-            "Progressive Ledger Balance": "",
-            "Payment details": "",
-            "Original Description": original_desc,
-            "Year": row['ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ'].year if pd.notnull(row['ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ']) else "",
-            "Bank": "NBG" 
-            
-        }
-
-        filled = False
-        
-        # ============================================
-        # 🔴 Ilisia RULES - ADD YOUR RULES HERE
-        # ============================================
-        
-        if "COM POI" in desc or "COM POO" in desc:
-            entry["Type"] = "Bank"
-            entry["Supplier"] = "Bank"
-            entry["Description"] = "Bank fees"
-            filled = True
-
-        if "SOCIAL MEDIA" in desc:
-            entry["Expenses Type"] = "Marketing"
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "Vassilis"
-            entry["Description"] = "Social Media"
-            filled = True
-        
-        # --- Rule: Booking Operation Income (positive) ---
-        if ("ΠΚ/00505341795" in desc or "ΠΚ/02505341795" in desc) and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        # --- Rule: Booking Refund (negative) ---
-        if ("ΠΚ/00505341795" in desc or "ΠΚ/02505341795" in desc) and row['ΠΟΣΟ'] < 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Booking refund"
-            filled = True
-
-        # --- Rule: Airbnb income ---
-        if "AIRBNB" in desc and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        # --- Rule: Airbnb refund ---
-        if "AIRBNB" in desc and row['ΠΟΣΟ'] < 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Booking refund"
-            filled = True
-            
-        if "ΠΚ/02555341795" in desc and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        # --- Rule: Loan repayments (LOAN / ΕΝΤΟΛΗ/ΕΜΒΑΣΜΑ / MAGONEZOS) ---
-        if any(term in desc for term in ["LOAN", "ΕΝΤΟΛΗ/ΕΜΒΑΣΜΑ ΣΕ ΑΛΛΗ ΤΡΑΠΕΖΑ", "MAGONEZOS EMMANOUIL", "MAGONEZOS"]):
-            entry["Expenses Type"] = "Loan"
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Loan Broker"
-            entry["Description"] = "Loan repayment"
-            filled = True    
-
-        # --- Rule: ΠΚ/00215341795 Booking transactions ---
-        if "ΠΚ/00215341795" in desc and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        if "ΠΚ/00215341795" in desc and row['ΠΟΣΟ'] < 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Booking refund"
-            filled = True
-
-
-        # --- Rule: ΠΚ/00555341795 Booking transactions ---
-        if "ΠΚ/00555341795" in desc and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        if "ΠΚ/00555341795" in desc and row['ΠΟΣΟ'] < 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Booking refund"
-            filled = True
-
-
-
-        # --- Rule: ΠΚ/00525341795 Booking transactions ---
-        if "ΠΚ/00525341795" in desc and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        if "ΠΚ/00525341795" in desc and row['ΠΟΣΟ'] < 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Booking refund"
-            filled = True
-
-
-        if "ΠΚ/02555341795" in desc and row['ΠΟΣΟ'] < 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Booking refund"
-            filled = True
-            
-        if "ΠΡΟΜΗΘΕΙΑ ΕΝΤΟΛΗΣ" in desc:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Bank"
-            entry["Supplier"] = "Bank"
-            entry["Description"] = "Bank fees"
-            filled = True
-
-        # --- Rule: Bank expenses / ΠΡΟΜΗΘΕΙΕΣ ΕΞΟΔΑ ---
-        if "ΠΡΟΜΗΘΕΙΕΣ ΕΞΟΔΑ" in desc:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Bank"
-            entry["Supplier"] = "Bank"
-            entry["Description"] = "Bank fees"
-            filled = True
-
-    
-        if any(k in desc for k in ["PROTERGIA", "ENERGETICA", "DEI", "ΔΕΗ"]):
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Electricity"
-            entry["Description"] = "Electricity bill"
-            filled = True
-
-
-        # --- Rule: Pool cleaning invoice ---
-        if "INV400009529618476" in desc:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Cleaning"
-            entry["Description"] = "Pool"
-            filled = True
-
-        if any(term in desc.upper() for term in ["POOL", "POOLS"]):
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Cleaning"
-            entry["Description"] = "Pool"
-            filled = True
-
-        
-
-        if any(k in desc for k in ["ΠΡΟΜΗΘΕΙΑ ΕΝΤΟΛΗΣ", "ΕΞΟΔΑ ΤΡ ΠΛΗΡΩΜΗΣ"]):
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Bank"
-            entry["Supplier"] = "Bank"
-            entry["Description"] = "Bank fees"
-            filled = True
-
-
-
-        # --- Rule: Booking.com Accommodation Income (positive) ---
-        if "BOOKING.COM B.V." in desc and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        # --- Rule: Social Media Invoice 56 ---
-        if "SOCIAL MEDIA INV 56" in desc:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Vassilis"
-            entry["Description"] = "Promotion"
-            filled = True
-
-        # --- Rule: Transfer Between Accounts August (negative) ---
-        if "TRANSFER BETWEEN ACCOUNTS AUGUST" in desc and row['ΠΟΣΟ'] < 0:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Cash facilitation"
-            entry["Supplier"] = "Hotel"
-            entry["Description"] = "Cash facilitation"
-            filled = True
-
-        # --- Rule: Septic Tank expenses ---
-        if "SEPTIC" in desc:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Septic Tank"
-            entry["Supplier"] = "Septic Tank"
-            entry["Description"] = "Septic Tank"
-            filled = True
-
-        # --- Rule: Roompay Invoice Registration ---
-        if "ROOMPAY INVOICE REGISTRATION" in desc:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Web Hotelier"
-            entry["Description"] = "Website"
-            filled = True
-
-        # --- Rule: Bank Fees (ΠΡΟΜΗΘΕΙΕΣ ΕΞΟΔΑ) ---
-        if "ΠΡΟΜΗΘΕΙΕΣ ΕΞΟΔΑ" in desc:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Bank"
-            entry["Supplier"] = "Bank"
-            entry["Description"] = "Bank fees"
-            filled = True
-
-        # --- Rule: Etheras Properties Management / Anna Kythira Supervision ---
-        if "ETHERAS PROPERTIES MANAGEMENT" in desc and any (term in desc for term in ["LOURANTOU INVOICE", "MANAGEMENT", "SUPERVISION"]):
-            entry["Expenses Type"] = "Hotel operation"
-            entry["Type"] = "Anna Kythira"
-            entry["Supplier"] = "Anna Kythira"
-            entry["Description"] = "Supervision monthly fee"
-            filled = True
-                    
-
-        # --- New Rule 1 ---
-        if ("ΠΚ/00505341795" in desc or "ΠΚ/02505341795" in desc) and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-
-        if "STAMATIS PANAGIOTIS STAVRO" in desc.upper():
-            entry["Plot"] = "G1 - Manolis"
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Rent"
-            entry["Supplier"] = "Tenant - Taverne"
-            entry["Description"] = "Monthly Taverne rent"
-            filled = True
-
-        if any(term in desc.upper() for term in ["TRANSFER BETWEEN ACCOUNTS", "NBG TO EURO"]):
-            entry["Plot"] = "G1 - Manolis"
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        if "ZARA" in desc.upper():
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Maintenance"
-            entry["Description"] = "Maintenance"
-            filled = True
-
-        if "WATT-VOLT" in desc.upper():
-            entry["Type"] = "Authorities"
-            entry["Supplier"] = "Electricity"
-            entry["Description"] = "Electricity"
-            filled = True
-
-        if "ARID" in desc.upper():
-            entry["Type"] = "Architect"
-            entry["Supplier"] = "ARID"
-            entry["Description"] = "Planning"
-            filled = True
-
-        if "PANAYOTIS" in desc.upper():
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Panayotis"
-            entry["Description"] = "Car rent fees"
-            filled = True
-
-        if "EDEN" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Accommodation"
-            entry["Description"] = "Hotel"
-            filled = True
-
-        if any(keyword in desc.upper() for keyword in ["TRANSPORT KALLI GR","GRIGORAK KYTHI GR", "O MAGOS KYTHI GR", "STAMATIS KYTHI GR", "KONTOLEO KYTHI GR", "VITSIO KYTHI GR", "BOURNAKI KYTHI GR", "STAVROU KYTHI GR"]):
-            entry["Type"] = "General"
-            entry["Supplier"] = "F&B"
-            entry["Description"] = "F&B"
-            filled = True
-
-        if "ALL PLOTS MARKETING" in desc:
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "Marketing"
-            entry["Description"] = "Marketing Services fee"
-            filled = True
-
-        if "CALEN" in desc or "HARD COST" in desc:
-            entry["Expenses Type"] = "Hard Cost"
-            entry["Type"] = "Contractor"
-            entry["Supplier"] = "Calen"
-            entry["Description"] = "Construction works"
-            filled = True
-
-        if "SUPERVISION" in desc:
-            entry["Type"] = "Supervision"
-            entry["Supplier"] = "TAG ARCHITECTS"
-            entry["Description"] = "Supervision"
-            filled = True
-
-        if "HOLIDAYS TEL" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Flight"
-            filled = True
-
-        if "EL AL" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Flight"
-            filled = True
-
-        if any(keyword in desc.upper() for keyword in ["FACEBOOK", "FACEBK", "FB.ME", "META"]):
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "Marketing"
-            entry["Description"] = "Marketing Services fee"
-            filled = True
-
-        if any(term in desc for term in ["ACCOUNTING", "BOOKKEEP", "ECOVIS"]) and not any(word in desc for word in ["YAG", "TAG"]):
-            entry["Type"] = "Accounting"
-            entry["Supplier"] = "Ecovis"
-            entry["Description"] = "Accountant monthly fees"
-            filled = True
-
-        if "GAS" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Gas station"
-            filled = True
-
-        if "DRAKAKIS" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Drakakis Tours"
-            entry["Description"] = "Car rent fees"
-            filled = True
-
-        if "FLIGHT" in desc or "AEGEAN" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Flight"
-            filled = True
-
-        if "TONY S" in desc or "Tony S" in desc or "tony s" in desc or "eat" in desc or "EAT" in desc:
-            entry["Type"] = "General"
-            entry["Supplier"] = "F&B"
-            entry["Description"] = "F&B"
-            filled = True
-
-        if any(word in desc for word in ["AEGEANWEB", "AEGEAN", "OLYMPIC", "SKY", "ISRAIR", "WIZZ"]):
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Flight"
-            filled = True
-
-        if any(word in desc for word in ["DINNER", "FOOD", "CAFE", "COFFEE", "LUNCH", "BREAKFAST"]):
-            entry["Type"] = "General"
-            entry["Supplier"] = "F&B"
-            entry["Description"] = "F&B"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and ("villa 1" in desc or "Villa 1" in desc or "VILLA 1" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 1"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and ("villa 2" in desc or "Villa 2" in desc or "VILLA 2" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 2"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if "RF919086180000334" in desc:
-            entry["Plot"] = "R4"
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and ("villa 3" in desc or "Villa 3" in desc or "VILLA 3" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 3"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and ("villa 4" in desc or "Villa 4" in desc or "VILLA 4" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 4"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and ("villa 5" in desc or "Villa 5" in desc or "VILLA 5" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 5"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and ("villa 6" in desc or "Villa 6" in desc or "VILLA 6" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 6"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if "GOOGLE" in desc or "ΣΥΝΔΡΟΜΗ ADVANCED FOR BUSINES" in desc:
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "Marketing"
-            entry["Description"] = "Marketing Services fee"
-            filled = True
-
-        if "CRM" in desc:
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "reWire"
-            entry["Description"] = "CRM"
-            filled = True
-
-        if "RF91908618000033404472101" in desc or "PROT-RF549086180000334" in desc:
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            entry["Plot"] = "G2"
-            filled = True
-
-        if "RF38908618000033404445701" in desc or "RF389086180000334044" in desc:
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            entry["Plot"] = "Y3"
-            filled = True
-
-        if "RF91908618000033404472101" in desc or "PROT-919086180000334" in desc:
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            entry["Plot"] = "R4"
-            filled = True
-
-        if "UBER" in desc or "TAXI" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Athens Taxi"
-            filled = True
-
-        if "OPENAI" in desc:
-            entry["Type"] = "General"
-            entry["Supplier"] = "Office expenses"
-            entry["Description"] = "Office expense"
-            filled = True
-
-        if "TAG" in desc:
-            entry["Type"] = "Architect"
-            entry["Supplier"] = "TAG ARCHITECTS"
-            if "SUP" in desc:
-                entry["Description"] = "Supervision"
-            else:
-                entry["Description"] = "Planning"
-            filled = True
-
-        if "OASA" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Transportation"
-            filled = True
-
-        if "ΔΗΜΟ-RF369029090000097" in desc:
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Water"
-            entry["Plot"] = "Y3"
-            filled = True
-
-        if any(term in desc for term in ["MANAGEMENT", "MANAG.", "MGMT", "MNGMT"]) and row['ΠΟΣΟ'] in [-1550, -1550.00, -1550.0, 1550.00, 1550.0, 2055, 2055.0, 2057.0, 1550]:
-            entry["Type"] = "Worker 1"
-            entry["Supplier"] = "Aiolos Athens"
-            entry["Description"] = "management fees"
-            filled = True
-
-        if any(term in desc for term in ["COSM", "COSMOTE", "PHONE"]):
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Cosmote"
-            entry["Description"] = "Telephone"
-            filled = True
-
-        if "RF389086180000334" in desc:
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            entry["Plot"] = "Y3"
-            filled = True
-
-        # ============================================
-        # END OF Ilisia RULES
-        # ============================================
-
-        if not filled:
-            entry["Description"] = f"🟨 {entry['Description']}"
-
-        results.append(entry)
-
-    return pd.DataFrame(results)
-
-# ============================================
-# Ilisia EURO PROCESSING FUNCTION
-# ============================================
-def process_ilisia_euro_file(df):
-    """
-    Process Ilisia EURO files (Eurobank format - identical to Diakofti structure)
-    INPUT: Eurobank CSV (ΗΜ/ΝΙΑ, ΠΕΡΙΓΡΑΦΗ, ΠΟΣΟ)
-    OUTPUT: Ilisia NBG format with Ilisia rules
-    """
-    
-    # ניקוי והכנת הנתונים (זהה ל-Diakofti)
-    df = df.copy()
-    df = df.dropna(subset=['ΠΕΡΙΓΡΑΦΗ'])
-    
-    # המרת סכומים לפורמט נכון
-    df['ΠΟΣΟ'] = (
-        df['ΠΟΣΟ'].astype(str)
-        .str.replace('.', '', regex=False)      # הסרת נקודות אלפים
-        .str.replace(',', '.', regex=False)     # המרת פסיק לנקודה
-        .str.replace(r'[^\d\.\-]', '', regex=True)
-        .replace({'': '0', '-': '0'})
-        .astype(float)
-    )
-    
-    results = []
-    
-    for _, row in df.iterrows():
-        original_desc = str(row['ΠΕΡΙΓΡΑΦΗ'])
-        desc = original_desc.upper()
-        amt = float(row['ΠΟΣΟ'])
-        amount = abs(amt)
-        is_income = amt > 0
-        
-        # זיהוי Plot (אותה לוגיקה כמו Ilisia)
-        plots = find_all_plots(desc)
-        if len(plots) == 1:
-            plot_val = plots[0]
-        elif len(plots) > 1:
-            plot_val = "Multiple"
-        else:
-            plot_val = "G1 - Manolis"  # Default for Ilisia
-        
-        # יצירת רשומה בפורמט Ilisia NBG (לא Diakofti!)
-        entry = {
-            "Date": row['ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ'] if 'ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ' in row else row.get('ΗΜ/ΝΙΑ ΑΞΙΑΣ', ''),
-            "Income/outcome": "Income" if is_income else "Outcome",
-            "Plot": plot_val,
-            "Expenses Type": "Soft Cost",
-            "Type": "",
-            "Supplier": "",
-            "Description": desc,
-            "In": amount if is_income else "",
-            "Out": -amount if not is_income else "",
-            "Vat": "",
-            "Total": amount if is_income else -amount,
-            "Progressive Ledger Balance": "",
-            "Payment details": "",
-            "Original Description": original_desc,
-            "Year": "",  # נוסיף אחר כך אם יש תאריך
-            "Bank": "Eurobank"
-        }
-        
-        # ניסיון לחלץ שנה מהתאריך
-        try:
-            date_str = str(entry["Date"])
-            if '/' in date_str:
-                parts = date_str.split('/')
-                if len(parts) == 3:
-                    entry["Year"] = parts[2]  # dd/mm/YYYY
-        except:
-            pass
-        
-        filled = False
-        
-        # ============================================
-        # 🔴 Ilisia EURO RULES - כמו החוקים הקודמים
-        # (מותר להעתיק מפונקציית Ilisia NBG אחד לאחד)
-        # ============================================
-                
-        if "COM POI" in desc or "COM POO" in desc:
-            entry["Type"] = "Bank"
-            entry["Supplier"] = "Bank"
-            entry["Description"] = "Bank fees"
-            filled = True
-
-        if "SOCIAL MEDIA" in desc:
-            entry["Expenses Type"] = "Marketing"
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "Vassilis"
-            entry["Description"] = "Social Media"
-            filled = True
-        
-        # --- Rule: Booking Operation Income (positive) ---
-        if ("ΠΚ/00505341795" in desc or "ΠΚ/02505341795" in desc) and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        # --- Rule: Booking Refund (negative) ---
-        if ("ΠΚ/00505341795" in desc or "ΠΚ/02505341795" in desc) and row['ΠΟΣΟ'] < 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Booking refund"
-            filled = True
-
-        # --- Rule: Airbnb income ---
-        if "AIRBNB" in desc and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        # --- Rule: Airbnb refund ---
-        if "AIRBNB" in desc and row['ΠΟΣΟ'] < 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Booking refund"
-            filled = True
-            
-        if "ΠΚ/02555341795" in desc and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        # --- Rule: Loan repayments (LOAN / ΕΝΤΟΛΗ/ΕΜΒΑΣΜΑ / MAGONEZOS) ---
-        if any(term in desc for term in ["LOAN", "ΕΝΤΟΛΗ/ΕΜΒΑΣΜΑ ΣΕ ΑΛΛΗ ΤΡΑΠΕΖΑ", "MAGONEZOS EMMANOUIL", "MAGONEZOS"]):
-            entry["Expenses Type"] = "Loan"
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Loan Broker"
-            entry["Description"] = "Loan repayment"
-            filled = True    
-
-        # --- Rule: ΠΚ/00215341795 Booking transactions ---
-        if "ΠΚ/00215341795" in desc and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        if "ΠΚ/00215341795" in desc and row['ΠΟΣΟ'] < 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Booking refund"
-            filled = True
-
-
-        # --- Rule: ΠΚ/00555341795 Booking transactions ---
-        if "ΠΚ/00555341795" in desc and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        if "ΠΚ/00555341795" in desc and row['ΠΟΣΟ'] < 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Booking refund"
-            filled = True
-
-
-
-        # --- Rule: ΠΚ/00525341795 Booking transactions ---
-        if "ΠΚ/00525341795" in desc and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        if "ΠΚ/00525341795" in desc and row['ΠΟΣΟ'] < 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Booking refund"
-            filled = True
-
-
-        if "ΠΚ/02555341795" in desc and row['ΠΟΣΟ'] < 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Booking refund"
-            filled = True
-            
-        if "ΠΡΟΜΗΘΕΙΑ ΕΝΤΟΛΗΣ" in desc:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Bank"
-            entry["Supplier"] = "Bank"
-            entry["Description"] = "Bank fees"
-            filled = True
-
-        # --- Rule: Bank expenses / ΠΡΟΜΗΘΕΙΕΣ ΕΞΟΔΑ ---
-        if "ΠΡΟΜΗΘΕΙΕΣ ΕΞΟΔΑ" in desc:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Bank"
-            entry["Supplier"] = "Bank"
-            entry["Description"] = "Bank fees"
-            filled = True
-
-    
-        if any(k in desc for k in ["PROTERGIA", "ENERGETICA", "DEI", "ΔΕΗ"]):
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Electricity"
-            entry["Description"] = "Electricity bill"
-            filled = True
-
-
-        # --- Rule: Pool cleaning invoice ---
-        if "INV400009529618476" in desc:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Cleaning"
-            entry["Description"] = "Pool"
-            filled = True
-
-        if any(term in desc.upper() for term in ["POOL", "POOLS"]):
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Cleaning"
-            entry["Description"] = "Pool"
-            filled = True
-
-        
-
-        if any(k in desc for k in ["ΠΡΟΜΗΘΕΙΑ ΕΝΤΟΛΗΣ", "ΕΞΟΔΑ ΤΡ ΠΛΗΡΩΜΗΣ"]):
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Bank"
-            entry["Supplier"] = "Bank"
-            entry["Description"] = "Bank fees"
-            filled = True
-
-
-
-        # --- Rule: Booking.com Accommodation Income (positive) ---
-        if "BOOKING.COM B.V." in desc and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        # --- Rule: Social Media Invoice 56 ---
-        if "SOCIAL MEDIA INV 56" in desc:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Vassilis"
-            entry["Description"] = "Promotion"
-            filled = True
-
-        # --- Rule: Transfer Between Accounts August (negative) ---
-        if "TRANSFER BETWEEN ACCOUNTS AUGUST" in desc and row['ΠΟΣΟ'] < 0:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Cash facilitation"
-            entry["Supplier"] = "Hotel"
-            entry["Description"] = "Cash facilitation"
-            filled = True
-
-        # --- Rule: Septic Tank expenses ---
-        if "SEPTIC" in desc:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Septic Tank"
-            entry["Supplier"] = "Septic Tank"
-            entry["Description"] = "Septic Tank"
-            filled = True
-
-        # --- Rule: Roompay Invoice Registration ---
-        if "ROOMPAY INVOICE REGISTRATION" in desc:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Web Hotelier"
-            entry["Description"] = "Website"
-            filled = True
-
-        # --- Rule: Bank Fees (ΠΡΟΜΗΘΕΙΕΣ ΕΞΟΔΑ) ---
-        if "ΠΡΟΜΗΘΕΙΕΣ ΕΞΟΔΑ" in desc:
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Bank"
-            entry["Supplier"] = "Bank"
-            entry["Description"] = "Bank fees"
-            filled = True
-
-        # --- Rule: Etheras Properties Management / Anna Kythira Supervision ---
-        if "ETHERAS PROPERTIES MANAGEMENT" in desc and any (term in desc for term in ["LOURANTOU INVOICE", "MANAGEMENT", "SUPERVISION"]):
-            entry["Expenses Type"] = "Hotel operation"
-            entry["Type"] = "Anna Kythira"
-            entry["Supplier"] = "Anna Kythira"
-            entry["Description"] = "Supervision monthly fee"
-            filled = True
-                    
-
-        # --- New Rule 1 ---
-        if ("ΠΚ/00505341795" in desc or "ΠΚ/02505341795" in desc) and row['ΠΟΣΟ'] > 0:
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-
-        if "STAMATIS PANAGIOTIS STAVRO" in desc.upper():
-            entry["Plot"] = "G1 - Manolis"
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Rent"
-            entry["Supplier"] = "Tenant - Taverne"
-            entry["Description"] = "Monthly Taverne rent"
-            filled = True
-
-        if any(term in desc.upper() for term in ["TRANSFER BETWEEN ACCOUNTS", "NBG TO EURO"]):
-            entry["Plot"] = "G1 - Manolis"
-            entry["Expenses Type"] = "Operation Income"
-            entry["Type"] = "Accommodation"
-            entry["Supplier"] = "Booking"
-            entry["Description"] = "Accommodation fees"
-            filled = True
-
-        if "ZARA" in desc.upper():
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Maintenance"
-            entry["Description"] = "Maintenance"
-            filled = True
-
-        if "WATT-VOLT" in desc.upper():
-            entry["Type"] = "Authorities"
-            entry["Supplier"] = "Electricity"
-            entry["Description"] = "Electricity"
-            filled = True
-
-        if "ARID" in desc.upper():
-            entry["Type"] = "Architect"
-            entry["Supplier"] = "ARID"
-            entry["Description"] = "Planning"
-            filled = True
-
-        if "PANAYOTIS" in desc.upper():
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Panayotis"
-            entry["Description"] = "Car rent fees"
-            filled = True
-
-        if "EDEN" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Accommodation"
-            entry["Description"] = "Hotel"
-            filled = True
-
-        if any(keyword in desc.upper() for keyword in ["TRANSPORT KALLI GR","GRIGORAK KYTHI GR", "O MAGOS KYTHI GR", "STAMATIS KYTHI GR", "KONTOLEO KYTHI GR", "VITSIO KYTHI GR", "BOURNAKI KYTHI GR", "STAVROU KYTHI GR"]):
-            entry["Type"] = "General"
-            entry["Supplier"] = "F&B"
-            entry["Description"] = "F&B"
-            filled = True
-
-        if "ALL PLOTS MARKETING" in desc:
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "Marketing"
-            entry["Description"] = "Marketing Services fee"
-            filled = True
-
-        if "CALEN" in desc or "HARD COST" in desc:
-            entry["Expenses Type"] = "Hard Cost"
-            entry["Type"] = "Contractor"
-            entry["Supplier"] = "Calen"
-            entry["Description"] = "Construction works"
-            filled = True
-
-        if "SUPERVISION" in desc:
-            entry["Type"] = "Supervision"
-            entry["Supplier"] = "TAG ARCHITECTS"
-            entry["Description"] = "Supervision"
-            filled = True
-
-        if "HOLIDAYS TEL" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Flight"
-            filled = True
-
-        if "EL AL" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Flight"
-            filled = True
-
-        if any(keyword in desc.upper() for keyword in ["FACEBOOK", "FACEBK", "FB.ME", "META"]):
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "Marketing"
-            entry["Description"] = "Marketing Services fee"
-            filled = True
-
-        if any(term in desc for term in ["ACCOUNTING", "BOOKKEEP", "ECOVIS"]) and not any(word in desc for word in ["YAG", "TAG"]):
-            entry["Type"] = "Accounting"
-            entry["Supplier"] = "Ecovis"
-            entry["Description"] = "Accountant monthly fees"
-            filled = True
-
-        if "GAS" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Gas station"
-            filled = True
-
-        if "DRAKAKIS" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Drakakis Tours"
-            entry["Description"] = "Car rent fees"
-            filled = True
-
-        if "FLIGHT" in desc or "AEGEAN" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Flight"
-            filled = True
-
-        if "TONY S" in desc or "Tony S" in desc or "tony s" in desc or "eat" in desc or "EAT" in desc:
-            entry["Type"] = "General"
-            entry["Supplier"] = "F&B"
-            entry["Description"] = "F&B"
-            filled = True
-
-        if any(word in desc for word in ["AEGEANWEB", "AEGEAN", "OLYMPIC", "SKY", "ISRAIR", "WIZZ"]):
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Flight"
-            filled = True
-
-        if any(word in desc for word in ["DINNER", "FOOD", "CAFE", "COFFEE", "LUNCH", "BREAKFAST"]):
-            entry["Type"] = "General"
-            entry["Supplier"] = "F&B"
-            entry["Description"] = "F&B"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and ("villa 1" in desc or "Villa 1" in desc or "VILLA 1" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 1"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and ("villa 2" in desc or "Villa 2" in desc or "VILLA 2" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 2"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if "RF919086180000334" in desc:
-            entry["Plot"] = "R4"
-            entry["Expenses Type"] = "Soft Cost"
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and ("villa 3" in desc or "Villa 3" in desc or "VILLA 3" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 3"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and ("villa 4" in desc or "Villa 4" in desc or "VILLA 4" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 4"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and ("villa 5" in desc or "Villa 5" in desc or "VILLA 5" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 5"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if ("broker" in desc or "Broker" in desc or "BROKER" in desc) and ("villa 6" in desc or "Villa 6" in desc or "VILLA 6" in desc):
-            entry["Type"] = "Brokers"
-            entry["Supplier"] = "Buyer Villa 6"
-            entry["Description"] = "Broker fees"
-            filled = True
-
-        if "GOOGLE" in desc or "ΣΥΝΔΡΟΜΗ ADVANCED FOR BUSINES" in desc:
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "Marketing"
-            entry["Description"] = "Marketing Services fee"
-            filled = True
-
-        if "CRM" in desc:
-            entry["Type"] = "Marketing"
-            entry["Supplier"] = "reWire"
-            entry["Description"] = "CRM"
-            filled = True
-
-        if "RF91908618000033404472101" in desc or "PROT-RF549086180000334" in desc:
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            entry["Plot"] = "G2"
-            filled = True
-
-        if "RF38908618000033404445701" in desc or "RF389086180000334044" in desc:
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            entry["Plot"] = "Y3"
-            filled = True
-
-        if "RF91908618000033404472101" in desc or "PROT-919086180000334" in desc:
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            entry["Plot"] = "R4"
-            filled = True
-
-        if "UBER" in desc or "TAXI" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Athens Taxi"
-            filled = True
-
-        if "OPENAI" in desc:
-            entry["Type"] = "General"
-            entry["Supplier"] = "Office expenses"
-            entry["Description"] = "Office expense"
-            filled = True
-
-        if "TAG" in desc:
-            entry["Type"] = "Architect"
-            entry["Supplier"] = "TAG ARCHITECTS"
-            if "SUP" in desc:
-                entry["Description"] = "Supervision"
-            else:
-                entry["Description"] = "Planning"
-            filled = True
-
-        if "OASA" in desc:
-            entry["Type"] = "Project management"
-            entry["Supplier"] = "Transportation"
-            entry["Description"] = "Transportation"
-            filled = True
-
-        if "ΔΗΜΟ-RF369029090000097" in desc:
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Water"
-            entry["Plot"] = "Y3"
-            filled = True
-
-        if any(term in desc for term in ["MANAGEMENT", "MANAG.", "MGMT", "MNGMT"]) and row['ΠΟΣΟ'] in [-1550, -1550.00, -1550.0, 1550.00, 1550.0, 2055, 2055.0, 2057.0, 1550]:
-            entry["Type"] = "Worker 1"
-            entry["Supplier"] = "Aiolos Athens"
-            entry["Description"] = "management fees"
-            filled = True
-
-        if any(term in desc for term in ["COSM", "COSMOTE", "PHONE"]):
-            entry["Type"] = "Hotel operation"
-            entry["Supplier"] = "Cosmote"
-            entry["Description"] = "Telephone"
-            filled = True
-
-        if "RF389086180000334" in desc:
-            entry["Type"] = "Utility Bills"
-            entry["Supplier"] = "Municipality"
-            entry["Description"] = "Electricity"
-            entry["Plot"] = "Y3"
-            filled = True
-
-        # ============================================
-        # END OF Ilisia RULES
-        # ============================================
-
-        if not filled:
-            entry["Description"] = f"🟨 {entry['Description']}"
-
-        results.append(entry)
-
-    return pd.DataFrame(results)
-
-
-
 # ============================================
 # MAIN TABS
 # ============================================
@@ -2337,17 +468,52 @@ with tab1:
         st.markdown("### 📊 Excel Classifier")
         st.markdown("Upload your financial Excel file to automatically categorize and organize transactions.")
         
-        format_type = st.selectbox(
-            "Select File Format",
-            ["Diakofti Euro", "Athens NBG", "Ilisia NBG", "Ilisia Euro"],
-            help="Choose the format that matches your data structure"
-        )
-        
         uploaded_file = st.file_uploader(
             "Upload Excel or CSV File",
             type=["xlsx", "csv", "xls"],
             help="Drag and drop or click to browse"
         )
+
+        # הפורמט מזוהה מהכותרות ומהשורות הראשונות, לפני קריאת כל הקובץ
+        format_names = list(FORMATS)
+        detected, not_a_statement = None, None
+        if uploaded_file:
+            try:
+                detected = check_statement(uploaded_file)
+            except Exception as e:
+                not_a_statement = str(e)
+
+        format_type = st.selectbox(
+            "File Format",
+            format_names,
+            index=format_names.index(detected) if detected else 0,
+            key=f"format_{uploaded_file.name}_{uploaded_file.size}" if uploaded_file else "format_type",
+            help="Detected from the uploaded file's columns and first rows - change it if the account is wrong"
+        )
+
+        large_file_mode = st.checkbox(
+            "⚡ Large file mode",
+            help="Read, classify and write the file in chunks of rows, so very large exports fit in memory"
+        )
+
+        incremental_mode = st.checkbox(
+            "🔁 Only classify new transactions",
+            help="Rows seen in earlier uploads of this account are taken from the transaction index "
+                 "(with any imported corrections); the output marks new rows in the 'New' column"
+        )
+
+        rule_stats_mode = st.checkbox(
+            "📈 Rule statistics",
+            help="Count how often each rule is checked, matches and is overwritten by a later rule, "
+                 "and time it (the file is always re-classified, not taken from the cache)"
+        )
+
+        suggest_mode = st.checkbox(
+            "🤖 Suggest classes for 🟨 rows",
+            help="A local model learned from this account's transaction index (earlier runs with "
+                 "'Only classify new transactions' and imported corrections) fills 'Suggested ...' "
+                 "columns for rows no rule matched; they stay marked for review"
+        )
         st.markdown('</div>', unsafe_allow_html=True)
     
     # -------------------------------------
@@ -2357,7 +523,7 @@ with tab1:
         st.markdown('<div class="info-card">', unsafe_allow_html=True)
         st.markdown("### 📌 Quick Guide")
         st.markdown("""
-        **Formats:**
+        **Formats** (detected from the uploaded file):
         - **Diakofti Euro**: Plot-based transactions
         - **Athens NBG**: Office expenses
         - **Ilisia NBG**: Ilisia project from NBG
@@ -2370,56 +536,80 @@ with tab1:
         **Output:**
         - Auto-categorized data
         - Entries needing review marked with 🟨
+        - Excel, plus typed Parquet / Arrow files for pivot scripts
+
+        **Large files:** tick ⚡ *Large file mode* to classify the file in chunks
+
+        **Unmatched rows:** tick 🤖 to get suggested Type/Supplier/Description learned from your reviewed rows
         """)
         st.markdown('</div>', unsafe_allow_html=True)
     
     # -------------------------------------
     # PROCESSING SECTION
     # -------------------------------------
-    if uploaded_file:
-        st.markdown('<div class="success-msg">✅ File uploaded successfully!</div>', unsafe_allow_html=True)
+    if uploaded_file and not_a_statement:
+        st.error(f"❌ {not_a_statement}")
+    elif uploaded_file:
+        st.markdown(f'<div class="success-msg">✅ File uploaded successfully! Detected format: {detected}</div>',
+                    unsafe_allow_html=True)
 
         if st.button("🚀 Process File", use_container_width=True, key="process_excel"):
             with st.spinner("Processing your data..."):
                 try:
-                    # ----------------------------
-                    # READ FILE (Excel / CSV)
-                    # ----------------------------
-                    if uploaded_file.name.lower().endswith('.csv'):
-                        # קריאת CSV עם encoding נכון לפי הפורמט
-                        if format_type in ["Diakofti Euro", "Ilisia Euro"]:
-                            df = pd.read_csv(uploaded_file, encoding="ISO-8859-7")
-                        else:
-                            try:
-                                df = pd.read_csv(uploaded_file)
-                            except UnicodeDecodeError:
-                                df = pd.read_csv(uploaded_file, encoding="ISO-8859-7")
-                    else:
-                        df = pd.read_excel(uploaded_file)
-                    
-                    # ----------------------------
-                    # SELECT PROCESSOR FUNCTION
-                    # ----------------------------
-                    if format_type == "Diakofti Euro":
-                        result_df = process_diakofti_file(df)
-                    
-                    elif format_type == "Athens NBG":
-                        result_df = process_athens_file(df)
-                    
-                    elif format_type == "Ilisia NBG":
-                        result_df = process_ilisia_file(df)
+                    # a format changed by hand is checked on the header too
+                    check_statement(uploaded_file, format_type)
 
-                    elif format_type == "Ilisia Euro":
-                        result_df = process_ilisia_euro_file(df)
-                    
+                    output = BytesIO()
+                    process_file, rule_file = FORMATS[format_type]
+                    rule_stats = RuleStats(rule_file.matcher()) if rule_stats_mode else None
+                    suggest = (lambda frame: add_suggestions(frame, format_type)) if suggest_mode else None
+                    if large_file_mode:
+                        # ----------------------------
+                        # STREAM: READ → CLASSIFY → WRITE, CHUNK BY CHUNK
+                        # ----------------------------
+                        stats = stream_classify_to_xlsx(uploaded_file, format_type, output,
+                                                        stats=rule_stats, postprocess=suggest)
+                        total_entries = stats["total"]
+                        needs_review = stats["needs_review"]
+                        preview_df = stats["preview"]
+                        result_df = None   # never held whole: xlsx only
+                    elif incremental_mode:
+                        # ----------------------------
+                        # READ FILE & CLASSIFY ONLY UNSEEN TRANSACTIONS
+                        # ----------------------------
+                        df = read_statement(uploaded_file, format_type)
+                        result_df = classify_incremental(df, format_type, stats=rule_stats)
+                        if suggest is not None:
+                            result_df = suggest(result_df)
+
+                        total_entries = len(result_df)
+                        needs_review = int(review_rows(result_df).sum())
+                        new_entries = int(result_df[NEW].sum())
+                        st.info(f"🆕 {new_entries} new transactions, {total_entries - new_entries} taken from earlier runs")
+                        preview_df = result_df.head(10)
+                        write_classified_xlsx(result_df, output)
                     else:
-                        raise ValueError(f"Unknown format type: {format_type}")
-                    
+                        # ----------------------------
+                        # READ FILE (Excel / CSV) & CLASSIFY (cached)
+                        # ----------------------------
+                        # אותו קובץ עם אותם חוקים → תוצאה מה-cache
+                        if rule_stats is not None:
+                            # סטטיסטיקה דורשת הרצה אמיתית של החוקים
+                            result_df = process_file(read_statement(uploaded_file, format_type), stats=rule_stats)
+                        else:
+                            result_df = classify_cached(uploaded_file.name, uploaded_file.getvalue(), format_type)
+                        if suggest is not None:
+                            result_df = suggest(result_df)
+
+                        total_entries = len(result_df)
+                        needs_review = int(review_rows(result_df).sum())
+                        preview_df = result_df.head(10)
+                        write_classified_xlsx(result_df, output)
+                    output.seek(0)
+
                     # ----------------------------
                     # METRICS
                     # ----------------------------
-                    total_entries = len(result_df)
-                    needs_review = result_df['Description'].astype(str).str.contains('🟨').sum() if total_entries else 0
                     auto_classified = total_entries - needs_review
                     success_rate = (auto_classified / total_entries * 100) if total_entries > 0 else 0
                     
@@ -2448,15 +638,28 @@ with tab1:
                     # PREVIEW
                     # ----------------------------
                     st.markdown("### 📋 Data Preview")
-                    st.dataframe(result_df.head(10), use_container_width=True)
+                    if preview_df is not None:
+                        st.dataframe(preview_df, use_container_width=True)
                     
+                    # ----------------------------
+                    # RULE STATISTICS
+                    # ----------------------------
+                    if rule_stats is not None:
+                        st.markdown("### 📈 Rule Statistics")
+                        st.caption(f"{rule_stats.rows} rows · keyword scan {rule_stats.scan_seconds * 1000:.1f} ms · "
+                                   "Overwritten = matched rows where a later rule replaced one of this rule's fields")
+                        st.dataframe(rule_stats.table(), use_container_width=True, hide_index=True)
+                        st.download_button(
+                            label="📥 Download Rule Statistics (JSON)",
+                            data=rule_stats.to_json(),
+                            file_name=f"{format_type.lower().replace(' ', '_')}_rule_stats.json",
+                            mime="application/json",
+                            use_container_width=True
+                        )
+
                     # ----------------------------
                     # DOWNLOAD BUTTON
                     # ----------------------------
-                    output = BytesIO()
-                    result_df.to_excel(output, index=False, engine='openpyxl')
-                    output.seek(0)
-                    
                     # שם קובץ נקי (להחליף רווחים ב-underscore)
                     clean_format_name = format_type.lower().replace(' ', '_')
                     timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -2468,6 +671,31 @@ with tab1:
                         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                         use_container_width=True
                     )
+
+                    # typed columnar copies for pivot scripts (pandas / polars / DuckDB)
+                    if result_df is not None:
+                        parquet_output, arrow_output = BytesIO(), BytesIO()
+                        write_classified_parquet(result_df, parquet_output)
+                        write_classified_arrow(result_df, arrow_output)
+                        col_parquet, col_arrow = st.columns(2)
+                        with col_parquet:
+                            st.download_button(
+                                label="📦 Download Parquet",
+                                data=parquet_output.getvalue(),
+                                file_name=f"{clean_format_name}_processed_{timestamp}.parquet",
+                                mime="application/vnd.apache.parquet",
+                                use_container_width=True
+                            )
+                        with col_arrow:
+                            st.download_button(
+                                label="🏹 Download Arrow (IPC)",
+                                data=arrow_output.getvalue(),
+                                file_name=f"{clean_format_name}_processed_{timestamp}.arrow",
+                                mime="application/vnd.apache.arrow.file",
+                                use_container_width=True
+                            )
+                    else:
+                        st.caption("Parquet / Arrow downloads are not offered in ⚡ Large file mode")
                 
                 except Exception as e:
                     st.error(f"❌ Error processing file: {str(e)}")
@@ -2476,6 +704,106 @@ with tab1:
                     import traceback
                     with st.expander("🔧 Technical Details (for debugging)"):
                         st.code(traceback.format_exc())
+
+    # -------------------------------------
+    # CORRECTIONS → TRANSACTION INDEX
+    # -------------------------------------
+    with st.expander("📝 Import corrected workbook"):
+        st.markdown(f"Upload a workbook exported with *Only classify new transactions* after fixing it by hand. "
+                    f"Its rows replace the stored ones for **{format_type}**, so the next runs keep your corrections.")
+        corrected_file = st.file_uploader("Corrected workbook", type=["xlsx"], key="corrections_file")
+        if corrected_file and st.button("💾 Save Corrections", key="save_corrections"):
+            try:
+                corrected = pd.read_excel(corrected_file)
+                # suggestions are not corrections: the reviewer's values are in the real columns
+                corrected = corrected.drop(columns=suggestion_columns(), errors="ignore")
+                saved = import_corrections(corrected, format_type)
+                st.success(f"✅ {saved} rows saved to the {format_type} transaction index")
+            except Exception as e:
+                st.error(f"❌ Error importing corrections: {str(e)}")
+
+    # -------------------------------------
+    # BATCH SECTION (month-end: many statements at once)
+    # -------------------------------------
+    st.markdown("---")
+    st.markdown("### 📚 Batch Classification")
+    st.markdown("Upload several statements at once. Each file's format is detected from its columns; "
+                "the result is one workbook with a sheet per account.")
+
+    batch_files = st.file_uploader(
+        "Upload Statements",
+        type=["xlsx", "csv", "xls"],
+        accept_multiple_files=True,
+        key="batch_files",
+        help="Drag and drop several files or click to browse"
+    )
+
+    if batch_files:
+        format_names = list(FORMATS)
+        jobs, refused = [], []
+        for i, f in enumerate(batch_files):
+            detected, not_a_statement = None, None
+            try:
+                detected = check_statement(f)
+            except Exception as e:
+                not_a_statement = str(e)
+            # אפשר לתקן את הזיהוי ידנית (למשל Diakofti / Ilisia Euro - אותן עמודות)
+            chosen = st.selectbox(
+                f"📄 {f.name}",
+                format_names,
+                index=format_names.index(detected) if detected else None,
+                key=f"batch_format_{i}_{f.name}",
+                placeholder="Format not recognised - please choose",
+                help="Detected from the file's columns" if detected else "Format not recognised - please choose"
+            )
+            # checked on the header and first rows, before anything is fully read
+            try:
+                if chosen is None:
+                    raise ValueError(not_a_statement)
+                if chosen != detected:
+                    check_statement(f, chosen)
+            except Exception as e:
+                st.error(f"❌ {f.name}: {e}")
+                refused.append(f.name)
+                continue
+            jobs.append((f.name, f.getvalue(), chosen))
+
+        if refused:
+            st.warning(f"⚠️ Not processed: {', '.join(refused)}")
+
+        if jobs and st.button("🚀 Process All Files", use_container_width=True, key="process_batch"):
+            with st.spinner(f"Processing {len(jobs)} files..."):
+                try:
+                    accounts = classify_batch(jobs)
+
+                    summary = pd.DataFrame([
+                        {
+                            "Account": account,
+                            "Entries": len(df),
+                            "Need Review": int(review_rows(df).sum()),
+                        }
+                        for account, df in accounts.items()
+                    ])
+                    st.dataframe(summary, use_container_width=True, hide_index=True)
+
+                    output = BytesIO()
+                    write_accounts_xlsx(accounts, output)
+                    output.seek(0)
+
+                    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+                    st.download_button(
+                        label="📥 Download Combined Workbook",
+                        data=output,
+                        file_name=f"batch_processed_{timestamp}.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        use_container_width=True
+                    )
+
+                except Exception as e:
+                    st.error(f"❌ Error processing files: {str(e)}")
+                    import traceback
+                    with st.expander("🔧 Technical Details (for debugging)"):
+                        st.code(traceback.format_exc())
 # ============================================
 # TAB 2: PAYMENT INSTRUCTIONS
 # ============================================
@@ -2563,14 +891,11 @@ with tab2:
                     "timestamp": datetime.datetime.now().isoformat()
                 }
                 
-                st.session_state.payment_instructions_db.append(payment_instruction)
-                
                 # עדיין שמור גם כ-last_payment לתאימות לאחור
                 st.session_state.last_payment = payment_instruction
                 # Persist to disk so history survives refresh/close
                 try:
-                    with open("payment_instructions_db.json", "w", encoding="utf-8") as f:
-                        json.dump(st.session_state.payment_instructions_db, f, ensure_ascii=False, indent=2)
+                    add_record(PAYMENT_INSTRUCTIONS, payment_instruction)
                 except Exception as e:
                     st.warning(f"Could not persist payment instructions: {e}")
 
@@ -2605,38 +930,8 @@ with tab3:
     st.markdown('<div class="info-card">', unsafe_allow_html=True)
     st.markdown("### 🧾 Receipt of Funds Generator")
     
-    # ---------- Persistence helpers for Payment Instructions ----------
-    PI_DB_FILE = "payment_instructions_db.json"
-
-    def _load_payment_db():
-        try:
-            if os.path.exists(PI_DB_FILE):
-                with open(PI_DB_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    return data if isinstance(data, list) else []
-        except Exception:
-            pass
-        return []
-
-    def _save_payment_db(data):
-        try:
-            with open(PI_DB_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            st.warning(f"Could not persist payment instructions: {e}")
-
-    # Bootstrap session state from disk or sync to disk
-    if 'payment_instructions_db' not in st.session_state:
-        st.session_state.payment_instructions_db = _load_payment_db()
-    else:
-        # אם יש נתונים בזיכרון נטען אותם לדיסק כדי להבטיח התמדה
-        if st.session_state.payment_instructions_db:
-            _save_payment_db(st.session_state.payment_instructions_db)
-        else:
-            # אם אין בזיכרון ננסה לטעון מהדיסק
-            disk_data = _load_payment_db()
-            if disk_data:
-                st.session_state.payment_instructions_db = disk_data
+    # ---------- Payment Instructions (from the record store) ----------
+    payment_instructions = shared_record_view().records(PAYMENT_INSTRUCTIONS)
 
     # ---------- Helpers for form state ----------
     def _all_projects():
@@ -2730,7 +1025,7 @@ with tab3:
         return doc
 
     # ---------- Payment Instructions History ----------
-    if st.session_state.payment_instructions_db:
+    if payment_instructions:
         st.markdown("### 📋 Payment Instructions History")
         st.markdown('<div class="info-msg">💡 Select a payment instruction to auto-fill the receipt form</div>', unsafe_allow_html=True)
         
@@ -2745,8 +1040,8 @@ with tab3:
         with cols_history[7]: st.write("**Delete**")
         st.markdown("---")
         
-        for idx, instruction in enumerate(reversed(st.session_state.payment_instructions_db)):
-            actual_idx = len(st.session_state.payment_instructions_db) - 1 - idx
+        for idx, instruction in enumerate(reversed(payment_instructions)):
+            record_id = instruction[ROW_ID]
             cols_row = st.columns([0.5, 1, 1.5, 1.5, 1, 1, 0.5, 0.5])
             with cols_row[0]:
                 st.write(f"{idx + 1}")
@@ -2762,14 +1057,13 @@ with tab3:
             with cols_row[5]:
                 st.write(f"€{instruction['amount']}")
             with cols_row[6]:
-                if st.button("📥", key=f"load_pi_{actual_idx}", help="Load this payment instruction"):
+                if st.button("📥", key=f"load_pi_{record_id}", help="Load this payment instruction"):
                     st.session_state.selected_payment_instruction = instruction
                     st.session_state.load_into_form = True   # flag to prefill widgets
                     st.rerun()
             with cols_row[7]:
-                if st.button("🗑️", key=f"delete_pi_{actual_idx}", help="Delete this payment instruction"):
-                    st.session_state.payment_instructions_db.pop(actual_idx)
-                    _save_payment_db(st.session_state.payment_instructions_db)  # persist deletion
+                if st.button("🗑️", key=f"delete_pi_{record_id}", help="Delete this payment instruction"):
+                    delete_record(PAYMENT_INSTRUCTIONS, record_id)  # persist deletion
                     st.success("Payment instruction deleted!")
                     st.rerun()
         st.markdown("---")
@@ -2899,7 +1193,10 @@ with tab3:
                     "notes": rx,
                     "timestamp": datetime.datetime.now().isoformat()
                 }
-                st.session_state.receipts_db.append(receipt_record)
+                try:
+                    add_record(RECEIPTS, receipt_record)
+                except Exception as e:
+                    st.warning(f"Could not persist receipts DB: {e}")
 
                 st.markdown('<div class="success-msg">✅ Receipt of Funds generated successfully!</div>', unsafe_allow_html=True)
                 st.download_button(
@@ -2926,39 +1223,9 @@ with tab4:
     st.markdown('<div class="info-card">', unsafe_allow_html=True)
     st.markdown("### 📋 All Receipts & Invoices Database")
 
-    # ---------- Persistence helpers ----------
-    RECEIPTS_DB_FILE = "receipts_db.json"
-
-    def _load_receipts_db():
-        try:
-            if os.path.exists(RECEIPTS_DB_FILE):
-                with open(RECEIPTS_DB_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    return data if isinstance(data, list) else []
-        except Exception:
-            pass
-        return []
-
-    def _save_receipts_db(data):
-        try:
-            with open(RECEIPTS_DB_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            st.warning(f"Could not persist receipts DB: {e}")
-
-    # Bootstrap session state from disk or sync to disk
-    if 'receipts_db' not in st.session_state:
-        st.session_state.receipts_db = _load_receipts_db()
-    else:
-        if st.session_state.receipts_db:
-            _save_receipts_db(st.session_state.receipts_db)
-        else:
-            disk_data = _load_receipts_db()
-            if disk_data:
-                st.session_state.receipts_db = disk_data
-
     # Combine all receipts and invoices
-    all_records = st.session_state.receipts_db
+    record_view = shared_record_view()
+    all_records = record_view.records(RECEIPTS)
 
     if all_records:
         # Create DataFrame for display
@@ -2973,7 +1240,8 @@ with tab4:
                 total_amount += amt
             except Exception:
                 pass
-        unique_projects = len(set(r.get('project', '') for r in all_records if r.get('project')))
+        record_projects = record_view.values(RECEIPTS, "project")
+        unique_projects = len(record_projects)
 
         st.markdown(f"""
         <div class="metric-container">
@@ -2997,13 +1265,13 @@ with tab4:
         with col1:
             filter_project = st.selectbox(
                 "Filter by Project",
-                ["All"] + sorted(set(r.get('project', '') for r in all_records if r.get('project'))),
+                ["All"] + record_projects,
                 key="filter_project"
             )
         with col2:
             filter_villa = st.selectbox(
                 "Filter by Villa",
-                ["All"] + sorted(set(r.get('villa', '') for r in all_records if r.get('villa'))),
+                ["All"] + record_view.values(RECEIPTS, "villa"),
                 key="filter_villa"
             )
         with col3:
@@ -3013,14 +1281,10 @@ with tab4:
                 key="filter_type"
             )
         
-        # Apply filters
-        filtered_records = all_records
-        if filter_project != "All":
-            filtered_records = [r for r in filtered_records if r.get('project') == filter_project]
-        if filter_villa != "All":
-            filtered_records = [r for r in filtered_records if r.get('villa') == filter_villa]
-        if filter_type != "All":
-            filtered_records = [r for r in filtered_records if r.get('type') == filter_type]
+        # Apply filters (indexed query; "All" = no condition)
+        filters = {"project": filter_project, "villa": filter_villa, "type": filter_type}
+        filters = {k: v for k, v in filters.items() if v != "All"}
+        filtered_records = record_view.records(RECEIPTS, **filters) if filters else all_records
         
         # Display table
         if filtered_records:
@@ -3043,12 +1307,8 @@ with tab4:
                             st.write(f"**Notes:** {notes_val}")
                     with colB:
                         # מחיקה בטוחה + התמדה לדיסק
-                        if st.button("🗑️ Delete", key=f"delete_{idx}"):
-                            for i, r0 in enumerate(st.session_state.receipts_db):
-                                if r0 is record:
-                                    st.session_state.receipts_db.pop(i)
-                                    _save_receipts_db(st.session_state.receipts_db)
-                                    break
+                        if st.button("🗑️ Delete", key=f"delete_{record[ROW_ID]}"):
+                            delete_record(RECEIPTS, record[ROW_ID])
                             st.rerun()
         else:
             st.info("No records found with the selected filters.")
@@ -3058,7 +1318,7 @@ with tab4:
         st.markdown("### 📥 Export Options")
         
         if st.button("📊 Export All to Excel", use_container_width=True):
-            df_export = pd.DataFrame(all_records)
+            df_export = pd.DataFrame(all_records).drop(columns=[ROW_ID])
             output = BytesIO()
             df_export.to_excel(output, index=False, engine='openpyxl')
             output.seek(0)
@@ -3082,12 +1342,13 @@ with tab4:
     with col1:
         if st.button("🗑️ Clear All Records", use_container_width=True):
             st.session_state.show_clear_confirm = True
+            # only what is on screen now: records other sessions add meanwhile stay
+            st.session_state.clear_up_to = all_records[-1][ROW_ID] if all_records else 0
     
     if 'show_clear_confirm' in st.session_state and st.session_state.show_clear_confirm:
         with col2:
             if st.button("✅ Confirm Clear", use_container_width=True):
-                st.session_state.receipts_db = []
-                _save_receipts_db(st.session_state.receipts_db)  # persist empty DB
+                clear_records(RECEIPTS, up_to=st.session_state.get('clear_up_to', 0))  # persist empty DB
                 # אופציונלי: נקה גם invoices_db אם תרצה התמדה נפרדת לקבצים
                 st.session_state.invoices_db = []
                 st.session_state.show_clear_confirm = False
@@ -3532,10 +1793,17 @@ with tab6:
     5. **Manage**: Clear database if needed
     
     #### 🔧 Adding Classification Rules
-    To add classification rules, edit the code in the processing functions:
-    - **Diakofti Rules**: Look for the section marked "🔴 Diakofti RULES"
-    - **Athens Rules**: Look for the section marked "🔵 Athens RULES"
-    
+    To add classification rules, edit the rule files in the `rules/` folder:
+    - **Diakofti Rules**: `rules/diakofti.yaml`
+    - **Athens Rules**: `rules/athens.yaml`
+    - **Ilisia Rules**: `rules/ilisia.yaml` (Ilisia NBG and Ilisia Euro)
+
+    Card merchants whose name varies ("GRIGORAK KYTHI GR", "ΓΡΗΓΟΡΑΚΗΣ ΚΥΘΗΡΑ") go in the
+    `suppliers:` list of the same file - one alias finds every spelling. Rows found only
+    through a different spelling are filled in but stay marked 🟨 for review.
+
+    Saved changes are used from the next file you process - no restart needed.
+
     #### 📞 Support
     For issues or questions, please contact the development team.
     
@@ -0,0 +1,194 @@
+"""Classifier throughput benchmark (headless, no Streamlit).
+
+Generates synthetic bank statements for every format and reports how fast
+the processors in classifier.py run on them:
+
+    python benchmark.py                          # all formats, 1k/10k/100k/1M rows
+    python benchmark.py --sizes 1000 10000 --formats "Athens NBG"
+    python benchmark.py --json bench.json        # also save per-rule counters and timings
+"""
+import argparse
+import datetime
+import json
+import random
+import time
+import tracemalloc
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from classifier import FORMATS, PLOTS, RuleStats
+from statement_io import read_statement
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# ============================================
+# SYNTHETIC STATEMENTS
+# ============================================
+_GREEK_WORDS = ["ΑΓΟΡΑ", "ΠΛΗΡΩΜΗ", "ΜΕΤΑΦΟΡΑ", "ΚΑΤΑΘΕΣΗ", "ΑΝΑΛΗΨΗ", "ΠΡΟΜΗΘΕΙΑ", "ΕΜΒΑΣΜΑ",
+                "ΛΟΓΑΡΙΑΣΜΟΣ", "ΣΟΥΠΕΡ ΜΑΡΚΕΤ", "ΚΑΦΕΤΕΡΙΑ", "ΑΘΗΝΑ", "ΧΑΝΙΑ", "ΠΑΡΑΣΤΑΤΙΚΟ"]
+_LATIN_WORDS = ["POS", "CARD", "PURCHASE", "TRANSFER", "SEPA", "ONLINE", "ATHENS", "CHANIA",
+                "LTD", "IKE", "SA", "INVOICE", "REF", "MARKET", "SERVICES"]
+_MERCHANTS = 2_000   # distinct recurring counterparties per statement
+
+
+def _rf_code(rnd):
+    """RF creditor reference: RF + 2 check digits + up to 21 characters."""
+    return f"RF{rnd.randint(10, 99)}{rnd.randint(10**14, 10**17 - 1)}"
+
+
+def _euro(value):
+    """1234.5 -> '1.234,50' (Greek bank CSV style)."""
+    text = f"{abs(value):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return ("-" if value < 0 else "") + text
+
+
+def _descriptions(rnd, keywords, n):
+    """Mixed Greek/Latin descriptions: recurring merchants, rule keywords, RF codes, card refs."""
+    def one():
+        parts = rnd.sample(_GREEK_WORDS, rnd.randint(0, 2)) + rnd.sample(_LATIN_WORDS, rnd.randint(0, 2))
+        if keywords and rnd.random() < 0.7:
+            parts.append(rnd.choice(keywords))
+        if rnd.random() < 0.15:
+            parts.append(rnd.choice(PLOTS))
+        rnd.shuffle(parts)
+        return " ".join(parts) or "ΠΛΗΡΩΜΗ"
+
+    merchants = [one() for _ in range(_MERCHANTS)]
+    out = []
+    for _ in range(n):
+        desc = rnd.choice(merchants)
+        r = rnd.random()
+        if r < 0.2:
+            desc = f"{desc} {_rf_code(rnd)}"
+        elif r < 0.4:
+            desc = f"{desc} CARD {rnd.randint(4000, 4999)}XXXXXXXX{rnd.randint(1000, 9999)}"
+        elif r < 0.5:
+            desc = desc.title()
+        out.append(desc)
+    return out
+
+
+def _amounts(rnd, rules, n):
+    """Signed amounts; some hit the exact values amount rules look for."""
+    exact = [v for rule in rules for test in (rule.get("amount", {}), rule.get("signed", {}))
+             for op, v in test.items() if op in ("eq", "in")]
+    exact = [x for v in exact for x in (v if isinstance(v, list) else [v])]
+    values = []
+    for _ in range(n):
+        if exact and rnd.random() < 0.05:
+            v = float(rnd.choice(exact))
+        else:
+            v = round(rnd.lognormvariate(4, 1.5), 2)
+            v = -v if rnd.random() < 0.7 else v
+        values.append(v)
+    return values
+
+
+def _dates(rnd, n):
+    start = datetime.date(2024, 1, 1)
+    return [(start + datetime.timedelta(days=rnd.randint(0, 365))).strftime("%d/%m/%Y") for _ in range(n)]
+
+
+def make_statement(format_type, n, seed=0):
+    """A synthetic statement with the real column headers of format_type."""
+    rnd = random.Random(f"{format_type}-{n}-{seed}")
+    matcher = FORMATS[format_type][1].matcher()
+    desc = _descriptions(rnd, matcher.keywords, n)
+    amounts = _amounts(rnd, matcher.rules, n)
+    dates = _dates(rnd, n)
+    balance = [_euro(v) for v in np.cumsum(amounts) + 50_000]
+
+    if format_type in ("Diakofti Euro", "Ilisia Euro"):
+        return pd.DataFrame({
+            "ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ": dates, "ΗΜ/ΝΙΑ ΑΞΙΑΣ": dates, "ΠΕΡΙΓΡΑΦΗ": desc,
+            "ΠΟΣΟ": [_euro(v) for v in amounts], "ΥΠΟΛΟΙΠΟ": balance,
+        })
+    if format_type == "Athens NBG":
+        text = [_euro(v) for v in amounts]
+        return pd.DataFrame({
+            "Ημερομηνία": dates, "Valeur": dates, "Περιγραφή": desc,
+            "Ποσό συναλλαγής": text, "Ποσό εντολής": text, "Υπόλοιπο": balance,
+        })
+    return pd.DataFrame({
+        "Valeur": dates, "Περιγραφή": desc, "Ποσό εντολής": [_euro(v) for v in amounts], "Υπόλοιπο": balance,
+    })
+
+
+# ============================================
+# MEASUREMENT
+# ============================================
+def run(format_type, n, seed=0):
+    """Benchmark one (format, size): CSV read + classification."""
+    process, rule_file = FORMATS[format_type]
+    matcher = rule_file.matcher()
+    statement = make_statement(format_type, n, seed)
+    csv = BytesIO(statement.to_csv(index=False).encode("ISO-8859-7" if "Euro" in format_type else "utf-8"))
+    csv.name = "statement.csv"
+
+    t0 = time.perf_counter()
+    df = read_statement(csv, format_type)
+    read_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = process(df)
+    classify_s = time.perf_counter() - t0
+
+    # per-rule counters come from a separate run, so they do not add to classify_s
+    stats = RuleStats(matcher)
+    process(df, stats=stats)
+
+    # second, traced run for memory (tracing would distort the timing);
+    # pyarrow allocates outside tracemalloc, so add its pool's peak too
+    pool = pa.default_memory_pool()
+    arrow_before = pool.max_memory() or 0
+    tracemalloc.start()
+    process(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak += max((pool.max_memory() or 0) - arrow_before, 0)
+
+    review = int(result["Description"].astype(str).str.contains("🟨", regex=False).sum())
+    return {
+        "format": format_type,
+        "rows": n,
+        "read_s": round(read_s, 4),
+        "classify_s": round(classify_s, 4),
+        "rows_per_s": round(n / classify_s) if classify_s else None,
+        "peak_mb": round(peak / 2**20, 1),
+        "review_pct": round(100 * review / max(len(result), 1), 1),
+        "keyword_scan_ms": round(stats.scan_seconds * 1000, 3),
+        "rules": stats.records(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the bank statement classifiers.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=list(FORMATS))
+    parser.add_argument("--top", type=int, default=5, help="slowest rules to print per run")
+    parser.add_argument("--json", help="write every result (with all per-rule counters) to this file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'format':<14} {'rows':>9} {'read s':>8} {'classify s':>10} {'rows/s':>10} {'peak MB':>8} {'review %':>8}")
+    for format_type in args.formats:
+        for n in args.sizes:
+            r = run(format_type, n, args.seed)
+            results.append(r)
+            print(f"{format_type:<14} {n:>9,} {r['read_s']:>8.3f} {r['classify_s']:>10.3f} "
+                  f"{r['rows_per_s']:>10,} {r['peak_mb']:>8.1f} {r['review_pct']:>8.1f}")
+            for rule in sorted(r["rules"], key=lambda h: -h["ms"])[:args.top]:
+                print(f"{'':<16}#{rule['rule']:<4} {rule['matches']:>9,} hits {rule['ms']:>9.1f} ms  {rule['label']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"saved {args.json}")
+
+
+if __name__ == "__main__":
+    main()
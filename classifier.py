@@ -0,0 +1,1035 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from supplier_index import SupplierIndex
+
+
+# ============================================
+# KEYWORD SCANNING
+# ============================================
+def _trie_pattern(words):
+    """Regex alternation for words, factored into a prefix trie."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def walk(node):
+        alts = [re.escape(ch) + walk(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        # greedy optional so the longest keyword at each position wins
+        return f"(?:{body})?" if "" in node else body
+
+    return walk(trie)
+
+
+class KeywordScanner:
+    """Finds every keyword of a fixed list in one regex pass."""
+
+    def __init__(self, keywords):
+        self.keywords = sorted(set(keywords))
+        self.index = {kw: i for i, kw in enumerate(self.keywords)}
+        self._regex = re.compile(_trie_pattern(self.keywords)) if self.keywords else None
+        # the regex reports the longest keyword at the leftmost position;
+        # keywords contained in it are present as well
+        self._implied = {
+            kw: [self.index[k] for k in self.keywords if k in kw] for kw in self.keywords
+        }
+        # where to resume after a match: the first offset at which another
+        # keyword could start inside it and run past its end
+        self._resume = {
+            kw: next(
+                (i for i in range(1, len(kw)) if any(k.startswith(kw[i:]) for k in self.keywords)),
+                len(kw),
+            )
+            for kw in self.keywords
+        }
+
+    def _scan(self, text):
+        """Yield (position, keyword indexes) for every keyword hit in text."""
+        if self._regex is None:
+            return
+        search = self._regex.search
+        m = search(text)
+        while m is not None:
+            kw = m.group()
+            yield m.start(), self._implied[kw]
+            m = search(text, m.start() + self._resume[kw])
+
+    def find(self, text):
+        """Return the set of keywords contained in text."""
+        return {self.keywords[i] for _, hits in self._scan(text) for i in hits}
+
+    def matrix(self, texts):
+        """Boolean (len(texts), len(keywords)) matrix of keyword hits.
+
+        The texts are joined and scanned as one string, so the whole
+        column costs a single regex pass; repeated texts are scanned once.
+        """
+        codes, hits = self.distinct_matrix(texts)
+        return hits[codes]
+
+    def distinct_matrix(self, texts):
+        """matrix() as (codes, hits of the distinct texts): row i of the
+        matrix is hits[codes[i]]."""
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object))
+        uniques = [str(u) for u in uniques]
+        hits = np.zeros((len(uniques), len(self.keywords)), dtype=bool)
+        if not uniques:
+            return codes, hits
+
+        lengths = np.fromiter(map(len, uniques), dtype=np.int64, count=len(uniques))
+        starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+        positions, columns = [], []
+        for pos, implied in self._scan("\n".join(uniques)):
+            positions.extend([pos] * len(implied))
+            columns.extend(implied)
+        if positions:
+            rows = np.searchsorted(starts, positions, side="right") - 1
+            hits[rows, columns] = True
+        return codes, hits
+
+
+# ============================================
+# PLOT DETECTION
+# ============================================
+PLOTS = [
+    'Y1', 'Y2', 'Y3', 'Y6', 'Y4-7', 'Y8', 'R2', 'R4', 'B5', 'G2',
+    'R5A', 'R5B', 'R5C', 'R5D', 'W2', 'W8', 'B6', 'G1', 'G12', 'G13', 'B9-10-11'
+]
+# One alternation, longest plot first so Y4-7 / B9-10-11 / G12 win over a
+# shorter plot at the same position; a plot must not touch a word character.
+_PLOT_REGEX = re.compile(
+    r"(?<!\w)(?:" + "|".join(re.escape(p) for p in sorted(PLOTS, key=len, reverse=True)) + r")(?!\w)"
+)
+# the same codes without the word bounds (pyarrow's RE2 has no lookarounds):
+# a cheap column-wide pass that picks the descriptions worth the regex above
+_PLOT_CODES = "|".join(re.escape(p) for p in PLOTS)
+
+
+def find_all_plots(description):
+    """Find all plot references in description"""
+    return list(dict.fromkeys(_PLOT_REGEX.findall(description)))
+
+
+def find_all_plots_column(descriptions):
+    """find_all_plots for a whole column, via Series.str.findall.
+
+    Only the distinct descriptions are searched.
+    """
+    descriptions = pd.Series(descriptions, dtype=object)
+    codes, uniques = pd.factorize(descriptions)
+    found = pd.Series(uniques, dtype=object).str.findall(_PLOT_REGEX).map(lambda p: list(dict.fromkeys(p)))
+    return pd.Series(found.to_numpy()[codes], index=descriptions.index)
+
+
+def plot_column(desc, default):
+    """One plot, "Multiple", or default per description.
+
+    Each distinct description is looked at once; only those containing a
+    plot code at all go through find_all_plots.
+    """
+    codes, uniques = pd.factorize(np.asarray(desc, dtype=object))
+    values = _const(len(uniques), default)
+    maybe = pc.match_substring_regex(pa.array(uniques, type=pa.string()), _PLOT_CODES)
+    for i in np.flatnonzero(maybe.to_numpy(zero_copy_only=False)):
+        plots = find_all_plots(uniques[i])
+        if len(plots) == 1:
+            values[i] = plots[0]
+        elif len(plots) > 1:
+            values[i] = "Multiple"
+    return values[codes]
+
+
+# ============================================
+# AMOUNT PARSING
+# ============================================
+# Bank exports write amounts as "1.234,56", "-12,30", "12,30-", "1 234,56"
+# (NBSP), "€ 12,30" or plain numbers (xlsx). A dot followed by exactly
+# three digits groups thousands; any other single dot or comma is the
+# decimal mark. Everything runs as pyarrow kernels over the whole column.
+# Half-cents round away from zero, for text and numbers alike.
+_SPACES = r"[\s\x{00A0}\x{202F}]*"
+_VALID_AMOUNT = (
+    rf"^{_SPACES}[-+\x{{2212}}]?{_SPACES}(?:€|EUR)?{_SPACES}"
+    r"(?:(?:\d{1,3}(?:[.\x{00A0}\x{202F} ']\d{3})+|\d+)(?:[,.]\d+)?|[,.]\d+)"
+    rf"{_SPACES}(?:€|EUR)?{_SPACES}-?{_SPACES}$"
+)
+_EDGE_CHARS = " \t\r\n\u00a0\u202f+-\u2212€EUR"
+
+
+def _parse_amount_text(text, cents):
+    """parse_amounts() for a pyarrow string array."""
+    failed = pc.invert(pc.fill_null(pc.match_substring_regex(text, _VALID_AMOUNT), False))
+    negative = pc.or_(pc.match_substring(text, "-"), pc.match_substring(text, "\u2212"))
+    negative = pc.fill_null(negative, False).to_numpy(zero_copy_only=False)
+
+    # signs, currency and outer spaces only ever sit at the ends
+    core = pc.if_else(failed, "0", pc.utf8_trim(text, characters=_EDGE_CHARS))
+    if pc.any(pc.match_substring_regex(core, r"[^\d.,]")).as_py():
+        core = pc.replace_substring_regex(core, r"[^\d.,]", "")
+    has_comma = pc.match_substring(core, ",")
+    if pc.all(has_comma).as_py():
+        core = pc.replace_substring(core, ".", "")
+    else:
+        thousands = pc.or_(has_comma, pc.match_substring_regex(core, r"^\d{1,3}(?:\.\d{3})+$"))
+        core = pc.if_else(thousands, pc.replace_substring(core, ".", ""), core)
+    core = pc.replace_substring(core, ",", ".")
+    # dot groups without a comma decimal ("1.234.56"): not a number
+    malformed = pc.match_substring_regex(core, r"\..*\.")
+    if pc.any(malformed).as_py():
+        failed = pc.or_(failed, malformed)
+        core = pc.if_else(malformed, "0", core)
+
+    value = pc.cast(core, pa.float64()).to_numpy(zero_copy_only=False, writable=True)
+    failed = failed.to_numpy(zero_copy_only=False)
+    if cents:
+        value = np.round(value * 100).astype(np.int64)
+        # x * 100 is only exact up to two decimals; round the rest half-up
+        long = pc.match_substring_regex(core, r"\.\d{3}").to_numpy(zero_copy_only=False)
+        for i in np.flatnonzero(long):
+            value[i] = int(Decimal(core[i].as_py()).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+        value[failed] = 0
+    else:
+        value[failed] = np.nan
+    return np.where(negative, -value, value), failed
+
+
+def parse_amounts(values, cents=False):
+    """Parse a column of bank amounts in one vectorised pass.
+
+    Returns (amounts, failed): float64 amounts (NaN where failed) or, with
+    cents=True, exact int64 cents (0 where failed, half-cents round away
+    from zero); failed marks missing or unparseable values.
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        numbers = values.to_numpy(dtype=float, na_value=np.nan)
+        failed = np.isnan(numbers)
+        if not cents:
+            return numbers, failed
+        return _float_cents(np.where(failed, 0.0, numbers)), failed
+
+    if pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+        text = pa.array(values, type=pa.string(), from_pandas=True)
+        if isinstance(text, pa.ChunkedArray):      # Arrow-backed column (pyarrow CSV engine)
+            text = text.combine_chunks()
+        return _parse_amount_text(text, cents)
+
+    # xlsx columns can mix real numbers with text
+    objects = values.to_numpy(dtype=object)
+    is_number = np.fromiter(
+        (isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in objects),
+        dtype=bool, count=len(objects),
+    )
+    text = [None if number or pd.isna(v) else str(v) for v, number in zip(objects, is_number)]
+    result, failed = _parse_amount_text(pa.array(text, type=pa.string()), cents)
+    if is_number.any():
+        numbers, number_failed = parse_amounts(objects[is_number].astype(float), cents)
+        result[is_number] = numbers
+        failed[is_number] = number_failed
+    return result, failed
+
+
+# ============================================
+# RULE ENGINE
+# ============================================
+# A rule is a plain dict, checked against the upper-cased description:
+#   "any":     description contains at least one of these keywords
+#   "and_any": ... and also at least one of these
+#   "not_any": ... and none of these
+#   "amount":  test on the absolute amount, e.g. {"eq": 76.66} or {"le": 5}
+#   "signed":  test on the signed amount, e.g. {"gt": 0} or {"in": [-1810, 1810]}
+#              (values in euros; they are compared as exact cents)
+#   "set":     fields written into the entry when the rule matches
+#   "filled":  False for rules that should not clear the 🟨 review mark
+# Rules run top to bottom and a later match overwrites an earlier one.
+
+# Amounts are matched as exact int64 cents: rule values are converted
+# once when the table is compiled, row amounts once when they are parsed.
+_NO_CENTS = np.iinfo(np.int64).min   # missing amount: never matches an amount test
+
+
+def _rule_cents(value):
+    """Exact cents of a rule value written in euros (76.66 -> 7666)."""
+    return int(Decimal(str(value)).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def _float_cents(amounts):
+    """int64 cents of finite float amounts, half-cents away from zero.
+
+    x * 100 is inexact (1.005 * 100 = 100.4999...) and np.round rounds
+    halves to even, so values near a half-cent go through their decimal
+    text instead.
+    """
+    scaled = amounts * 100
+    cents = np.round(scaled).astype(np.int64)
+    for i in np.flatnonzero(np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6):
+        cents[i] = _rule_cents(float(amounts[i]))
+    return cents
+
+
+def to_cents(amounts):
+    """int64 cents for float amounts (_NO_CENTS where missing)."""
+    amounts = np.asarray(amounts, dtype=float)
+    missing = np.isnan(amounts)
+    cents = _float_cents(np.where(missing, 0.0, amounts))
+    cents[missing] = _NO_CENTS
+    return cents
+
+
+# op -> (compile rule value to cents, test on scalars and numpy columns alike)
+_AMOUNT_TESTS = {
+    "eq": (lambda v: np.array([_rule_cents(v)]), np.isin),
+    "in": (lambda v: np.unique([_rule_cents(x) for x in v]), np.isin),
+    "lt": (_rule_cents, lambda x, v: x < v),
+    "le": (_rule_cents, lambda x, v: x <= v),
+    "gt": (_rule_cents, lambda x, v: x > v),
+    "ge": (_rule_cents, lambda x, v: x >= v),
+    "between": (lambda v: (_rule_cents(v[0]), _rule_cents(v[1])), lambda x, v: (v[0] <= x) & (x <= v[1])),
+}
+
+
+def rule_label(rule):
+    """Short human-readable name of a rule, for reports."""
+    when = ", ".join(rule.get("any", ())[:2]) or ", ".join(
+        f"{field} {op} {value}" for field in ("amount", "signed") for op, value in rule.get(field, {}).items()
+    ) or "always"
+    what = rule["set"].get("Description") or rule["set"].get("Type") or next(iter(rule["set"].values()), "")
+    return f"{when} → {what}"
+
+
+class CompiledRules:
+    """A rule table compiled into one keyword scanner.
+
+    Every description is scanned once for all keywords of the table; a
+    rule then only looks at its own keywords and amount tests.
+
+    suppliers: known merchants ({"name", "aliases", "set"}) matched fuzzily
+    through a SupplierIndex. A supplier's values are written before the
+    rules run, so any matching rule still has the last word. Only an
+    alias found word for word clears the 🟨 review mark; a fuzzy match
+    fills the fields for the reviewer but keeps it.
+    """
+
+    def __init__(self, rules, suppliers=()):
+        self.rules = list(rules)
+        self.suppliers = list(suppliers)
+        self.supplier_index = SupplierIndex(self.suppliers) if self.suppliers else None
+        self.scanner = KeywordScanner(
+            kw for rule in self.rules
+            for key in ("any", "and_any", "not_any")
+            for kw in rule.get(key, ())
+        )
+        self.keywords = self.scanner.keywords
+        # every output column some rule can set, in first-seen order
+        self.fields = list(dict.fromkeys(
+            f for entry in self.rules + self.suppliers for f in entry["set"]
+        ))
+        # content hash of the table: changes whenever a rule or supplier is edited
+        table = {"rules": self.rules, "suppliers": self.suppliers} if self.suppliers else self.rules
+        self.version = hashlib.sha1(
+            json.dumps(table, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:12]
+
+        index = self.scanner.index
+        self._by_keyword = {}
+        self._always = []
+        self._checks = []
+        for idx, rule in enumerate(self.rules):
+            if rule.get("any"):
+                for kw in rule["any"]:
+                    self._by_keyword.setdefault(kw, []).append(idx)
+            else:
+                self._always.append(idx)
+            tests = [
+                (field, _AMOUNT_TESTS[op][1], _AMOUNT_TESTS[op][0](value))
+                for field in ("amount", "signed")
+                for op, value in rule.get(field, {}).items()
+            ]
+            self._checks.append((
+                [index[kw] for kw in rule.get("any", ())],
+                [index[kw] for kw in rule.get("and_any", ())],
+                [index[kw] for kw in rule.get("not_any", ())],
+                tests,
+            ))
+
+        # per field: the value each supplier writes and its position in the
+        # supplier's "set" (-1: not written); the extra last entry is "no supplier"
+        self._supplier_fields = {}
+        for field in dict.fromkeys(f for supplier in self.suppliers for f in supplier["set"]):
+            sets = [supplier["set"] for supplier in self.suppliers] + [{}]
+            self._supplier_fields[field] = (
+                np.array([values.get(field) for values in sets], dtype=object),
+                np.array([list(values).index(field) if field in values else -1 for values in sets]),
+            )
+
+    # ---------- single row ----------
+    def keywords_in(self, desc):
+        """Return the set of table keywords contained in desc."""
+        return self.scanner.find(desc)
+
+    def matches(self, desc, cents=0):
+        """Return the indexes of the rules matching a row, in table order.
+        cents is the signed amount in int64 cents (see to_cents)."""
+        present = self.keywords_in(desc)
+        candidates = set(self._always)
+        for kw in present:
+            candidates.update(self._by_keyword.get(kw, ()))
+
+        found = {self.scanner.index[kw] for kw in present}
+        values = {"amount": abs(cents), "signed": cents}
+        hits = []
+        for idx in sorted(candidates):
+            _, and_any, not_any, tests = self._checks[idx]
+            if and_any and found.isdisjoint(and_any):
+                continue
+            if not_any and not found.isdisjoint(not_any):
+                continue
+            if tests and cents == _NO_CENTS:
+                continue
+            if all(test(values[field], value) for field, test, value in tests):
+                hits.append(idx)
+        return hits
+
+    def supplier_of(self, desc):
+        """(known supplier whose alias desc contains, fuzzily, or None,
+        whether the alias is there word for word)."""
+        if self.supplier_index is None:
+            return None, False
+        sid, exact = self.supplier_index.lookup([desc])
+        return (self.suppliers[sid[0]], bool(exact[0])) if sid[0] >= 0 else (None, False)
+
+    def apply(self, entry, desc, cents=0):
+        """Write the matching supplier, then every matching rule, into entry;
+        return True if classified."""
+        supplier, filled = self.supplier_of(desc)
+        if supplier is not None:
+            entry.update(supplier["set"])
+        for idx in self.matches(desc, cents):
+            rule = self.rules[idx]
+            entry.update(rule["set"])
+            filled = filled or rule.get("filled", True)
+        return filled
+
+    # ---------- whole columns ----------
+    def masks(self, desc, cents, stats=None):
+        """Yield (rule index, boolean row mask) for every rule, in table order.
+        cents is the signed amount column in int64 cents (see to_cents)."""
+        start = time.perf_counter()
+        # keyword tests run on the distinct descriptions, amount tests on the rows
+        codes, hits = self.scanner.distinct_matrix(desc)
+        rows = np.bincount(codes, minlength=len(hits))     # rows per distinct description
+        if stats is not None:
+            stats.observe(desc, cents)
+            stats.scan_seconds += time.perf_counter() - start
+        cents = np.asarray(cents, dtype=np.int64)
+        has_amount = cents != _NO_CENTS
+        values = {"amount": np.abs(np.where(has_amount, cents, 0)), "signed": cents}
+        for idx, (any_, and_any, not_any, tests) in enumerate(self._checks):
+            start = time.perf_counter()
+            mask = hits[:, any_].any(axis=1) if any_ else np.ones(len(hits), dtype=bool)
+            if stats is not None:
+                stats.evaluations[idx] += rows[mask].sum()
+            if and_any:
+                mask &= hits[:, and_any].any(axis=1)
+            if not_any:
+                mask &= ~hits[:, not_any].any(axis=1)
+            mask = mask[codes]
+            if tests:
+                mask &= has_amount
+            for field, test, value in tests:
+                mask &= test(values[field], value)
+            if stats is not None:
+                stats.matches[idx] += mask.sum()
+                stats.seconds[idx] += time.perf_counter() - start
+            yield idx, mask
+
+    def apply_frame(self, out, desc, cents, stats=None):
+        """Columnar apply(): write matching rules into out, a dict of
+        column name -> object array, with masked writes in rule order.
+        Returns the boolean "filled" mask. Pass a RuleStats to count
+        per-rule evaluations, matches, overwrites and time.
+        """
+        n = len(desc)
+        filled = np.zeros(n, dtype=bool)
+        # columns that only some rules set are ordered as
+        # pd.DataFrame(list_of_dicts) would order them
+        extra = {}
+        writers = {}   # field -> index of the rule that last wrote each row (stats only)
+        if self.supplier_index is not None:
+            filled |= self._apply_suppliers(out, desc, extra)
+        for idx, mask in self.masks(desc, cents, stats):
+            if not mask.any():
+                continue
+            start = time.perf_counter()
+            rule = self.rules[idx]
+            if stats is not None:
+                self._count_overwrites(stats, writers, idx, rule, mask)
+            for pos, (field, value) in enumerate(rule["set"].items()):
+                if field not in out:
+                    out[field] = np.full(n, np.nan, dtype=object)
+                    extra[field] = []
+                if field in extra:
+                    extra[field].append((idx, pos, mask))
+                out[field][mask] = value
+            if rule.get("filled", True):
+                filled |= mask
+            if stats is not None:
+                stats.seconds[idx] += time.perf_counter() - start
+
+        def first_seen(field):
+            setters = extra[field]
+            row = np.logical_or.reduce([m for _, _, m in setters]).argmax()
+            return (row,) + min((idx, pos) for idx, pos, m in setters if m[row])
+
+        for field in sorted(extra, key=first_seen):
+            out[field] = out.pop(field)
+        return filled
+
+    def _apply_suppliers(self, out, desc, extra):
+        """Write each row's supplier values, one masked write per field;
+        returns the rows whose supplier alias is there word for word."""
+        n = len(desc)
+        sid, exact = self.supplier_index.lookup(desc)
+        if not (sid >= 0).any():
+            return exact
+        for field, (values, pos) in self._supplier_fields.items():
+            mask = pos[sid] >= 0
+            if not mask.any():
+                continue
+            if field not in out:
+                out[field] = np.full(n, np.nan, dtype=object)
+                extra[field] = []
+            if field in extra:
+                # suppliers write before rule 0
+                for p in np.unique(pos[sid[mask]]):
+                    extra[field].append((-1, int(p), pos[sid] == p))
+            out[field][mask] = values[sid[mask]]
+        return exact
+
+    def _count_overwrites(self, stats, writers, idx, rule, mask):
+        """Credit earlier rules whose fields rule idx rewrites on mask (once per row)."""
+        n_rules = len(self.rules)
+        rows = np.flatnonzero(mask)
+        pairs = []
+        for field in rule["set"]:
+            last = writers.setdefault(field, np.full(len(mask), -1, dtype=np.int64))
+            earlier = last[rows]
+            pairs.append(rows[earlier >= 0] * n_rules + earlier[earlier >= 0])
+            last[rows] = idx
+        owners = np.unique(np.concatenate(pairs)) % n_rules
+        stats.overwritten += np.bincount(owners, minlength=n_rules)
+
+
+class RuleStats:
+    """Per-rule counters filled in by CompiledRules.apply_frame(..., stats=).
+
+    evaluations: rows whose keywords made the rule a candidate
+    matches:     rows the rule matched
+    overwritten: matched rows where a later rule rewrote one of its fields
+    seconds:     time spent evaluating and writing the rule
+    Counters add up over calls (e.g. the chunks of one file).
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        n = len(matcher.rules)
+        self.evaluations = np.zeros(n, dtype=np.int64)
+        self.matches = np.zeros(n, dtype=np.int64)
+        self.overwritten = np.zeros(n, dtype=np.int64)
+        self.seconds = np.zeros(n)
+        self.rows = 0
+        self.scan_seconds = 0.0
+
+    def observe(self, desc, cents):
+        """Called with the rule engine's input for every classified frame."""
+        self.rows += len(desc)
+
+    def records(self):
+        return [
+            {
+                "rule": idx,
+                "label": rule_label(rule),
+                "evaluations": int(self.evaluations[idx]),
+                "matches": int(self.matches[idx]),
+                "overwritten": int(self.overwritten[idx]),
+                "ms": round(self.seconds[idx] * 1000, 3),
+            }
+            for idx, rule in enumerate(self.matcher.rules)
+        ]
+
+    def table(self):
+        """One row per rule, in table order."""
+        return pd.DataFrame(self.records()).rename(columns={
+            "rule": "Rule #", "label": "Rule", "evaluations": "Evaluations", "matches": "Matches",
+            "overwritten": "Overwritten", "ms": "Time (ms)",
+        })
+
+    def to_json(self):
+        return json.dumps({
+            "rules_version": self.matcher.version,
+            "rows": self.rows,
+            "keyword_scan_ms": round(self.scan_seconds * 1000, 3),
+            "rules": self.records(),
+        }, ensure_ascii=False, indent=2)
+
+
+def _const(n, value):
+    """Object column of n copies of value."""
+    return np.full(n, value, dtype=object)
+
+
+def _either(cond, a, b):
+    """Object column holding a where cond is true, else b."""
+    return np.where(cond, np.asarray(a, dtype=object), np.asarray(b, dtype=object))
+
+
+def _format_dates(dates):
+    """dd/mm/YYYY text for a datetime column, '' where missing.
+
+    Statements repeat the same few hundred dates, so only the distinct
+    values are formatted.
+    """
+    codes, uniques = pd.factorize(dates)
+    text = np.append(uniques.strftime('%d/%m/%Y').to_numpy(dtype=object), '')
+    return text[codes]
+
+
+def _distinct_upper(texts):
+    """(codes, distinct texts upper-cased): texts[i].upper() is distinct[codes[i]].
+
+    Per-description work (upper-casing, plots) then runs once per distinct
+    description and is spread over the rows by codes.
+    """
+    codes, uniques = pd.factorize(texts)
+    return codes, np.array([u.upper() for u in uniques], dtype=object)
+
+
+def _review_marks(out, filled):
+    """Prefix 🟨 to the Description of rows no rule classified."""
+    desc = out["Description"]
+    desc[~filled] = "🟨 " + desc[~filled]
+
+
+# ============================================
+# RULE FILES - ADD YOUR RULES IN rules/*.yaml
+# ============================================
+# Each format's rule table lives in a YAML (or JSON) file:
+#   schema: 1
+#   rules:
+#     - any: ["COM POI", "COM POO"]
+#       set: {"Type": "Bank", "Supplier": "Bank", "Description": "Bank fees"}
+# An optional "suppliers:" list names known merchants whose card
+# descriptions vary ("GRIGORAK KYTHI GR", "GRIGORAKIS KYTHIRA"); they are
+# matched fuzzily (see supplier_index.py) and rules still override them.
+# Rows matched only fuzzily keep the 🟨 review mark:
+#   suppliers:
+#     - name: "Grigorakis"
+#       aliases: ["GRIGORAK"]
+#       set: {"Type": "General", "Supplier": "F&B", "Description": "F&B"}
+# A file is compiled the first time it is used and again only after it
+# changes on disk, so edits show up without restarting the app.
+RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules")
+RULES_SCHEMA = 1
+
+_RULE_KEYS = {"any", "and_any", "not_any", "amount", "signed", "set", "filled"}
+_SUPPLIER_KEYS = {"name", "aliases", "set"}
+
+
+def _check_rule(rule):
+    """Problem with one rule as read from a file, or None."""
+    if not isinstance(rule, dict):
+        return "is not a mapping"
+    unknown = set(rule) - _RULE_KEYS
+    if unknown:
+        return f"has unknown keys {sorted(unknown)}"
+    if not isinstance(rule.get("set"), dict) or not rule["set"]:
+        return "needs a non-empty 'set'"
+    for key in ("any", "and_any", "not_any"):
+        if key in rule and not all(isinstance(kw, str) and kw for kw in rule[key]):
+            return f"'{key}' must be a list of keywords"
+    for key in ("amount", "signed"):
+        ops = set(rule.get(key, {})) - set(_AMOUNT_TESTS)
+        if ops:
+            return f"'{key}' has unknown tests {sorted(ops)}"
+    return None
+
+
+def _check_supplier(supplier):
+    """Problem with one supplier entry as read from a file, or None."""
+    if not isinstance(supplier, dict):
+        return "is not a mapping"
+    unknown = set(supplier) - _SUPPLIER_KEYS
+    if unknown:
+        return f"has unknown keys {sorted(unknown)}"
+    aliases = supplier.get("aliases")
+    if not aliases or not all(isinstance(alias, str) and alias for alias in aliases):
+        return "needs a list of 'aliases'"
+    if not isinstance(supplier.get("set"), dict) or not supplier["set"]:
+        return "needs a non-empty 'set'"
+    return None
+
+
+def load_rules(path):
+    """(rules, suppliers) of a .yaml/.yml or .json rule file."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            doc = json.load(f)
+        else:
+            import yaml
+            doc = yaml.safe_load(f)
+    if not isinstance(doc, dict) or doc.get("schema") != RULES_SCHEMA:
+        raise ValueError(f"{path}: expected a rule file with 'schema: {RULES_SCHEMA}'")
+    rules = doc.get("rules") or []
+    for number, rule in enumerate(rules, start=1):
+        problem = _check_rule(rule)
+        if problem:
+            raise ValueError(f"{path}: rule {number} {problem}")
+    suppliers = doc.get("suppliers") or []
+    for number, supplier in enumerate(suppliers, start=1):
+        problem = _check_supplier(supplier)
+        if problem:
+            raise ValueError(f"{path}: supplier {number} {problem}")
+    return rules, suppliers
+
+
+class RuleFile:
+    """A rule file and its CompiledRules, recompiled when the file changes."""
+
+    def __init__(self, name):
+        self.path = os.path.join(RULES_DIR, name)
+        self._stamp = None
+        self._matcher = None
+        self._lock = threading.Lock()
+
+    def matcher(self):
+        """The compiled rules; costs one stat() while the file is unchanged."""
+        stat = os.stat(self.path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp != self._stamp:
+                self._matcher = CompiledRules(*load_rules(self.path))
+                self._stamp = stamp
+            return self._matcher
+
+
+DIAKOFTI_RULES = RuleFile("diakofti.yaml")
+ATHENS_RULES = RuleFile("athens.yaml")
+# shared by Ilisia NBG and Ilisia Euro (see process_ilisia)
+ILISIA_RULES = RuleFile("ilisia.yaml")
+
+
+# ============================================
+# DIAKOFTI PROCESSING FUNCTION
+# ============================================
+def process_diakofti_file(df, stats=None):
+    """Process Diakofti format files"""
+    df = df.dropna(subset=['ΠΕΡΙΓΡΑΦΗ'])
+    df['ΠΟΣΟ'] = parse_amounts(df['ΠΟΣΟ'])[0]
+
+    n = len(df)
+    original_desc = df['ΠΕΡΙΓΡΑΦΗ'].astype(str).to_numpy(dtype=object)
+    codes, distinct = _distinct_upper(original_desc)
+    desc = distinct[codes]
+    signed = df['ΠΟΣΟ'].to_numpy(dtype=float)
+    amount = np.abs(signed)
+    cents = to_cents(signed)   # exact amounts for the rules' amount tests
+    is_income = signed > 0
+
+    out = {
+        "Date": df['ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ'].to_numpy(dtype=object),
+        "Income/outcome": _either(is_income, "Income", "Outcome"),
+        "Plot": plot_column(distinct, "All Plots")[codes],
+        "Expenses Type": _const(n, "Soft Cost"),
+        "Type": _const(n, ""),
+        "Supplier": _const(n, ""),
+        "Description": desc.copy(),
+        "In": _either(is_income, amount, ""),
+        "Out": _either(~is_income, -amount, ""),
+        "Total": np.where(is_income, amount, -amount),
+        "Progressive Ledger Balance": _const(n, ""),
+        "Payment details": _const(n, ""),
+        "Original Description": original_desc
+    }
+
+    filled = DIAKOFTI_RULES.matcher().apply_frame(out, desc, cents, stats)
+    _review_marks(out, filled)
+
+    return pd.DataFrame(out).infer_objects()
+
+# ============================================
+# Athens PROCESSING FUNCTION
+# ============================================
+def process_athens_file(df, stats=None):
+    """Process Athens format files"""
+    df = df.copy()
+    df['Ημερομηνία'] = pd.to_datetime(df['Ημερομηνία'], dayfirst=True, errors='coerce')
+    df = df.dropna(subset=['Περιγραφή'])
+
+    n = len(df)
+    original_desc = df['Περιγραφή'].astype(str).to_numpy(dtype=object)
+    codes, distinct = _distinct_upper(original_desc)
+    desc = distinct[codes]
+    signed = parse_amounts(df['Ποσό συναλλαγής'])[0]
+    amount = np.abs(signed)
+    cents = to_cents(signed)   # exact amounts for the rules' amount tests
+    # Income/Outcome follows the order amount, the rules the transaction amount
+    order_amount = parse_amounts(df['Ποσό εντολής'])[0]
+    is_income = order_amount > 0
+    is_outcome = order_amount < 0
+
+    out = {
+        "Date": _format_dates(df['Ημερομηνία']),
+        "Income/Outcome": _either(is_income, "Income", "Outcome"),
+        "Expenses Type": _const(n, "Soft Cost"),
+        "Location": _const(n, "All Projects"),
+        "Project": _const(n, "All Projects"),
+        "Supplier": _const(n, ""),
+        "Type": _const(n, ""),
+        "Description": desc.copy(),
+        "Income": _either(is_income, amount, ""),
+        "Outcome": _either(is_outcome, -amount, ""),
+        "Total": np.where(is_income, amount, -amount),
+        "Balance": _const(n, ""),
+        "Repayment": _const(n, ""),
+        "Original Description": original_desc
+    }
+
+    filled = ATHENS_RULES.matcher().apply_frame(out, desc, cents, stats)
+    _review_marks(out, filled)
+
+    result_df = pd.DataFrame(out).infer_objects()
+
+    # Reorder columns
+    column_order = [
+        "Date", "Income/Outcome", "Expenses Type", "Location", "Project",
+        "Supplier", "Type", "Description", "Income", "Outcome", "Total",
+        "Balance", "Repayment", "Original Description"
+    ]
+
+    return result_df[column_order]
+
+# ============================================
+# Ilisia PROCESSING (shared core + bank adapters)
+# ============================================
+# Both Ilisia accounts share one rule file and one output layout; a bank
+# adapter only turns its export into (original descriptions, signed
+# amounts, Date column, Year column), one entry per kept row.
+def _ilisia_nbg_columns(df):
+    """Ilisia NBG adapter (robust to column names)."""
+    # --- resolve columns (date/desc/amount can arrive with several names) ---
+    def pick(*names):
+        for n in names:
+            if n in df.columns:
+                return n
+        return None
+
+    col_date   = pick('ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ', 'Ημερομηνία', 'Valeur')
+    col_desc   = pick('ΠΕΡΙΓΡΑΦΗ', 'Περιγραφή')
+    col_amount = pick('ΠΟΣΟ', 'Ποσό εντολής', 'Ποσό συναλλαγής')
+
+    if col_desc is None or col_amount is None:
+        raise ValueError("Ilisia: description or amount column missing")
+
+    # parsed over the whole column, before rows are dropped (date format inference)
+    if col_date:
+        dates = pd.to_datetime(df[col_date], dayfirst=True, errors='coerce')
+    else:
+        dates = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+
+    # amounts keep their sign, handle commas/dots; text that is not an amount counts as 0
+    amounts, failed = parse_amounts(df[col_amount])
+    if not pd.api.types.is_numeric_dtype(df[col_amount]):
+        amounts[failed] = 0.0
+
+    keep = df[col_desc].notna().to_numpy()
+    dates = dates[keep]
+    has_date = dates.notna().to_numpy()
+    years = _either(has_date, dates.dt.year.fillna(0).astype(int).to_numpy(), "")
+    original_desc = df.loc[keep, col_desc].astype(str).to_numpy(dtype=object)
+    return original_desc, amounts[keep], _format_dates(dates), years
+
+
+def _ilisia_eurobank_columns(df):
+    """Ilisia EURO adapter: Eurobank CSV, same layout as Diakofti (ΗΜ/ΝΙΑ, ΠΕΡΙΓΡΑΦΗ, ΠΟΣΟ)."""
+    df = df.dropna(subset=['ΠΕΡΙΓΡΑΦΗ'])
+
+    # המרת סכומים לפורמט נכון (סכום לא תקין = 0)
+    amounts, failed = parse_amounts(df['ΠΟΣΟ'])
+    amounts[failed] = 0.0
+
+    # תאריך: ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ, ואם אין אז ΗΜ/ΝΙΑ ΑΞΙΑΣ
+    if 'ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ' in df.columns:
+        dates = df['ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ'].to_numpy(dtype=object)
+    elif 'ΗΜ/ΝΙΑ ΑΞΙΑΣ' in df.columns:
+        dates = df['ΗΜ/ΝΙΑ ΑΞΙΑΣ'].to_numpy(dtype=object)
+    else:
+        dates = _const(len(df), '')
+
+    # שנה מהתאריך (dd/mm/YYYY), פעם אחת לכל תאריך
+    codes, uniques = pd.factorize(dates)
+    parts = (str(d).split('/') for d in uniques)
+    years = np.array([p[2] if len(p) == 3 else "" for p in parts] + [""], dtype=object)[codes]
+    original_desc = df['ΠΕΡΙΓΡΑΦΗ'].astype(str).to_numpy(dtype=object)
+    return original_desc, amounts, dates, years
+
+
+# "Bank" column value -> adapter
+ILISIA_BANKS = {
+    "NBG": _ilisia_nbg_columns,
+    "Eurobank": _ilisia_eurobank_columns,
+}
+
+
+def process_ilisia(df, bank, stats=None):
+    """Classify an Ilisia export of bank (a key of ILISIA_BANKS) with the Ilisia rules."""
+    original_desc, signed, dates, years = ILISIA_BANKS[bank](df)
+
+    n = len(original_desc)
+    codes, distinct = _distinct_upper(original_desc)
+    desc = distinct[codes]
+    signed = np.asarray(signed, dtype=float)
+    amount = np.abs(signed)
+    cents = to_cents(signed)   # exact amounts for the rules' amount tests
+    is_income = signed > 0
+
+    out = {
+        "Date": dates,
+        "Income/outcome": _either(is_income, "Income", "Outcome"),
+        "Plot": plot_column(distinct, "G1 - Manolis")[codes],
+        "Expenses Type": _const(n, "Soft Cost"),
+        "Type": _const(n, ""),
+        "Supplier": _const(n, ""),
+        "Description": desc.copy(),
+        "In": _either(is_income, amount, ""),
+        "Out": _either(~is_income, -amount, ""),
+        "Vat": _const(n, ""),
+        "Total": np.where(is_income, amount, -amount),
+        "Progressive Ledger Balance": _const(n, ""),
+        "Payment details": _const(n, ""),
+        "Original Description": original_desc,
+        "Year": years,
+        "Bank": _const(n, bank)
+    }
+
+    filled = ILISIA_RULES.matcher().apply_frame(out, desc, cents, stats)
+    _review_marks(out, filled)
+
+    return pd.DataFrame(out).infer_objects()
+
+
+def process_ilisia_file(df, stats=None):
+    """Process Ilisia NBG format files"""
+    return process_ilisia(df, "NBG", stats)
+
+
+def process_ilisia_euro_file(df, stats=None):
+    """Process Ilisia EURO files (Eurobank export, Ilisia NBG output and rules)"""
+    return process_ilisia(df, "Eurobank", stats)
+
+
+# ============================================
+# FORMAT REGISTRY
+# ============================================
+# format name (as shown in the Excel Classifier tab) -> (processor, rule file)
+# FORMATS[name][1].matcher() is the format's current CompiledRules
+FORMATS = {
+    "Diakofti Euro": (process_diakofti_file, DIAKOFTI_RULES),
+    "Athens NBG": (process_athens_file, ATHENS_RULES),
+    "Ilisia NBG": (process_ilisia_file, ILISIA_RULES),
+    "Ilisia Euro": (process_ilisia_euro_file, ILISIA_RULES),
+}
+
+# columns each processor reads: every group needs one of its names present
+FORMAT_COLUMNS = {
+    "Diakofti Euro": [("ΠΕΡΙΓΡΑΦΗ",), ("ΠΟΣΟ",), ("ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ",)],
+    "Athens NBG": [("Ημερομηνία",), ("Περιγραφή",), ("Ποσό συναλλαγής",), ("Ποσό εντολής",)],
+    "Ilisia NBG": [("ΠΕΡΙΓΡΑΦΗ", "Περιγραφή"), ("ΠΟΣΟ", "Ποσό εντολής", "Ποσό συναλλαγής")],
+    "Ilisia Euro": [("ΠΕΡΙΓΡΑΦΗ",), ("ΠΟΣΟ",)],
+}
+# most specific header set first; Eurobank (and NBG) accounts share one layout,
+# so an account name in the file name breaks the tie
+_DETECT_ORDER = ["Athens NBG", "Diakofti Euro", "Ilisia Euro", "Ilisia NBG"]
+_FILENAME_HINTS = {
+    "Diakofti Euro": ("diakofti",),
+    "Athens NBG": ("athens",),
+    "Ilisia NBG": ("ilisia",),
+    "Ilisia Euro": ("ilisia",),
+}
+
+
+# description and amount column of each format, for checking sample rows
+_SAMPLE_COLUMNS = {
+    "Diakofti Euro": (("ΠΕΡΙΓΡΑΦΗ",), ("ΠΟΣΟ",)),
+    "Athens NBG": (("Περιγραφή",), ("Ποσό συναλλαγής",)),
+    "Ilisia NBG": (("ΠΕΡΙΓΡΑΦΗ", "Περιγραφή"), ("ΠΟΣΟ", "Ποσό εντολής", "Ποσό συναλλαγής")),
+    "Ilisia Euro": (("ΠΕΡΙΓΡΑΦΗ",), ("ΠΟΣΟ",)),
+}
+_MIN_PARSED = 0.5      # share of sample amounts that must parse for a format to fit
+
+
+def missing_columns(format_type, columns):
+    """Columns format_type's processor needs that the header lacks (one name per missing group)."""
+    present = {str(c) for c in columns}
+    return [group[0] for group in FORMAT_COLUMNS[format_type] if not present.intersection(group)]
+
+
+def sample_fit(format_type, sample):
+    """(share of amounts that parse, share of rows the rules classify) for the
+    first rows of a statement read as format_type."""
+    desc_names, amount_names = _SAMPLE_COLUMNS[format_type]
+    desc_col = next(c for c in desc_names if c in sample.columns)
+    amount_col = next(c for c in amount_names if c in sample.columns)
+    rows = sample[sample[desc_col].notna()]
+    if rows.empty:
+        return 1.0, 0.0     # nothing to contradict the header
+    amounts, failed = parse_amounts(rows[amount_col])
+    codes, distinct = _distinct_upper(rows[desc_col].astype(str).to_numpy(dtype=object))
+    desc = distinct[codes]
+    filled = FORMATS[format_type][1].matcher().apply_frame({}, desc, to_cents(amounts))
+    return 1 - failed.mean(), filled.mean()
+
+
+def detect_format(columns, filename="", sample=None):
+    """Guess the statement format from its header (and file name); None if unknown.
+
+    sample: optional DataFrame of the first rows. Formats whose amount
+    column does not parse are ruled out, and among formats with the same
+    columns the one whose rules classify more sample rows wins; it never
+    overrides a more specific header.
+    """
+    present = {str(c) for c in columns}
+    candidates = [
+        fmt for fmt in _DETECT_ORDER
+        if all(present.intersection(group) for group in FORMAT_COLUMNS[fmt])
+    ]
+    name = filename.lower()
+    hinted = {fmt for fmt in candidates if any(hint in name for hint in _FILENAME_HINTS[fmt])}
+    classified = {}
+    if sample is not None and not sample.empty:
+        fits = {fmt: sample_fit(fmt, sample) for fmt in candidates}
+        candidates = [fmt for fmt in candidates if fits[fmt][0] >= _MIN_PARSED]
+        classified = {fmt: fits[fmt][1] for fmt in candidates}
+
+    def specificity(fmt):
+        # formats reading the same columns share the rank of the first of them
+        return min(i for i, f in enumerate(_DETECT_ORDER) if FORMAT_COLUMNS[f] == FORMAT_COLUMNS[fmt])
+
+    # file name hint, then header specificity, then sample fit among identical columns
+    candidates.sort(key=lambda fmt: (fmt not in hinted, specificity(fmt), -classified.get(fmt, 0.0)))
+    return (candidates or [None])[0]
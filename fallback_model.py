@@ -0,0 +1,240 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from statement_io import review_rows
+from transaction_index import index_path, load_index, settled_rows
+
+# ============================================
+# FALLBACK MODEL (suggestions for 🟨 rows)
+# ============================================
+# A small local model per account, learned from the rows in its
+# transaction index (classified runs and imported corrections). It only
+# suggests values for rows no rule matched; they still need review.
+# Features are hashed character n-grams with TF-IDF weights; each class
+# (a Type/Supplier/Description/Plot combination) is the normalized
+# centroid of its rows, and a row gets the class of highest cosine.
+MODEL_DIR = "fallback_models"
+SUGGESTED_FIELDS = ("Type", "Supplier", "Description", "Plot")
+SUGGESTED = "Suggested "                # prefix of the suggestion columns
+SCORE = "Suggestion score"
+MIN_SCORE = 0.35                        # below this cosine, no suggestion
+
+_NGRAMS = (3, 4, 5)
+_HASH_BASE = np.uint64(1_000_003)
+_PREDICT_BLOCK = 512                    # distinct descriptions scored at a time
+_MEMO_SIZE = 100_000                    # scored descriptions remembered per model
+
+
+def suggestion_columns(fields=SUGGESTED_FIELDS):
+    return [SUGGESTED + f for f in fields] + [SCORE]
+
+
+def _normalize(texts):
+    """Upper-case, digit runs as 0 (RF codes, card numbers), single spaces."""
+    text = pd.Series(texts, dtype="str")
+    return (text.str.upper().str.replace(r"\d+", "0", regex=True)
+            .str.replace(r"\s+", " ", regex=True).str.strip().to_numpy(dtype=object))
+
+
+def _features(texts):
+    """Hashed character n-grams of texts as sparse (row, n-gram id, sublinear tf).
+
+    All texts are hashed at once: a rolling hash over their code points,
+    keeping the windows that lie inside one text. Rows come out sorted.
+    """
+    padded = [f" {t} " for t in texts]
+    codes = np.frombuffer("\x00".join(padded).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    lengths = np.fromiter(map(len, padded), dtype=np.int64, count=len(padded))
+    owner = np.repeat(np.arange(len(padded)), lengths + 1)[:len(codes)]
+    owner[np.cumsum(lengths + 1)[:-1] - 1] = -1          # the separators
+    rows, ids = [], []
+    for n in _NGRAMS:
+        m = len(codes) - n + 1
+        if m <= 0:
+            continue
+        h = np.zeros(m, dtype=np.uint64)
+        for k in range(n):
+            h = h * _HASH_BASE + codes[k:k + m]        # wraps around mod 2**64
+        inside = (owner[:m] >= 0) & (owner[:m] == owner[n - 1:n - 1 + m])
+        rows.append(owner[:m][inside])
+        ids.append(h[inside])
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint64), np.zeros(0)
+    rows, ids = np.concatenate(rows), np.concatenate(ids)
+    order = np.lexsort((ids, rows))
+    rows, ids = rows[order], ids[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (ids[1:] != ids[:-1])
+    counts = np.diff(np.append(np.flatnonzero(first), len(rows)))
+    return rows[first], ids[first], 1.0 + np.log(counts)
+
+
+def _unit_rows(rows, weights, n_rows):
+    """weights scaled so every row's vector has length 1."""
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_rows))
+    return weights / np.where(norms > 0, norms, 1)[rows]
+
+
+class FallbackModel:
+    """Nearest-centroid classifier over character n-gram TF-IDF."""
+
+    def __init__(self, fields, labels, vocab, idf, indptr, classes, weights):
+        self.fields = list(fields)
+        self.labels = [tuple(label) for label in labels]
+        self.vocab = vocab              # sorted n-gram hashes seen in training
+        self.idf = idf                  # per vocab entry
+        # class centroids, sparse by n-gram: the classes (and weights) of
+        # vocab[i] are classes[indptr[i]:indptr[i + 1]]
+        self.indptr, self.classes, self.weights = indptr, classes, weights
+        self._unseen_idf = float(idf.max()) if len(idf) else 1.0
+        self._memo = {}                 # normalized text -> (label index, score)
+
+    @classmethod
+    def fit(cls, df):
+        """Train on the settled rows of a transaction index (see settled_rows); None if there are none."""
+        fields = [f for f in SUGGESTED_FIELDS if f in df.columns]
+        rows = df[settled_rows(df)] if len(df) else df
+        if not fields or rows.empty:
+            return None
+        values = rows[fields].astype(object).where(rows[fields].notna(), "").astype(str)
+        pairs = pd.DataFrame({"text": _normalize(rows["Original Description"].to_numpy())})
+        pairs["label"] = list(values.itertuples(index=False, name=None))
+        pairs = pairs.groupby(["text", "label"], sort=False).size().reset_index(name="rows")
+        label_codes, labels = pd.factorize(pairs["label"])
+
+        row, ids, tf = _features(pairs["text"].tolist())
+        vocab, cols = np.unique(ids, return_inverse=True)
+        idf = np.log((1 + len(pairs)) / (1 + np.bincount(cols, minlength=len(vocab)))) + 1
+        weights = _unit_rows(row, tf * idf[cols], len(pairs)) * pairs["rows"].to_numpy()[row]
+
+        # sum per (n-gram, class), then scale every class centroid to length 1
+        keys, inverse = np.unique(cols * len(labels) + label_codes[row], return_inverse=True)
+        sums = np.bincount(inverse, weights=weights)
+        gram, classes = np.divmod(keys, len(labels))
+        norms = np.sqrt(np.bincount(classes, weights=sums ** 2, minlength=len(labels)))
+        indptr = np.searchsorted(gram, np.arange(len(vocab) + 1))
+        return cls(fields, list(labels), vocab, idf.astype(np.float32), indptr,
+                   classes.astype(np.int32), (sums / norms[classes]).astype(np.float32))
+
+    def _score(self, texts):
+        """(label index, cosine) for distinct normalized texts."""
+        row, ids, tf = _features(texts)
+        pos = np.minimum(np.searchsorted(self.vocab, ids), len(self.vocab) - 1)
+        known = self.vocab[pos] == ids
+        # n-grams never seen in training still count in the norm
+        weights = _unit_rows(row, tf * np.where(known, self.idf[pos], self._unseen_idf), len(texts))
+        row, pos, weights = row[known], pos[known], weights[known]
+
+        # every (text, n-gram) entry meets the classes whose centroid has that n-gram
+        counts = self.indptr[pos + 1] - self.indptr[pos]
+        first = np.repeat(self.indptr[pos] - (np.cumsum(counts) - counts), counts)
+        entry = first + np.arange(counts.sum())
+        row, weights = np.repeat(row, counts), np.repeat(weights, counts) * self.weights[entry]
+        classes = self.classes[entry]
+
+        n_labels = len(self.labels)
+        best = np.zeros(len(texts), dtype=np.int64)
+        score = np.zeros(len(texts))
+        for start in range(0, len(texts), _PREDICT_BLOCK):
+            stop = min(start + _PREDICT_BLOCK, len(texts))
+            lo, hi = np.searchsorted(row, [start, stop])
+            scores = np.bincount((row[lo:hi] - start) * n_labels + classes[lo:hi], weights=weights[lo:hi],
+                                 minlength=(stop - start) * n_labels).reshape(stop - start, n_labels)
+            best[start:stop] = scores.argmax(axis=1)
+            score[start:stop] = scores.max(axis=1)
+        return best, score
+
+    def predict(self, descriptions):
+        """(label index, cosine score) per description; each distinct text is scored once."""
+        codes, uniques = pd.factorize(pd.Series(descriptions, dtype=object))
+        codes, uniques = pd.factorize(_normalize(uniques.to_numpy(dtype=object))[codes])
+        new = [text for text in uniques if text not in self._memo]
+        if new:
+            if len(self._memo) + len(new) > _MEMO_SIZE:
+                self._memo.clear()
+            self._memo.update(zip(new, zip(*self._score(new))))
+        best, score = zip(*(self._memo[text] for text in uniques)) if len(uniques) else ((), ())
+        return np.array(best, dtype=np.int64)[codes], np.array(score, dtype=float)[codes]
+
+    def save(self, path, source):
+        """Write to an .npz; source is the index stamp the model was trained from."""
+        tmp = f"{path}.tmp{os.getpid()}.npz"
+        np.savez(tmp, vocab=self.vocab, idf=self.idf, indptr=self.indptr, classes=self.classes, weights=self.weights,
+                 meta=np.array(json.dumps({"fields": self.fields, "labels": self.labels,
+                                           "source": list(source)}, ensure_ascii=False)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """(model, source stamp) from an .npz written by save()."""
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            model = cls(meta["fields"], meta["labels"], data["vocab"], data["idf"],
+                        data["indptr"], data["classes"], data["weights"])
+        return model, tuple(meta["source"])
+
+
+# ============================================
+# ONE MODEL PER ACCOUNT, LOADED LAZILY
+# ============================================
+_models = {}                 # account -> (index stamp, model or None)
+_models_lock = threading.Lock()
+
+
+def _model_path(account):
+    return os.path.join(MODEL_DIR, f"{account.lower().replace(' ', '_')}.npz")
+
+
+def model_for(account):
+    """Fallback model of account, or None while its transaction index is empty.
+
+    Kept in memory per process. The model on disk is reused while the
+    index is unchanged; after new rows or corrections it is retrained.
+    """
+    try:
+        stat = os.stat(index_path(account))
+    except FileNotFoundError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _models_lock:
+        cached = _models.get(account)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        path = _model_path(account)
+        model = None
+        if os.path.exists(path):
+            model, source = FallbackModel.load(path)
+            if source != stamp:
+                model = None
+        if model is None:
+            model = FallbackModel.fit(load_index(account).reset_index())
+            if model is not None:
+                os.makedirs(MODEL_DIR, exist_ok=True)
+                model.save(path, stamp)
+        _models[account] = (stamp, model)
+        return model
+
+
+def add_suggestions(df, account):
+    """Classified frame with "Suggested ..." columns and a "Suggestion score"
+    filled for its 🟨 rows (returned unchanged if account has no model)."""
+    model = model_for(account)
+    if model is None or df.empty:
+        return df
+    review = review_rows(df).to_numpy()
+    columns = {SUGGESTED + f: np.full(len(df), "", dtype=object) for f in model.fields}
+    score = np.full(len(df), np.nan)
+    if review.any():
+        best, cosine = model.predict(df["Original Description"].to_numpy()[review])
+        confident = cosine >= MIN_SCORE
+        rows = np.flatnonzero(review)[confident]
+        for pos, field in enumerate(model.fields):
+            values = np.array([label[pos] for label in model.labels], dtype=object)
+            columns[SUGGESTED + field][rows] = values[best[confident]]
+        score[rows] = np.round(cosine[confident], 3)
+    columns[SCORE] = score
+    return df.assign(**columns)
@@ -0,0 +1,313 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:                     # Windows: SQLite's own locking still guards the data
+    fcntl = None
+
+# ============================================
+# RECORD STORE (payment instructions & receipts)
+# ============================================
+# One SQLite database (WAL mode) instead of a JSON file per collection
+# rewritten on every change. Each record is a row: the fields the app
+# filters on are indexed columns, the record itself is kept as JSON, so
+# records with extra keys survive as they are.
+#
+# Writes only append to the write-ahead log (the journal); its pages are
+# folded into the database file (the snapshot) at checkpoints, which is
+# also where the fsyncs happen, one per checkpoint instead of per write.
+# Deleting a record, or clearing a collection, marks rows with a
+# tombstone; tombstoned rows are dropped for good by compact_store().
+#
+# Several processes may share the store. Writes take SQLite's write lock
+# up front (BEGIN IMMEDIATE) and wait for each other; setting a store up
+# (schema, upgrade, JSON import, compaction) holds an advisory lock on
+# "<store>.lock" so processes starting together do it one at a time.
+STORE_PATH = "records.sqlite3"
+TOMBSTONE_DAYS = 30                     # deleted rows are kept (recoverable) this long
+
+PAYMENT_INSTRUCTIONS = "payment_instructions"
+RECEIPTS = "receipts"
+# the JSON files the collections lived in before; imported once, then renamed
+LEGACY_FILES = {
+    PAYMENT_INSTRUCTIONS: "payment_instructions_db.json",
+    RECEIPTS: "receipts_db.json",
+}
+
+ROW_ID = "_id"                          # key of the row id in returned records
+FILTER_COLUMNS = ("project", "villa", "type", "payment_order", "date")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    collection TEXT NOT NULL,
+    project TEXT,
+    villa TEXT,
+    type TEXT,
+    payment_order TEXT,
+    date TEXT,
+    data TEXT NOT NULL,
+    deleted TEXT
+);
+CREATE INDEX IF NOT EXISTS records_project ON records (collection, project);
+CREATE INDEX IF NOT EXISTS records_villa ON records (collection, villa);
+CREATE INDEX IF NOT EXISTS records_type ON records (collection, type);
+CREATE INDEX IF NOT EXISTS records_payment_order ON records (collection, payment_order);
+CREATE INDEX IF NOT EXISTS records_date ON records (collection, date);
+CREATE TABLE IF NOT EXISTS migrated (collection TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS versions (collection TEXT PRIMARY KEY, version INTEGER NOT NULL);
+"""
+
+# one open connection per store and process, shared by its threads: the
+# last connection closing would checkpoint, i.e. after every write
+_connections = {}                       # (pid, store path) -> connection
+_connections_lock = threading.RLock()
+
+
+def _text(value):
+    return None if value is None or value == "" else str(value)
+
+
+def _columns(record):
+    """Values of the indexed columns of a record.
+
+    Receipts keep their payment order under "number", payment
+    instructions their date only inside "timestamp".
+    """
+    return (
+        _text(record.get("project")),
+        _text(record.get("villa")),
+        _text(record.get("type")),
+        _text(record.get("payment_order") or record.get("number")),
+        _text(record.get("date") or str(record.get("timestamp") or "")[:10]),
+    )
+
+
+def _rows(collection, records):
+    return [(collection, *_columns(r), json.dumps(r, ensure_ascii=False)) for r in records]
+
+
+_LIVE = "deleted IS NULL"
+
+_INSERT = ("INSERT INTO records (collection, project, villa, type, payment_order, date, data) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+
+def _bump(conn, collection):
+    """Count a change of collection (inside the transaction making it)."""
+    conn.execute("INSERT INTO versions VALUES (?, 1) "
+                 "ON CONFLICT (collection) DO UPDATE SET version = version + 1", (collection,))
+
+
+def _read_legacy(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return [r for r in data if isinstance(r, dict)] if isinstance(data, list) else None
+
+
+def _migrate(conn, collection):
+    """Import a collection's legacy JSON file, once per store."""
+    path = LEGACY_FILES[collection]
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")       # other processes wait: imported exactly once
+        if conn.execute("SELECT 1 FROM migrated WHERE collection = ?", (collection,)).fetchone():
+            return
+        records = _read_legacy(path) if os.path.exists(path) else []
+        if records is None:
+            return                            # unreadable: leave it for a later try
+        conn.executemany(_INSERT, _rows(collection, records))
+        conn.execute("INSERT INTO migrated VALUES (?)", (collection,))
+        if records:
+            _bump(conn, collection)
+    if os.path.exists(path):
+        os.replace(path, f"{path}.migrated")  # kept as a backup, never read again
+
+
+@contextmanager
+def _setup_lock(path):
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)   # released when the file is closed
+        yield
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # fsync at checkpoints only: a crash of the machine (not of the app)
+    # may lose the last commits, never corrupt the store
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _upgrade(conn):
+    """Columns added since a store was created."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(records)")}
+    if "deleted" not in columns:
+        conn.execute("ALTER TABLE records ADD COLUMN deleted TEXT")
+
+
+@contextmanager
+def _open(path=None):
+    """The store's connection, held by this thread for the with block.
+
+    Creates and migrates the store on first use in a process.
+    """
+    key = (os.getpid(), path or STORE_PATH)
+    with _connections_lock:
+        conn = _connections.get(key)
+        if conn is None:
+            with _setup_lock(key[1]):
+                conn = _connect(key[1])
+                conn.executescript(_SCHEMA)
+                _upgrade(conn)
+                for collection in LEGACY_FILES:
+                    _migrate(conn, collection)
+                _compact(conn)
+            _connections[key] = conn
+        yield conn
+
+
+def add_records(collection, records, path=None):
+    """Append records in one transaction; returns their row ids."""
+    with _open(path) as conn, conn:
+        conn.execute("BEGIN IMMEDIATE")
+        ids = [conn.execute(_INSERT, row).lastrowid for row in _rows(collection, records)]
+        if ids:
+            _bump(conn, collection)
+    return ids
+
+
+def add_record(collection, record, path=None):
+    """Append one record; returns its row id."""
+    return add_records(collection, [record], path)[0]
+
+
+def _delete(collection, where, params, path):
+    """Tombstone the live rows of collection matching where; returns how many."""
+    with _open(path) as conn, conn:
+        conn.execute("BEGIN IMMEDIATE")
+        deleted = conn.execute(f"UPDATE records SET deleted = datetime('now') "
+                               f"WHERE collection = ? AND {_LIVE}{where}", (collection, *params)).rowcount
+        if deleted:
+            _bump(conn, collection)
+    return deleted
+
+
+def delete_record(collection, record_id, path=None):
+    """Delete one record; False if it was gone already (deleted by another session)."""
+    return bool(_delete(collection, " AND id = ?", (record_id,), path))
+
+
+def clear_records(collection, up_to=None, path=None):
+    """Delete the records of collection; returns how many.
+
+    up_to is the ROW_ID of the newest record the caller has seen: records
+    added after it (by another session meanwhile) are kept.
+    """
+    if up_to is None:
+        return _delete(collection, "", (), path)
+    return _delete(collection, " AND id <= ?", (up_to,), path)
+
+
+def _compact(conn, keep_days=TOMBSTONE_DAYS):
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM records WHERE deleted < datetime('now', ?)", (f"-{keep_days} days",))
+    # fold the whole log into the database file and start it anew
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def compact_store(path=None, keep_days=TOMBSTONE_DAYS):
+    """Drop rows tombstoned more than keep_days ago and truncate the log.
+
+    Runs when a process first opens the store; SQLite checkpoints on its
+    own in between as the log grows.
+    """
+    with _open(path) as conn:
+        _compact(conn, keep_days)
+
+
+def collection_version(collection, path=None):
+    """Number of changes made to collection so far (0: never changed)."""
+    with _open(path) as conn:
+        row = conn.execute("SELECT version FROM versions WHERE collection = ?", (collection,)).fetchone()
+    return row[0] if row else 0
+
+
+def _where(collection, filters):
+    unknown = set(filters) - set(FILTER_COLUMNS)
+    if unknown:
+        raise ValueError(f"Records cannot be filtered by {', '.join(sorted(unknown))}")
+    clauses, params = ["collection = ?", _LIVE], [collection]
+    for column, value in filters.items():
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(str(value))
+    return " AND ".join(clauses), params
+
+
+def list_records(collection, path=None, **filters):
+    """Records of a collection in the order added, each with its ROW_ID.
+
+    Keyword filters (project="...", villa=..., type=..., payment_order=...,
+    date=...) are matched exactly through the indexes; None means any.
+    """
+    where, params = _where(collection, filters)
+    with _open(path) as conn:
+        rows = conn.execute(f"SELECT id, data FROM records WHERE {where} ORDER BY id", params).fetchall()
+    return [{**json.loads(data), ROW_ID: rid} for rid, data in rows]
+
+
+def distinct_values(collection, column, path=None):
+    """Sorted non-empty values of an indexed column."""
+    if column not in FILTER_COLUMNS:
+        raise ValueError(f"'{column}' is not an indexed record column")
+    with _open(path) as conn:
+        rows = conn.execute(f"SELECT DISTINCT {column} FROM records WHERE collection = ? AND {_LIVE} "
+                            f"AND {column} IS NOT NULL ORDER BY {column}", (collection,)).fetchall()
+    return [value for value, in rows]
+
+
+class RecordView:
+    """Query results of the store kept in memory until their collection changes.
+
+    Each call costs one lookup of the collection's version; records are
+    re-read and parsed only after an add, delete or clear, by any session
+    or process. One view can serve every session of a process. The
+    returned lists are shared between calls and must not be modified.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._results = {}              # (collection, query) -> (version, result)
+        self._lock = threading.Lock()   # sessions asking at once read the store once
+
+    def _cached(self, collection, query, load):
+        key = (collection, query)
+        with self._lock:
+            version = collection_version(collection, self.path)
+            cached = self._results.get(key)
+            if cached is None or cached[0] != version:
+                # results of an older version are never asked for again
+                self._results = {k: v for k, v in self._results.items() if k[0] != collection or v[0] == version}
+                cached = self._results[key] = (version, load())
+        return cached[1]
+
+    def records(self, collection, **filters):
+        """list_records(), cached."""
+        return self._cached(collection, ("records", *sorted(filters.items())),
+                            lambda: list_records(collection, self.path, **filters))
+
+    def values(self, collection, column):
+        """distinct_values(), cached."""
+        return self._cached(collection, ("values", column), lambda: distinct_values(collection, column, self.path))
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from classifier import FORMATS, PLOTS
+
+# ============================================
+# CLASSIFIED RESULT CACHE (Parquet on local disk)
+# ============================================
+CACHE_DIR = "classified_cache"
+CACHE_MAX_BYTES = 256 * 1024 * 1024   # LRU eviction above this total size
+# modules whose code decides what a classification comes out as (reading,
+# amount parsing, processors, suppliers, this file's Parquet encoding)
+CODE_FILES = ("classifier.py", "supplier_index.py", "statement_io.py", "result_cache.py")
+
+_ENCODED_COLUMNS_KEY = b"encoded_columns"
+_NUMBER_PART = "__number__"
+
+
+def _code_version():
+    """Hash of the CODE_FILES as they are on disk (read once per process)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha1()
+    for name in CODE_FILES:
+        with open(os.path.join(here, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+_CODE_VERSION = _code_version()
+
+
+def cache_key(data, format_type):
+    """Key for one classification: file bytes + format + rule-set version + code version.
+
+    Editing a rule file (or the plot list), or the code that reads and
+    classifies statements, changes the key, so stale results are simply
+    never looked up again and age out through eviction.
+    """
+    matcher = FORMATS[format_type][1].matcher()
+    ruleset = hashlib.sha1(f"{_CODE_VERSION}|{format_type}|{matcher.version}|{PLOTS}".encode("utf-8"))
+    return f"{hashlib.sha256(data).hexdigest()}-{ruleset.hexdigest()[:16]}"
+
+
+def _path(key):
+    return os.path.join(CACHE_DIR, f"{key}.parquet")
+
+
+def _is_float(value):
+    return isinstance(value, (float, np.floating))
+
+
+def _to_table(df):
+    """Arrow table for df.
+
+    Columns mixing amounts and '' (In/Out, Income/Outcome) do not fit one
+    Arrow type: their numbers go to a float column next to a text column.
+    Anything else mixed is stored as JSON text.
+    """
+    encoded = df.copy()
+    split, as_json = [], []
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        try:
+            pa.array(df[col], from_pandas=True)
+            continue
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+        values = df[col].to_numpy()
+        is_number = np.fromiter((_is_float(v) for v in values), dtype=bool, count=len(values))
+        texts = values[~is_number]
+        if all(isinstance(v, str) or v is None for v in texts):
+            numbers = np.zeros(len(values))
+            numbers[is_number] = values[is_number].astype(float)
+            encoded[col] = pa.array(np.where(is_number, None, values), type=pa.string())
+            encoded[_NUMBER_PART + col] = pa.array(numbers, mask=~is_number)
+            split.append(col)
+        else:
+            # dates etc. (an xlsx and a CSV export of one account) as their text
+            encoded[col] = [json.dumps(v, default=str) for v in values]
+            as_json.append(col)
+    table = pa.Table.from_pandas(encoded, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_ENCODED_COLUMNS_KEY] = json.dumps({"split": split, "json": as_json}).encode("utf-8")
+    return table.replace_schema_metadata(metadata)
+
+
+def _from_table(table):
+    encoded = json.loads(table.schema.metadata.get(_ENCODED_COLUMNS_KEY, b"{}"))
+    numbers = {}
+    for col in encoded.get("split", ()):
+        part = table.column(_NUMBER_PART + col)
+        numbers[col] = (part.is_valid().to_numpy(zero_copy_only=False),
+                        part.to_numpy(zero_copy_only=False))
+        table = table.drop_columns([_NUMBER_PART + col])
+
+    df = table.to_pandas()
+    for col, (is_number, values) in numbers.items():
+        column = table.column(col).to_numpy(zero_copy_only=False).astype(object)
+        column[is_number] = values[is_number].tolist()
+        df[col] = pd.Series(column, index=df.index, dtype=object)
+    for col in encoded.get("json", ()):
+        df[col] = pd.Series([json.loads(v) for v in df[col]], index=df.index, dtype=object)
+    return df
+
+
+def write_frame(path, df):
+    """Write a classified frame to a Parquet file (temp file + rename)."""
+    tmp = f"{path}.tmp{os.getpid()}"
+    pq.write_table(_to_table(df), tmp)
+    os.replace(tmp, path)
+
+
+def read_frame(path):
+    """Read a frame written by write_frame()."""
+    return _from_table(pq.read_table(path))
+
+
+def load_cached(key):
+    """Cached classified frame for key, or None. A hit refreshes its LRU age."""
+    path = _path(key)
+    try:
+        df = read_frame(path)
+    except (FileNotFoundError, pa.ArrowInvalid, OSError):
+        return None
+    os.utime(path)
+    return df
+
+
+def store_cached(key, df):
+    """Save a classified frame under key, then evict down to CACHE_MAX_BYTES."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _path(key)
+    write_frame(path, df)
+    _evict(keep=path)
+
+
+def _evict(keep=None):
+    """Drop least recently used entries until the cache fits CACHE_MAX_BYTES."""
+    entries = []
+    for entry in os.scandir(CACHE_DIR):
+        if entry.name.endswith(".parquet"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= CACHE_MAX_BYTES:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
@@ -0,0 +1,319 @@
+"""Rule conflict and shadowing analyzer (headless, no Streamlit).
+
+Runs every rule of a format over a corpus of historical statements and
+reports how the rules interact: rows matched by more than one rule,
+rules that never end up in the output, rules that never match, keywords
+that hit inside longer words, and a smaller rule table with the same
+output on the corpus:
+
+    python rule_analysis.py "Athens NBG" statements/athens_*.xlsx
+    python rule_analysis.py "Ilisia NBG" --synthetic 100000    # benchmark.py statements
+    python rule_analysis.py "Diakofti Euro" old.csv --json report.json
+"""
+import argparse
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+from classifier import FORMATS, CompiledRules, RuleStats, rule_label
+from statement_io import read_statement
+
+
+# ============================================
+# CORPUS
+# ============================================
+class CorpusRecorder(RuleStats):
+    """RuleStats that also keeps the descriptions and cents the rules saw."""
+
+    def __init__(self, matcher):
+        super().__init__(matcher)
+        self.descs, self.cents = [], []
+
+    def observe(self, desc, cents):
+        super().observe(desc, cents)
+        self.descs.append(np.asarray(desc, dtype=object))
+        self.cents.append(np.asarray(cents, dtype=np.int64))
+
+    def corpus(self):
+        """(desc, cents) of every row observed so far."""
+        if not self.descs:
+            return np.array([], dtype=object), np.array([], dtype=np.int64)
+        return np.concatenate(self.descs), np.concatenate(self.cents)
+
+
+def collect_corpus(format_type, frames):
+    """Classify raw statement frames with format_type's processor, recording
+    the rule engine's input (upper-cased descriptions, signed cents)."""
+    process, rule_file = FORMATS[format_type]
+    recorder = CorpusRecorder(rule_file.matcher())
+    for df in frames:
+        process(df, stats=recorder)
+    return recorder
+
+
+# ============================================
+# RULE INTERACTIONS
+# ============================================
+def rule_matrix(matcher, desc, cents):
+    """Boolean (rows, rules) matrix: which rules match each row."""
+    hits = np.zeros((len(desc), len(matcher.rules)), dtype=bool)
+    for idx, mask in matcher.masks(desc, cents):
+        hits[:, idx] = mask
+    return hits
+
+
+def _setters(matcher):
+    """field -> indexes of the rules writing it, in table order."""
+    setters = {}
+    for idx, rule in enumerate(matcher.rules):
+        for field in rule["set"]:
+            setters.setdefault(field, []).append(idx)
+    return {field: np.array(idxs, dtype=np.int64) for field, idxs in setters.items()}
+
+
+def _last_writer(hits, rules):
+    """Per row, the last of rules (sorted indexes) that matched it; -1 if none."""
+    if not len(rules):
+        return np.full(len(hits), -1, dtype=np.int64)
+    sub = hits[:, rules]
+    last = len(rules) - 1 - sub[:, ::-1].argmax(axis=1)
+    return np.where(sub.any(axis=1), rules[last], -1)
+
+
+def final_rows(matcher, hits):
+    """Per rule, the rows where at least one value it writes is in the final output."""
+    n_rules = len(matcher.rules)
+    pairs = []
+    for rules in _setters(matcher).values():
+        writer = _last_writer(hits, rules)
+        rows = np.flatnonzero(writer >= 0)
+        pairs.append(rows * n_rules + writer[rows])
+    if not pairs:
+        return np.zeros(n_rules, dtype=np.int64)
+    return np.bincount(np.unique(np.concatenate(pairs)) % n_rules, minlength=n_rules)
+
+
+def overlaps(matcher, hits):
+    """Pairs of rules matching the same rows, and what the later one does to the earlier."""
+    multi = hits[hits.sum(axis=1) > 1].astype(np.float64)
+    together = multi.T @ multi
+    records = []
+    for a, b in zip(*np.nonzero(np.triu(together, k=1))):
+        first, later = matcher.rules[a]["set"], matcher.rules[b]["set"]
+        shared = [field for field in first if field in later]
+        changed = [field for field in shared if first[field] != later[field]]
+        if changed:
+            effect = "overwrites " + ", ".join(changed)
+        else:
+            effect = "same values" if shared else "different fields"
+        records.append({
+            "Rule #": int(a), "Rule": rule_label(matcher.rules[a]),
+            "Later rule #": int(b), "Later rule": rule_label(matcher.rules[b]),
+            "Rows": int(together[a, b]), "Effect": effect,
+        })
+    columns = ["Rule #", "Rule", "Later rule #", "Later rule", "Rows", "Effect"]
+    return pd.DataFrame(records, columns=columns).sort_values("Rows", ascending=False, ignore_index=True)
+
+
+def embedded_keywords(matcher, desc):
+    """Keywords that hit inside longer words (EAT in GREAT), with an example word."""
+    codes, uniques = pd.factorize(pd.Series(desc, dtype=object))
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    texts = pd.Series([str(u) for u in uniques], dtype=object)
+    present = matcher.scanner.matrix(texts.to_numpy())
+    records = []
+    for k, kw in enumerate(matcher.keywords):
+        rows = np.flatnonzero(present[:, k])
+        if not len(rows):
+            continue
+        word = re.compile(rf"(?<!\w){re.escape(kw)}(?!\w)")
+        inside = rows[[word.search(texts[r]) is None for r in rows]]
+        if not len(inside):
+            continue
+        example = re.search(rf"\w*{re.escape(kw)}\w*", texts[inside[0]]).group()
+        records.append({
+            "Keyword": kw, "Rows": int(counts[rows].sum()),
+            "Inside a word": int(counts[inside].sum()), "Example": example,
+        })
+    columns = ["Keyword", "Rows", "Inside a word", "Example"]
+    return pd.DataFrame(records, columns=columns).sort_values("Inside a word", ascending=False, ignore_index=True)
+
+
+# ============================================
+# MINIMAL RULE SET
+# ============================================
+def _output(matcher, hits, keep, fields):
+    """Values written into fields, and the filled mask, applying only the rules in keep."""
+    kept = np.zeros(len(matcher.rules), dtype=bool)
+    kept[keep] = True
+    setters = _setters(matcher)
+    values = []
+    for field in fields:
+        rules = setters[field][kept[setters[field]]]
+        written = np.array([rule["set"].get(field) for rule in matcher.rules] + [None], dtype=object)
+        values.append(written[_last_writer(hits, rules)])
+    filling = [i for i in keep if matcher.rules[i].get("filled", True)]
+    filled = hits[:, filling].any(axis=1) if filling else np.zeros(len(hits), dtype=bool)
+    return values, filled
+
+
+def _same_output(a, b):
+    (values_a, filled_a), (values_b, filled_b) = a, b
+    return np.array_equal(filled_a, filled_b) and all(
+        np.array_equal(x, y) for x, y in zip(values_a, values_b)
+    )
+
+
+def minimal_rule_set(matcher, hits, finals=None):
+    """Indexes (in table order) of a subset of the rules with identical output on the corpus.
+
+    Rules are dropped one at a time, fewest final rows first, as long as
+    every row keeps the same values and review mark; this repeats until
+    no single rule can be dropped. Output is compared by value, so of two
+    rules writing the same values on the same rows only one is kept.
+    Rules that never match the corpus are dropped as well.
+    """
+    if finals is None:
+        finals = final_rows(matcher, hits)
+    matches = hits.sum(axis=0)
+    order = sorted(range(len(matcher.rules)), key=lambda i: (finals[i], matches[i], i))
+    keep = list(range(len(matcher.rules)))
+    dropped = True
+    while dropped:
+        dropped = False
+        for idx in order:
+            if idx not in keep:
+                continue
+            trial = [i for i in keep if i != idx]
+            rows = hits[:, idx]
+            if rows.any():
+                sub = hits[rows]
+                fields = list(matcher.rules[idx]["set"])
+                if not _same_output(_output(matcher, sub, keep, fields), _output(matcher, sub, trial, fields)):
+                    continue
+            keep = trial
+            dropped = True
+    return keep
+
+
+# ============================================
+# REPORT
+# ============================================
+def analyze_rules(matcher, desc, cents, seconds=None):
+    """Full report for a rule table over a corpus of (desc, cents) rows.
+
+    seconds: optional per-rule time (RuleStats.seconds) for the rules table.
+    """
+    hits = rule_matrix(matcher, desc, cents)
+    matches = hits.sum(axis=0)
+    multi = hits.sum(axis=1) > 1
+    finals = final_rows(matcher, hits)
+
+    def status(idx):
+        if not matches[idx]:
+            return "never matches"
+        if not finals[idx]:
+            return "never wins"
+        return ""
+
+    rules = pd.DataFrame({
+        "Rule #": range(len(matcher.rules)),
+        "Rule": [rule_label(rule) for rule in matcher.rules],
+        "Matches": matches,
+        "Shared rows": hits[multi].sum(axis=0),
+        "Final rows": finals,
+        "Status": [status(idx) for idx in range(len(matcher.rules))],
+    })
+    if seconds is not None:
+        rules["Time (ms)"] = np.round(np.asarray(seconds) * 1000, 3)
+
+    keep = minimal_rule_set(matcher, hits, finals)
+    return {
+        "rows": len(desc),
+        "multi_match_rows": int(multi.sum()),
+        "rules": rules,
+        "overlaps": overlaps(matcher, hits),
+        "embedded_keywords": embedded_keywords(matcher, desc),
+        "minimal": {
+            "keep": keep,
+            "drop": [idx for idx in range(len(matcher.rules)) if idx not in keep],
+            "keywords_before": len(matcher.keywords),
+            "keywords_after": len(CompiledRules([matcher.rules[i] for i in keep]).keywords),
+        },
+    }
+
+
+def analyze_format(format_type, frames):
+    """analyze_rules() over raw statement frames of format_type."""
+    recorder = collect_corpus(format_type, frames)
+    desc, cents = recorder.corpus()
+    return analyze_rules(recorder.matcher, desc, cents, recorder.seconds)
+
+
+def report_to_json(report):
+    return json.dumps({
+        key: value.to_dict(orient="records") if isinstance(value, pd.DataFrame) else value
+        for key, value in report.items()
+    }, ensure_ascii=False, indent=2, default=int)
+
+
+def _print_report(format_type, report, top):
+    rules = report["rules"]
+    print(f"{format_type}: {report['rows']:,} rows, {len(rules)} rules, "
+          f"{report['multi_match_rows']:,} rows matched by more than one rule")
+
+    print(f"\nOverlapping rules (top {top}):")
+    for r in report["overlaps"].head(top).itertuples(index=False):
+        print(f"  #{r[0]:<3} {r[1]:<45.45} <- #{r[2]:<3} {r[3]:<45.45} {r[4]:>9,}  {r[5]}")
+
+    for status, title in (("never matches", "Rules that never match"), ("never wins", "Rules never the final winner")):
+        found = rules[rules["Status"] == status]
+        print(f"\n{title} ({len(found)}):")
+        for r in found.itertuples(index=False):
+            print(f"  #{r[0]:<3} {r[1]}")
+
+    embedded = report["embedded_keywords"]
+    print(f"\nKeywords hitting inside longer words ({len(embedded)}):")
+    for r in embedded.head(top).itertuples(index=False):
+        print(f"  {r[0]:<30.30} {r[2]:>9,} of {r[1]:,} rows, e.g. {r[3]}")
+
+    minimal = report["minimal"]
+    print(f"\nMinimal rule set with identical output: {len(rules)} -> {len(minimal['keep'])} rules, "
+          f"{minimal['keywords_before']} -> {minimal['keywords_after']} keywords")
+    if minimal["drop"]:
+        print("  drop: " + ", ".join(f"#{idx}" for idx in minimal["drop"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find overlapping, shadowed and unused classification rules.")
+    parser.add_argument("format", choices=list(FORMATS))
+    parser.add_argument("files", nargs="*", help="historical statements (CSV / Excel) of this format")
+    parser.add_argument("--synthetic", type=int, default=0, help="add a synthetic statement of this many rows")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=15, help="rows to print per section")
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args(argv)
+
+    frames = []
+    for path in args.files:
+        with open(path, "rb") as f:
+            frames.append(read_statement(f, args.format))
+    if args.synthetic:
+        from benchmark import make_statement
+        frames.append(make_statement(args.format, args.synthetic, args.seed))
+    if not frames:
+        parser.error("give statement files and/or --synthetic N")
+
+    report = analyze_format(args.format, frames)
+    _print_report(args.format, report, args.top)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(report_to_json(report))
+        print(f"saved {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+import codecs
+import csv
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
+from decimal import Decimal
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+
+from classifier import FORMATS, detect_format, missing_columns
+from result_cache import cache_key, load_cached, store_cached
+
+# ============================================
+# READING BANK STATEMENTS
+# ============================================
+CHUNK_ROWS = 50_000            # rows classified (and held in memory) at a time
+_DECODE_BLOCK = 1 << 20        # bytes per block when checking the CSV encoding
+SNIFF_ROWS = 200               # rows read to recognise a statement's format
+SNIFF_BYTES = 64 * 1024        # head of a CSV that decides encoding, delimiter and decimal mark
+
+# Eurobank exports are always Greek ISO-8859-7
+_GREEK_CSV_FORMATS = ("Diakofti Euro", "Ilisia Euro")
+_DELIMITERS = ",;\t|"
+# amounts with two decimals: "1.234,56" / "-12,30" and "1,234.56" / "-12.30"
+_COMMA_DECIMAL = re.compile(r"^[-+]?(?:\d{1,3}(?:\.\d{3})+|\d+),\d{1,2}-?$")
+_DOT_DECIMAL = re.compile(r"^[-+]?(?:\d{1,3}(?:,\d{3})+|\d+)\.\d{1,2}-?$")
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def _rewind(file):
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+
+def _utf8_file(file):
+    """True if the whole file decodes as UTF-8 (checked block by block)."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    _rewind(file)
+    try:
+        while True:
+            block = file.read(_DECODE_BLOCK)
+            if not block:
+                decoder.decode(b"", final=True)
+                return True
+            decoder.decode(block)
+    except UnicodeDecodeError:
+        return False
+    finally:
+        _rewind(file)
+
+
+def _sniff_encoding(head, complete, file, format_type):
+    """Encoding of a CSV from its first bytes.
+
+    A BOM means UTF-8-SIG; bytes that decode as UTF-8 mean UTF-8. Other
+    Greek files are single-byte: cp1253 when bytes only Windows uses
+    appear (€, curly quotes and dashes in 0x80-0x9F, Ά at 0xA2), else
+    ISO-8859-7. Only a head of plain ASCII needs the rest of the file.
+    """
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.isascii() and not complete:
+        if format_type in _GREEK_CSV_FORMATS:
+            return "ISO-8859-7"
+        return "utf-8" if _utf8_file(file) else "ISO-8859-7"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=complete)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    codes = np.frombuffer(head, dtype=np.uint8)
+    if ((codes >= 0x80) & (codes <= 0x9F)).any() or head.count(b"\xa2") > head.count(b"\xb6"):
+        return "cp1253"
+    return "ISO-8859-7"
+
+
+def _sniff_delimiter(lines):
+    """The delimiter that splits the head into the most consistent rows."""
+    best, best_score = ",", (0.0, 0)
+    for sep in _DELIMITERS:
+        widths = [len(row) for row in csv.reader(lines, delimiter=sep)]
+        if not widths or widths[0] < 2:
+            continue
+        score = (sum(w == widths[0] for w in widths) / len(widths), widths[0])
+        if score > best_score:
+            best, best_score = sep, score
+    return best
+
+
+def sniff_csv(file, format_type=None):
+    """How to read an uploaded CSV, decided once from its first SNIFF_BYTES.
+
+    Returns a dict: encoding, sep, decimal ("," Greek / "." English amounts),
+    thousands ("," when English amounts group thousands, else None) and
+    iso_dates (the head has YYYY-MM-DD values).
+    """
+    _rewind(file)
+    head = file.read(SNIFF_BYTES)
+    complete = len(head) < SNIFF_BYTES or not file.read(1)
+    _rewind(file)
+
+    encoding = _sniff_encoding(head, complete, file, format_type)
+    text = head.decode(encoding, errors="ignore")
+    lines = text.splitlines()
+    if not complete:
+        lines = lines[:-1]         # the last line may be cut off
+    sep = _sniff_delimiter(lines)
+
+    fields = [f.strip() for row in list(csv.reader(lines, delimiter=sep))[1:] for f in row]
+    comma = sum(bool(_COMMA_DECIMAL.match(f)) for f in fields)
+    dot = [f for f in fields if _DOT_DECIMAL.match(f)]
+    decimal = "." if len(dot) > comma else ","
+    return {
+        "encoding": encoding,
+        "sep": sep,
+        "decimal": decimal,
+        "thousands": "," if decimal == "." and any("," in f for f in dot) else None,
+        "iso_dates": any(_ISO_DATE.match(f) for f in fields),
+    }
+
+
+def _csv_options(dialect):
+    """pd.read_csv keyword arguments for a sniffed dialect.
+
+    Greek amounts ("1.234,56") stay text for parse_amounts(); English
+    ones are numbers, read with their thousands separator if they have one.
+    """
+    options = {"encoding": dialect["encoding"], "sep": dialect["sep"]}
+    if dialect["thousands"]:
+        options["thousands"] = dialect["thousands"]
+    return options
+
+
+def _read_csv(file, dialect):
+    """One pd.read_csv of a whole CSV: the pyarrow engine where it reads the
+    same as the default one (it has no thousands separator and turns ISO
+    dates into dates), else the C engine."""
+    options = _csv_options(dialect)
+    if "thousands" not in options and not dialect["iso_dates"]:
+        try:
+            return pd.read_csv(file, engine="pyarrow", **options)
+        except (pa.ArrowInvalid, ValueError):
+            _rewind(file)      # e.g. line breaks inside quoted fields
+    return pd.read_csv(file, **options)
+
+
+def _is_csv(file):
+    return getattr(file, "name", "").lower().endswith(".csv")
+
+
+def read_statement(file, format_type):
+    """Read a whole uploaded statement (CSV or Excel) into a DataFrame."""
+    if _is_csv(file):
+        return _read_csv(file, sniff_csv(file, format_type))
+    return pd.read_excel(file)
+
+
+def sniff_statement(file, rows=SNIFF_ROWS):
+    """Header and first rows of an upload, read without parsing the rest
+    (CSV/.xls with nrows, .xlsx in openpyxl read-only mode)."""
+    name = getattr(file, "name", "").lower()
+    try:
+        if _is_csv(file):
+            return pd.read_csv(file, nrows=rows, **_csv_options(sniff_csv(file)))
+        if name.endswith(".xls"):
+            return pd.read_excel(file, nrows=rows)
+        chunks = _xlsx_chunks(file, rows)
+        try:
+            return next(chunks, pd.DataFrame())
+        finally:
+            chunks.close()
+    finally:
+        _rewind(file)
+
+
+def check_statement(file, format_type=None):
+    """Format of an upload, checked on its header and first rows before any full parse.
+
+    With format_type None the format is detected; otherwise the chosen
+    format's columns must be present. Raises ValueError for files that
+    match no format.
+    """
+    sample = sniff_statement(file)
+    if format_type is None:
+        format_type = detect_format(sample.columns, getattr(file, "name", ""), sample)
+        if format_type is None:
+            raise ValueError("The file's columns match none of the supported formats: "
+                             + ", ".join(str(c) for c in sample.columns[:8]))
+        return format_type
+    missing = missing_columns(format_type, sample.columns)
+    if missing:
+        raise ValueError(f"The file lacks {format_type} columns: {', '.join(missing)}")
+    return format_type
+
+
+def _xlsx_chunks(file, chunksize):
+    """Row-streamed .xlsx reader: openpyxl read-only mode, first row is the header."""
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        # same names pd.read_excel gives blank header cells
+        columns = [f"Unnamed: {i}" if name is None else name for i, name in enumerate(header)]
+        batch, yielded = [], False
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            if len(batch) == chunksize:
+                yield pd.DataFrame(batch, columns=columns)
+                batch, yielded = [], True
+        if batch or not yielded:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        wb.close()
+
+
+def iter_statement_chunks(file, format_type, chunksize=CHUNK_ROWS):
+    """Yield an uploaded statement as DataFrames of at most chunksize rows."""
+    name = getattr(file, "name", "").lower()
+    if name.endswith(".csv"):
+        yield from pd.read_csv(file, chunksize=chunksize, **_csv_options(sniff_csv(file, format_type)))
+    elif name.endswith(".xls"):
+        # legacy .xls has no row-streaming reader; read it whole
+        df = pd.read_excel(file)
+        for start in range(0, max(len(df), 1), chunksize):
+            yield df.iloc[start:start + chunksize]
+    else:
+        yield from _xlsx_chunks(file, chunksize)
+
+
+# ============================================
+# WRITING CLASSIFIED OUTPUT
+# ============================================
+REVIEW_MARK = '🟨'
+# rows no rule classified are filled yellow, on top of the 🟨 in their Description
+REVIEW_FILL = PatternFill(fill_type="solid", start_color="FFF2CC", end_color="FFF2CC")
+HEADER_FONT = Font(bold=True)
+
+
+def _cell_rows(chunk):
+    """Chunk rows as plain tuples, with missing values as empty cells."""
+    values = chunk.astype(object)
+    return values.where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+def review_rows(df):
+    """Boolean Series: rows whose Description carries the 🟨 review mark."""
+    return df['Description'].astype(str).str.contains(REVIEW_MARK, regex=False)
+
+
+def _write_header(ws, columns):
+    cells = []
+    for name in columns:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.font = HEADER_FONT
+        cells.append(cell)
+    ws.append(cells)
+
+
+def _append_frame(ws, df):
+    """Append df's rows to a write-only sheet, filling review rows yellow.
+
+    Returns the number of review rows written.
+    """
+    review = review_rows(df).to_numpy()
+    # registering the fill is costly; do it once and copy the style array
+    template = WriteOnlyCell(ws)
+    template.fill = REVIEW_FILL
+    style = template._style
+    for row, flagged in zip(_cell_rows(df), review):
+        if flagged:
+            cells = []
+            for value in row:
+                cell = WriteOnlyCell(ws, value=value)
+                cell._style = copy(style)
+                cells.append(cell)
+            ws.append(cells)
+        else:
+            ws.append(row)
+    return int(review.sum())
+
+
+def write_classified_xlsx(df, output):
+    """Write a classified DataFrame to output as .xlsx, row by row.
+
+    Uses a write-only workbook instead of DataFrame.to_excel, so the
+    openpyxl cell model is never built for the whole sheet.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    _write_header(ws, df.columns)
+    _append_frame(ws, df)
+    wb.save(output)
+
+
+def stream_classify_to_xlsx(file, format_type, output, chunksize=CHUNK_ROWS, preview_rows=10, stats=None,
+                            postprocess=None):
+    """Classify a statement chunk by chunk straight into an .xlsx.
+
+    Only one chunk is in memory at a time; rows are appended to a
+    write-only workbook as soon as they are classified. Columns that
+    only some rules set (e.g. Diakofti's "Location") are always present,
+    because the header is written before later chunks are seen.
+    Returns {"total", "needs_review", "preview"}; stats (a RuleStats)
+    collects the per-rule counters over all chunks. postprocess, if given,
+    maps each classified chunk to the frame written (e.g. add_suggestions).
+    """
+    process, rule_file = FORMATS[format_type]
+    matcher = rule_file.matcher()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    columns = None
+    total = review = 0
+    preview = None
+
+    for chunk in iter_statement_chunks(file, format_type, chunksize):
+        result = process(chunk, stats=stats)
+        if postprocess is not None:
+            result = postprocess(result)
+        if columns is None:
+            columns = list(result.columns) + [f for f in matcher.fields if f not in result.columns]
+            _write_header(ws, columns)
+            preview = result.reindex(columns=columns).head(preview_rows)
+        result = result.reindex(columns=columns)
+        review += _append_frame(ws, result)
+        total += len(result)
+
+    wb.save(output)
+    return {"total": total, "needs_review": review, "preview": preview}
+
+
+# ============================================
+# COLUMNAR EXPORT (PARQUET / ARROW IPC)
+# ============================================
+# Typed columns, so pivot scripts load the ledger without re-parsing it:
+# dates as date32, amounts as decimal(18, 2) (blank = null), and the
+# repeated labels dictionary-encoded. Types follow the column name, so
+# every export of every format has the same schema for a column.
+_DATE_COLUMNS = {"Date"}
+_AMOUNT_COLUMNS = {
+    "In", "Out", "Vat", "Total", "Income", "Outcome",
+    "Progressive Ledger Balance", "Balance", "Repayment",
+}
+_LABEL_COLUMNS = {
+    "Plot", "Type", "Supplier", "Expenses Type", "Income/outcome", "Income/Outcome",
+    "Location", "Project", "Bank",
+}
+_LABEL_PREFIX = "Suggested "            # fallback_model suggestion columns
+AMOUNT_TYPE = pa.decimal128(18, 2)
+LABEL_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+
+def _blank_to_nan(values):
+    """Numbers of a column, NaN for '' and anything not a number."""
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float, na_value=np.nan)
+    objects = values.to_numpy(dtype=object)
+    try:
+        return np.where(objects == "", np.nan, objects).astype(float)
+    except (TypeError, ValueError):
+        return pd.to_numeric(values.replace("", None), errors="coerce").to_numpy(dtype=float)
+
+
+def _date_array(values):
+    values = pd.Series(values)
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        # output dates are dd/mm/YYYY text; Excel uploads may pass real dates through
+        values = pd.to_datetime(values.replace("", None), format="%d/%m/%Y", errors="coerce")
+    return pa.array(values.dt.date, type=pa.date32(), from_pandas=True)
+
+
+def _amount_array(values):
+    """Exact decimal(18, 2) amounts, via int64 cents."""
+    numbers = _blank_to_nan(values)
+    missing = np.isnan(numbers)
+    cents = pa.array(np.round(np.where(missing, 0.0, numbers) * 100).astype(np.int64), mask=missing)
+    return pc.multiply(cents.cast(pa.decimal128(19, 0)), pa.scalar(Decimal("0.01"), pa.decimal128(3, 2))).cast(AMOUNT_TYPE)
+
+
+def _text_array(values):
+    try:
+        return pa.array(values, type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        values = pd.Series(values, dtype=object)          # mixed: numbers as text
+        return pa.array(values.where(values.isna(), values.astype(str)), type=pa.string(), from_pandas=True)
+
+
+def ledger_table(df):
+    """A classified DataFrame as a typed pyarrow Table."""
+    arrays = {}
+    for col in df.columns:
+        values = df[col]
+        name = str(col)
+        if name in _DATE_COLUMNS:
+            arrays[name] = _date_array(values)
+        elif name in _AMOUNT_COLUMNS:
+            arrays[name] = _amount_array(values)
+        elif name in _LABEL_COLUMNS or name.startswith(_LABEL_PREFIX):
+            arrays[name] = pc.dictionary_encode(_text_array(values)).cast(LABEL_TYPE)
+        elif name == "Year":
+            numbers = _blank_to_nan(values)
+            arrays[name] = pa.array(np.nan_to_num(numbers).astype(np.int16), mask=np.isnan(numbers))
+        elif pd.api.types.is_bool_dtype(values) or pd.api.types.is_float_dtype(values):
+            arrays[name] = pa.array(values, from_pandas=True)
+        else:
+            arrays[name] = _text_array(values)
+    return pa.table(arrays)
+
+
+def write_classified_parquet(df, output):
+    """Write a classified DataFrame to output as Parquet (zstd)."""
+    pq.write_table(ledger_table(df), output, compression="zstd")
+
+
+def write_classified_arrow(df, output):
+    """Write a classified DataFrame to output as an Arrow IPC file (zstd)."""
+    table = ledger_table(df)
+    with pa.ipc.new_file(output, table.schema, options=pa.ipc.IpcWriteOptions(compression="zstd")) as writer:
+        writer.write_table(table)
+
+
+# ============================================
+# BATCH CLASSIFICATION (MANY FILES, ONE WORKBOOK)
+# ============================================
+def detect_upload_format(file):
+    """Format of an uploaded statement, from its first rows and file name; None if unknown."""
+    sample = sniff_statement(file)
+    return detect_format(sample.columns, getattr(file, "name", ""), sample)
+
+
+def _classify_upload(name, data, format_type):
+    """Pool worker: classify one uploaded file given as raw bytes."""
+    file = BytesIO(data)
+    file.name = name
+    process, _ = FORMATS[format_type]
+    return process(read_statement(file, format_type))
+
+
+def classify_cached(name, data, format_type):
+    """Classify one uploaded file, reusing the on-disk result when the same
+    bytes were already classified with the same rules."""
+    key = cache_key(data, format_type)
+    result = load_cached(key)
+    if result is None:
+        result = _classify_upload(name, data, format_type)
+        store_cached(key, result)
+    return result
+
+
+def classify_batch(jobs, max_workers=None):
+    """Classify many statements in parallel on a process pool.
+
+    jobs: list of (file name, bytes, format). Files already in the result
+    cache are not re-classified. Returns {format: DataFrame}, the files of
+    one account concatenated in upload order.
+    """
+    keys = [cache_key(data, format_type) for _, data, format_type in jobs]
+    cached = [load_cached(key) for key in keys]
+    misses = sum(result is None for result in cached)
+
+    workers = min(misses, max_workers or os.cpu_count() or 1)
+    # spawned, not forked: a fork of the threaded Streamlit server can copy a
+    # lock another session holds (RuleFile.matcher) and hang on it forever
+    context = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=context) if workers > 1 else None
+    futures = [
+        pool.submit(_classify_upload, *job) if pool is not None and result is None else None
+        for job, result in zip(jobs, cached)
+    ]
+
+    accounts = {}
+    try:
+        for job, key, result, future in zip(jobs, keys, cached, futures):
+            name, _, format_type = job
+            if result is None:
+                try:
+                    result = future.result() if future is not None else _classify_upload(*job)
+                except Exception as e:
+                    raise ValueError(f"{name}: {e}") from e
+                store_cached(key, result)
+            accounts.setdefault(format_type, []).append(result)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return {fmt: pd.concat(frames, ignore_index=True) for fmt, frames in accounts.items()}
+
+
+def write_accounts_xlsx(accounts, output):
+    """Write {account: classified DataFrame} as one workbook, a sheet per account."""
+    wb = Workbook(write_only=True)
+    for account, df in accounts.items():
+        ws = wb.create_sheet(title=account[:31])
+        _write_header(ws, df.columns)
+        _append_frame(ws, df)
+    wb.save(output)
@@ -0,0 +1,273 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# ============================================
+# SUPPLIER ALIAS INDEX (fuzzy merchant names)
+# ============================================
+# Card descriptions spell one merchant many ways: "GRIGORAK KYTHI GR",
+# "GRIGORAKIS KYTHIRA", "ΓΡΗΓΟΡΑΚΗΣ ΚΥΘΗΡΑ 4507XXXXXXXX3244". Both the
+# known aliases and the descriptions are normalized (Greek to Latin,
+# spelling variants folded, card numbers / places / country codes
+# dropped) and compared as sets of character trigrams. An alias is a
+# candidate when at least MIN_CONTAINMENT of its trigrams occur in the
+# description; it matches only if its words then line up, in order, with
+# consecutive words of the description. A word lines up when it is equal,
+# has at most MAX_WORD_TAIL letters more or fewer at the end ("GRIGORAK"
+# / "GRIGORAKIS", a cut-off descriptor), or, from five letters on, one
+# letter wrong. "KALLITHEA TRANSPORT" never matches "TRANSPORT KALLI".
+MIN_CONTAINMENT = 0.75
+MAX_WORD_TAIL = 2
+
+_GREEK_TO_LATIN = {
+    "Α": "A", "Β": "V", "Γ": "G", "Δ": "D", "Ε": "E", "Ζ": "Z", "Η": "I", "Θ": "TH",
+    "Ι": "I", "Κ": "K", "Λ": "L", "Μ": "M", "Ν": "N", "Ξ": "X", "Ο": "O", "Π": "P",
+    "Ρ": "R", "Σ": "S", "Τ": "T", "Υ": "Y", "Φ": "F", "Χ": "CH", "Ψ": "PS", "Ω": "O",
+    "Ά": "A", "Έ": "E", "Ή": "I", "Ί": "I", "Ό": "O", "Ύ": "Y", "Ώ": "O", "Ϊ": "I", "Ϋ": "Y",
+}
+# transliteration differences, folded the same way on both sides
+_SPELLING_FOLDS = [
+    ("MP", "B"), ("NT", "D"), ("GK", "G"), ("PH", "F"), ("TH", "T"), ("CH", "H"), ("KH", "H"),
+    ("KS", "X"), ("OU", "U"), ("EI", "I"), ("OI", "I"), ("AI", "E"), ("Y", "I"), ("W", "O"), ("V", "B"),
+]
+# card descriptor parts that say nothing about the merchant
+_PLACES = [
+    "KYTHI", "KYTHIR", "KYTHIRA", "KITHIRA", "ATHINA", "ATHINAI", "ATHENS", "CHANIA", "HANIA",
+    "PIRAEUS", "PEIRAIAS", "THESSALONIKI", "HERAKLION", "IRAKLIO", "GREECE", "HELLAS",
+]
+_NOISE_WORDS = ["GR", "GRC", "POS", "CARD", "PURCHASE", "AGORA", "WWW"]
+
+
+def _fold(text):
+    for spelling, folded in _SPELLING_FOLDS:
+        text = text.replace(spelling, folded)
+    return text
+
+
+# matched after folding, so spelled the folded way too
+_DROP_WORDS = r"\b(" + "|".join(dict.fromkeys(_fold(w) for w in _PLACES + _NOISE_WORDS)) + r")\b"
+
+
+# code point table for the one-letter transliterations (Greek block only);
+# Θ and Χ go straight to their folded forms, T and H
+_GREEK_BLOCK = 0x370
+_GREEK_TABLE = np.arange(_GREEK_BLOCK, 0x400, dtype=np.uint32)
+for _letter, _latin in {**_GREEK_TO_LATIN, "Θ": "T", "Χ": "H"}.items():
+    if len(_latin) == 1:
+        _GREEK_TABLE[ord(_letter) - _GREEK_BLOCK] = ord(_latin)
+_GREEK_LONGER = {k: v for k, v in _GREEK_TO_LATIN.items() if len(v) > 1 and k not in "ΘΧ"}
+
+
+def _upper_latin(texts):
+    """Upper-cased texts with Greek letters transliterated, as a pyarrow array.
+
+    All texts are joined into one string so the work is a few calls over
+    one code point buffer instead of a Python loop.
+    """
+    joined = "\x00".join(texts).upper()
+    codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+    greek = (codes >= _GREEK_BLOCK) & (codes < _GREEK_BLOCK + len(_GREEK_TABLE))
+    if greek.any():
+        codes = codes.copy()
+        codes[greek] = _GREEK_TABLE[codes[greek] - _GREEK_BLOCK]
+        joined = codes.tobytes().decode("utf-32-le")
+        for letter, latin in _GREEK_LONGER.items():
+            joined = joined.replace(letter, latin)
+    return pa.array(joined.split("\x00"), type=pa.string())
+
+
+def normalize_merchants(texts):
+    """Comparable form of merchant names or card descriptions (object array).
+
+    Words with digits (card numbers, references) go first, so the texts
+    they made distinct are normalized once: upper-case, Greek to Latin,
+    accents off, spellings folded, places / country codes dropped.
+    """
+    text = pa.array([str(t) for t in texts], type=pa.string())
+    text = pc.replace_substring_regex(text, r"\S*\d\S*", " ")
+    codes, uniques = pd.factorize(text.to_numpy(zero_copy_only=False))
+    if not len(uniques):
+        return np.array([], dtype=object)
+    text = _upper_latin(uniques.tolist())
+    if not pc.all(pc.string_is_ascii(text)).as_py():
+        text = pc.replace_substring_regex(pc.utf8_normalize(text, "NFD"), r"\p{Mn}", "")
+    text = pc.replace_substring_regex(text, r"[^A-Z ]+", " ")
+    for spelling, folded in _SPELLING_FOLDS:
+        text = pc.replace_substring(text, spelling, folded)
+    text = pc.replace_substring_regex(text, _DROP_WORDS, " ")
+    text = pc.utf8_trim_whitespace(pc.replace_substring_regex(text, r" +", " "))
+    return text.to_numpy(zero_copy_only=False).astype(object)[codes]
+
+
+def normalize_merchant(text):
+    """normalize_merchants() of one text."""
+    return normalize_merchants([text])[0]
+
+
+def _trigrams(texts):
+    """Distinct character trigrams of texts (padded with spaces) as sorted (row, trigram) pairs.
+
+    A trigram is its three code points packed into one int64, so equal
+    trigrams always get equal ids.
+    """
+    padded = [f" {t} " for t in texts]
+    codes = np.frombuffer("\x00".join(padded).encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+    lengths = np.fromiter(map(len, padded), dtype=np.int64, count=len(padded))
+    owner = np.repeat(np.arange(len(padded)), lengths + 1)[:len(codes)]
+    owner[np.cumsum(lengths + 1)[:-1] - 1] = -1          # the separators
+    m = len(codes) - 2
+    if m <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    grams = (codes[:m] << 42) | (codes[1:m + 1] << 21) | codes[2:m + 2]
+    inside = (owner[:m] >= 0) & (owner[:m] == owner[2:m + 2])
+    rows, grams = owner[:m][inside], grams[inside]
+    order = np.lexsort((grams, rows))
+    rows, grams = rows[order], grams[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (grams[1:] != grams[:-1])
+    return rows[first], grams[first]
+
+
+def _edits(a, b):
+    """Levenshtein distance of two short words."""
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def _word_fits(alias_word, word):
+    if word == alias_word:
+        return True
+    short, long_ = sorted((alias_word, word), key=len)
+    if long_.startswith(short) and len(long_) - len(short) <= MAX_WORD_TAIL and len(short) >= 3:
+        return True
+    return len(alias_word) >= 5 and abs(len(word) - len(alias_word)) <= 1 and _edits(alias_word, word) <= 1
+
+
+def align(alias_words, words):
+    """How alias_words line up with consecutive words: "exact", "fuzzy" or None."""
+    k = len(alias_words)
+    best = None
+    for start in range(len(words) - k + 1):
+        window = words[start:start + k]
+        if window == alias_words:
+            return "exact"
+        if all(_word_fits(a, w) for a, w in zip(alias_words, window)):
+            best = "fuzzy"
+    return best
+
+
+def _expand(indptr, positions):
+    """Entries indptr[p]:indptr[p + 1] of every p in positions, concatenated;
+    also returns how many each position contributed."""
+    counts = indptr[positions + 1] - indptr[positions]
+    first = np.repeat(indptr[positions] - (np.cumsum(counts) - counts), counts)
+    return first + np.arange(counts.sum()), counts
+
+
+class SupplierIndex:
+    """Known suppliers (each a list of aliases) matched approximately in descriptions.
+
+    Lookups go through an inverted index from trigram to aliases. Only
+    each alias's rarest trigrams are indexed, as many as an alias can
+    miss and still match plus two: a description that matches contains at
+    least two of them. A common trigram thus never makes a description
+    visit every alias, and only pairs sharing two indexed trigrams are
+    checked in full, then aligned word by word.
+    """
+
+    def __init__(self, suppliers, min_containment=MIN_CONTAINMENT):
+        self.min_containment = min_containment
+        owner = np.array([sid for sid, supplier in enumerate(suppliers) for _ in supplier["aliases"]], dtype=np.int64)
+        aliases = normalize_merchants([alias for supplier in suppliers for alias in supplier["aliases"]])
+        nonempty = aliases != ""
+        aliases, self._owner = aliases[nonempty].tolist(), owner[nonempty]
+        self._alias_words = [alias.split() for alias in aliases]
+        self._alias_len = np.fromiter(map(len, aliases), dtype=np.int64, count=len(aliases))
+
+        rows, grams = _trigrams(aliases)
+        self._vocab, gids = np.unique(grams, return_inverse=True)
+        # every alias's trigram ids, CSR by alias
+        self._grams = gids
+        self._grams_ptr = np.searchsorted(rows, np.arange(len(aliases) + 1))
+        sizes = np.diff(self._grams_ptr)
+        self._needed = np.ceil(sizes * min_containment - 1e-9).astype(np.int64)
+
+        # prefix filter: per alias, its (sizes - needed + 2) rarest trigrams,
+        # of which a match has at least _prefix_needed
+        prefix_len = np.minimum(sizes, sizes - self._needed + 2)
+        self._prefix_needed = np.maximum(prefix_len - (sizes - self._needed), 1)
+        frequency = np.bincount(gids, minlength=len(self._vocab))
+        order = np.lexsort((frequency[gids], rows))
+        rank = np.arange(len(rows)) - self._grams_ptr[rows[order]]
+        prefix = order[rank < prefix_len[rows[order]]]
+        by_gram = prefix[np.argsort(gids[prefix], kind="stable")]
+        self._postings = rows[by_gram]
+        self._postings_ptr = np.searchsorted(gids[by_gram], np.arange(len(self._vocab) + 1))
+
+    def lookup(self, texts):
+        """(index of the best matching supplier, whether its alias is there
+        word for word) per text; -1 and False where none matches.
+
+        Texts the same after normalizing are looked up once. Word-for-word
+        matches win, then the higher containment, then the longer alias.
+        """
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object))
+        if not len(self._owner) or not len(uniques):
+            return np.full(len(codes), -1, dtype=np.int64), np.zeros(len(codes), dtype=bool)
+        norm_codes, norms = pd.factorize(normalize_merchants(uniques.to_numpy(dtype=object)))
+        best, exact = self._lookup_distinct(norms.tolist())
+        rows = np.append(norm_codes, -1)[codes]
+        return np.append(best, -1)[rows], np.append(exact, False)[rows]
+
+    def _lookup_distinct(self, texts):
+        best = np.full(len(texts), -1, dtype=np.int64)
+        exact = np.zeros(len(texts), dtype=bool)
+        rows, grams = _trigrams(texts)
+        pos = np.minimum(np.searchsorted(self._vocab, grams), len(self._vocab) - 1)
+        known = self._vocab[pos] == grams
+        rows, gids = rows[known], pos[known]
+
+        # candidates: (text, alias) pairs sharing enough indexed trigrams
+        entries, counts = _expand(self._postings_ptr, gids)
+        pairs = np.sort(np.repeat(rows, counts) * len(self._owner) + self._postings[entries])
+        starts = np.flatnonzero(np.diff(pairs, prepend=-1))
+        shared = np.diff(np.append(starts, len(pairs)))
+        pairs = pairs[starts]
+        text, alias = np.divmod(pairs, len(self._owner))
+        keep = shared >= self._prefix_needed[alias]
+        pairs, text, alias = pairs[keep], text[keep], alias[keep]
+        if not len(pairs):
+            return best, exact
+
+        # verify: how many of the alias's trigrams the text has
+        entries, counts = _expand(self._grams_ptr, alias)
+        wanted = np.repeat(text, counts) * len(self._vocab) + self._grams[entries]
+        have = rows * len(self._vocab) + gids          # sorted: rows, then gids
+        present = have[np.minimum(np.searchsorted(have, wanted), len(have) - 1)] == wanted
+        pair = np.repeat(np.arange(len(pairs)), counts)
+        overlap = np.bincount(pair[present], minlength=len(pairs))
+        ok = overlap >= self._needed[alias]
+        text, alias = text[ok], alias[ok]
+        score = overlap[ok] / np.maximum(np.diff(self._grams_ptr)[alias], 1)
+
+        # confirm: the alias's words in order, on consecutive words (few pairs left)
+        words = {}
+        fits = [align(self._alias_words[a], words.setdefault(t, texts[t].split()))
+                for t, a in zip(text.tolist(), alias.tolist())]
+        ok = np.array([f is not None for f in fits], dtype=bool)
+        word_for_word = np.array([f == "exact" for f in fits], dtype=bool)[ok]
+        text, alias, score = text[ok], alias[ok], score[ok]
+
+        order = np.lexsort((-self._alias_len[alias], -score, ~word_for_word, text))
+        text, alias, word_for_word = text[order], alias[order], word_for_word[order]
+        first = np.ones(len(text), dtype=bool)
+        first[1:] = text[1:] != text[:-1]
+        best[text[first]] = self._owner[alias[first]]
+        exact[text[first]] = word_for_word[first]
+        return best, exact
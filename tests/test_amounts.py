@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from classifier import parse_amounts, to_cents
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1.234,56", 123456),
+    ("-12,30", -1230),
+    ("12,30-", -1230),
+    ("1 234,56", 123456),
+    ("€ 12,30", 1230),
+    ("1.234", 123400),
+    ("0,005", 1),
+    ("-0,125", -13),
+])
+def test_text_amounts(text, expected):
+    cents, failed = parse_amounts(pd.Series([text]), cents=True)
+    assert cents.tolist() == [expected] and not failed.any()
+
+
+def test_malformed_amounts_fail_their_row_only():
+    values = pd.Series(["1.234.56", "-2.000.5", "12,30", "abc", None])
+    amounts, failed = parse_amounts(values)
+    assert failed.tolist() == [True, True, False, True, True]
+    assert amounts[2] == 12.3 and np.isnan(amounts[failed]).all()
+    cents, failed = parse_amounts(pd.Series(["1.234.56", 5.5], dtype=object), cents=True)
+    assert cents.tolist() == [0, 550] and failed.tolist() == [True, False]
+
+
+def test_numbers_round_half_cents_away_from_zero():
+    cents, failed = parse_amounts(pd.Series([1.005, -0.125, 2.675, 0.1]), cents=True)
+    assert cents.tolist() == [101, -13, 268, 10] and not failed.any()
+    assert to_cents([1.005, -0.125]).tolist() == [101, -13]
@@ -0,0 +1,33 @@
+import os
+
+import pandas as pd
+
+import statement_io
+from classifier import FORMATS
+from statement_io import classify_batch, read_statement
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+
+def test_batch_on_spawned_workers_matches_direct_classification(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)     # result cache
+    jobs = []
+    for stem, format_type in (("athens_nbg", "Athens NBG"), ("ilisia_nbg", "Ilisia NBG")):
+        with open(os.path.join(GOLDEN_DIR, f"{stem}.csv"), "rb") as f:
+            jobs.append((f"{stem}.csv", f.read(), format_type))
+
+    contexts = []
+
+    class Pool(statement_io.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            contexts.append(kwargs.get("mp_context"))
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(statement_io, "ProcessPoolExecutor", Pool)
+    accounts = classify_batch(jobs, max_workers=2)
+    # never forked from the (threaded) server process
+    assert [c.get_start_method() for c in contexts] == ["spawn"]
+    for name, data, format_type in jobs:
+        with open(os.path.join(GOLDEN_DIR, name), "rb") as f:
+            expected = FORMATS[format_type][0](read_statement(f, format_type))
+        pd.testing.assert_frame_equal(accounts[format_type], expected)
@@ -0,0 +1,87 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+
+import record_store
+
+# ============================================
+# CONCURRENT WRITERS (separate processes, one store)
+# ============================================
+# Every process starts on a directory that still has the legacy JSON
+# files, so they race to set the store up and import them. Writers add
+# receipts and payment instructions and delete some of their own
+# receipts; one more process clears the imported payment instructions
+# (up to the newest it saw) while the writers keep adding.
+WRITERS = 8
+PER_WRITER = 100
+LEGACY_RECEIPTS = 50
+LEGACY_INSTRUCTIONS = 20
+
+
+def _writer(directory, writer):
+    os.chdir(directory)
+    kept, deleted = [], []
+    for i in range(PER_WRITER):
+        number = f"{writer}-{i}"
+        rid = record_store.add_record(record_store.RECEIPTS, {
+            "type": "Receipt of Funds", "number": number, "project": f"P{i % 4}", "villa": str(writer),
+        })
+        kept.append((rid, number))
+        record_store.add_record(record_store.PAYMENT_INSTRUCTIONS, {"payment_order": number, "project": "W"})
+        if i % 10 == 9:
+            rid, number = kept.pop(i % len(kept))
+            assert record_store.delete_record(record_store.RECEIPTS, rid)
+            assert not record_store.delete_record(record_store.RECEIPTS, rid)   # gone already
+            deleted.append(number)
+            record_store.list_records(record_store.RECEIPTS, villa=str(writer))
+    return [number for _, number in kept], deleted
+
+
+def _clearer(directory):
+    os.chdir(directory)
+    legacy = [r for r in record_store.list_records(record_store.PAYMENT_INSTRUCTIONS) if r["project"] == "L"]
+    up_to = max(r[record_store.ROW_ID] for r in legacy)
+    # wait until writers have added instructions of their own, then clear
+    while len(record_store.list_records(record_store.PAYMENT_INSTRUCTIONS)) < len(legacy) + WRITERS:
+        time.sleep(0.01)
+    return record_store.clear_records(record_store.PAYMENT_INSTRUCTIONS, up_to=up_to)
+
+
+def _run(directory, job):
+    return _clearer(directory) if job is None else _writer(directory, job)
+
+
+def test_concurrent_writers_lose_nothing(tmp_path):
+    for collection, count, project in ((record_store.RECEIPTS, LEGACY_RECEIPTS, "L"),
+                                       (record_store.PAYMENT_INSTRUCTIONS, LEGACY_INSTRUCTIONS, "L")):
+        with open(tmp_path / record_store.LEGACY_FILES[collection], "w", encoding="utf-8") as f:
+            json.dump([{"number": f"legacy{i}", "payment_order": f"legacy{i}", "project": project}
+                       for i in range(count)], f)
+
+    jobs = [(str(tmp_path), w) for w in range(WRITERS)] + [(str(tmp_path), None)]
+    with multiprocessing.get_context("spawn").Pool(len(jobs)) as pool:
+        results = pool.starmap(_run, jobs)
+    *writers, cleared = results
+
+    path = str(tmp_path / record_store.STORE_PATH)
+    receipts = [r["number"] for r in record_store.list_records(record_store.RECEIPTS, path=path)]
+    kept = [n for numbers, _ in writers for n in numbers]
+    deleted = [n for _, numbers in writers for n in numbers]
+    # imported once, nothing lost, nothing deleted twice or revived
+    assert sorted(receipts) == sorted([f"legacy{i}" for i in range(LEGACY_RECEIPTS)] + kept)
+    assert not set(deleted) & set(receipts)
+    with sqlite3.connect(path) as conn:
+        tombstones = conn.execute("SELECT count(*) FROM records WHERE collection = ? AND deleted IS NOT NULL",
+                                  (record_store.RECEIPTS,)).fetchone()[0]
+    assert tombstones == len(deleted)
+
+    # the clear took the imported instructions only, not the writers' newer ones
+    assert cleared == LEGACY_INSTRUCTIONS
+    instructions = record_store.list_records(record_store.PAYMENT_INSTRUCTIONS, path=path)
+    assert sorted(r["payment_order"] for r in instructions) == sorted(
+        f"{w}-{i}" for w in range(WRITERS) for i in range(PER_WRITER))
+
+    assert not os.path.exists(tmp_path / "receipts_db.json")
+    assert os.path.exists(tmp_path / "receipts_db.json.migrated")
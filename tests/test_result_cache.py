@@ -0,0 +1,14 @@
+import result_cache
+
+
+def test_cache_key_follows_the_code(monkeypatch):
+    key = result_cache.cache_key(b"statement", "Diakofti Euro")
+    assert result_cache.cache_key(b"statement", "Diakofti Euro") == key
+    # an edit to the reading or classifying code is a new key
+    monkeypatch.setattr(result_cache, "_CODE_VERSION", "0" * 16)
+    assert result_cache.cache_key(b"statement", "Diakofti Euro") != key
+
+
+def test_code_version_covers_the_processors():
+    assert {"classifier.py", "supplier_index.py", "statement_io.py"} <= set(result_cache.CODE_FILES)
+    assert result_cache._code_version() == result_cache._CODE_VERSION
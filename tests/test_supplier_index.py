@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from classifier import CompiledRules, load_rules, process_diakofti_file, DIAKOFTI_RULES
+from supplier_index import SupplierIndex, align, normalize_merchant
+
+SUPPLIERS = load_rules(DIAKOFTI_RULES.path)[1]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SupplierIndex(SUPPLIERS)
+
+
+def _names(index, texts):
+    sid, exact = index.lookup(texts)
+    return [(SUPPLIERS[s]["name"] if s >= 0 else None, bool(e)) for s, e in zip(sid, exact)]
+
+
+def test_normalize_merchant():
+    assert normalize_merchant("ΓΡΗΓΟΡΑΚΗΣ ΚΥΘΗΡΑ 4507XXXXXXXX3244") == "GRIGORAKIS"
+    assert normalize_merchant("GRIGORAK KYTHI GR") == "GRIGORAK"
+    assert normalize_merchant("Το Λιμάνι") == "TO LIMANI"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("GRIGORAK KYTHI GR", ("Grigorakis", True)),
+    ("O MAGOS TAVERNA", ("O Magos", True)),
+    ("GRIGORAKIS KYTHIRA", ("Grigorakis", False)),
+    ("ΓΡΗΓΟΡΑΚΗΣ ΚΥΘΗΡΑ 4507XXXXXXXX3244", ("Grigorakis", False)),
+    ("TO LIMANI KYTHIRA", ("To Limani", False)),
+    ("KONTOLEON", ("Kontoleon", False)),
+])
+def test_spellings_of_a_supplier_match(index, text, expected):
+    assert _names(index, [text]) == [expected]
+
+
+@pytest.mark.parametrize("text", [
+    # alias words out of order, or only inside longer words
+    "KALLITHEA TRANSPORT",
+    "TRANSPORTATION KALLITHEA",
+    "Kalliforna Transportation",
+    "TO LIMANAKI",
+    "LIMANI TO",
+    "MAGOS",
+    "",
+])
+def test_other_merchants_do_not_match(index, text):
+    assert _names(index, [text]) == [(None, False)]
+
+
+def test_align():
+    assert align(["TRANSPORT", "KALLI"], ["X", "TRANSPORT", "KALLI"]) == "exact"
+    assert align(["TRANSPORT", "KALLI"], ["TRANSPORT", "KALLIS"]) == "fuzzy"
+    assert align(["TRANSPORT", "KALLI"], ["KALLI", "TRANSPORT"]) is None
+    assert align(["TRANSPORT", "KALLI"], ["TRANSPORT", "X", "KALLI"]) is None
+
+
+def _diakofti(descriptions):
+    return process_diakofti_file(pd.DataFrame({
+        "ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ": ["01/02/2024"] * len(descriptions),
+        "ΠΕΡΙΓΡΑΦΗ": descriptions,
+        "ΠΟΣΟ": ["-12,30"] * len(descriptions),
+    }))
+
+
+def test_fuzzy_supplier_match_keeps_review_mark():
+    out = _diakofti(["ΓΡΗΓΟΡΑΚΗΣ ΚΥΘΗΡΑ 4507XXXXXXXX3244", "Kalliforna Transportation"])
+    assert out["Supplier"].tolist()[0] == "F&B"
+    assert out["Description"].str.startswith("🟨").tolist() == [True, True]
+    assert out["Supplier"].tolist()[1] != "F&B"
+
+
+def test_columnar_and_row_apply_agree():
+    rules, suppliers = load_rules(DIAKOFTI_RULES.path)
+    compiled = CompiledRules(rules, suppliers)
+    descs = np.array(["GRIGORAK KYTHI GR", "GRIGORAKIS KYTHIRA", "LIMANI TO", "O MAGOS"], dtype=object)
+    filled = compiled.apply_frame({}, descs, np.full(len(descs), -1230, dtype=np.int64))
+    assert filled.tolist() == [compiled.apply({}, d, -1230) for d in descs]
@@ -0,0 +1,75 @@
+import io
+import os
+
+import pandas as pd
+
+from statement_io import read_statement, review_rows
+from transaction_index import (NEW, REVIEWED, classify_incremental, fingerprints, import_corrections, load_index,
+                               settled_rows)
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+
+def _csv_statement():
+    with open(os.path.join(GOLDEN_DIR, "diakofti_euro.csv"), "rb") as f:
+        return read_statement(f, "Diakofti Euro")
+
+
+def _xlsx_statement(csv):
+    """The same statement as an xlsx export: date cells and number cells."""
+    df = csv.copy()
+    df["ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ"] = pd.to_datetime(df["ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ"], format="%d/%m/%Y")
+    df["ΠΟΣΟ"] = df["ΠΟΣΟ"].str.replace(".", "", regex=False).str.replace(",", ".", regex=False).astype(float)
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    buffer.seek(0)
+    buffer.name = "statement.xlsx"
+    return read_statement(buffer, "Diakofti Euro")
+
+
+def test_fingerprints_do_not_depend_on_export_type():
+    csv = _csv_statement()
+    xlsx = _xlsx_statement(csv)
+    assert pd.api.types.is_datetime64_any_dtype(xlsx["ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ"])
+    assert list(fingerprints(csv, "Diakofti Euro")) == list(fingerprints(xlsx, "Diakofti Euro"))
+
+
+def test_fingerprints_do_not_depend_on_number_format():
+    a = pd.DataFrame({"ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ": ["07/06/2024"] * 2, "ΠΕΡΙΓΡΑΦΗ": ["CARD X ", "CARD X"],
+                      "ΠΟΣΟ": ["-1.234,50", "-1234,5"]})
+    b = a.assign(ΠΟΣΟ=["-1234.50", "-1 234,50"])
+    fa, fb = fingerprints(a, "Diakofti Euro"), fingerprints(b, "Diakofti Euro")
+    assert list(fa) == list(fb)
+    assert fa[0] != fa[1]           # equal rows of one file stay apart
+
+
+def test_rows_seen_in_one_export_type_are_not_new_in_the_other(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    csv = _csv_statement()
+    first = classify_incremental(csv, "Diakofti Euro")
+    assert first[NEW].all()
+    again = classify_incremental(_xlsx_statement(csv), "Diakofti Euro")
+    assert not again[NEW].any()
+
+
+def test_imported_corrections_are_kept_with_the_review_mark_left_in(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    csv = _csv_statement()
+    first = classify_incremental(csv, "Diakofti Euro")
+    review = review_rows(first)
+    assert review.any()
+    # the reviewer fills Type/Supplier but leaves the 🟨 in Description
+    corrected = first.drop(columns=[NEW])
+    corrected.loc[review, "Type"] = "ManualKeepMark"
+    corrected.loc[review, "Supplier"] = "Reviewer"
+    assert import_corrections(corrected, "Diakofti Euro") == len(corrected)
+
+    again = classify_incremental(csv, "Diakofti Euro")
+    assert (again.loc[review, "Type"] == "ManualKeepMark").all()
+    assert (again.loc[review, "Supplier"] == "Reviewer").all()
+    assert REVIEWED not in again.columns
+    # the fallback model learns from them too; unreviewed 🟨 rows still get another go
+    index = load_index("Diakofti Euro")
+    assert settled_rows(index).all()
+    stored = pd.DataFrame({"Description": ["🟨 CARD X", "🟨 CARD Y", "CARD Z"], REVIEWED: [False, True, False]})
+    assert settled_rows(stored).tolist() == [False, True, True]
@@ -0,0 +1,163 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from classifier import FORMATS, parse_amounts, to_cents
+from result_cache import read_frame, write_frame
+from statement_io import review_rows
+
+# ============================================
+# TRANSACTION INDEX (incremental classification)
+# ============================================
+# One Parquet file per account holding every classified row seen so far,
+# keyed by a fingerprint of the raw transaction. "Last 90 days" exports
+# overlap month to month; rows already in the index are not re-classified.
+INDEX_DIR = "transaction_index"
+
+FINGERPRINT = "Fingerprint"
+NEW = "New"
+REVIEWED = "Reviewed"       # stored rows only: imported from a corrected workbook
+
+# raw statement columns the fingerprint is built from (first one present)
+_DATE_COLUMNS = ('ΗΜ/ΝΙΑ ΚΙΝΗΣΗΣ', 'ΗΜ/ΝΙΑ ΑΞΙΑΣ', 'Ημερομηνία', 'Valeur')
+_AMOUNT_COLUMNS = ('ΠΟΣΟ', 'Ποσό συναλλαγής', 'Ποσό εντολής')
+_DESC_COLUMNS = ('ΠΕΡΙΓΡΑΦΗ', 'Περιγραφή')
+
+
+def _first_column(df, names):
+    for name in names:
+        if name in df.columns:
+            return name
+    return None
+
+
+def _raw_text(df, names):
+    col = _first_column(df, names)
+    if col is None:
+        return pd.Series("", index=df.index)
+    return df[col].astype(str).str.strip()
+
+
+def _date_key(df):
+    """dd/mm/YYYY per row, whether the export had date cells or text;
+    the raw text where it is no date."""
+    col = _first_column(df, _DATE_COLUMNS)
+    if col is None:
+        return pd.Series("", index=df.index)
+    dates = pd.to_datetime(df[col], dayfirst=True, errors="coerce")
+    return dates.dt.strftime("%d/%m/%Y").where(dates.notna(), _raw_text(df, (col,))).astype(str)
+
+
+def _amount_key(df):
+    """Signed cents per row, however the export wrote the number
+    ("1.234,56", 1234.56); the raw text where it is no amount."""
+    col = _first_column(df, _AMOUNT_COLUMNS)
+    if col is None:
+        return pd.Series("", index=df.index)
+    amounts, failed = parse_amounts(df[col])
+    cents = pd.Series(to_cents(amounts).astype(str), index=df.index)
+    return cents.where(~failed, _raw_text(df, (col,))).astype(str)
+
+
+def fingerprints(df, account):
+    """Stable id per raw statement row: (account, date, amount, description).
+
+    Date and amount are normalized first, so the same statement exported
+    as xlsx or as CSV gives the same ids. Identical transactions on the
+    same day (two equal card payments) are told apart by their occurrence
+    number within the file.
+    """
+    key = (
+        _date_key(df) + "\x1f"
+        + _amount_key(df) + "\x1f"
+        + _raw_text(df, _DESC_COLUMNS)
+    )
+    occurrence = key.groupby(key, sort=False).cumcount().astype(str)
+    prefix = f"{account}\x1f"
+    return np.array([
+        hashlib.sha1(f"{prefix}{k}\x1f{n}".encode("utf-8")).hexdigest()[:20]
+        for k, n in zip(key, occurrence)
+    ], dtype=object)
+
+
+def index_path(account):
+    return os.path.join(INDEX_DIR, f"{account.lower().replace(' ', '_')}.parquet")
+
+
+def load_index(account):
+    """Every stored row of account, indexed by fingerprint (empty if none)."""
+    path = index_path(account)
+    if not os.path.exists(path):
+        return pd.DataFrame({REVIEWED: pd.Series([], dtype=bool)}, index=pd.Index([], name=FINGERPRINT))
+    index = read_frame(path).set_index(FINGERPRINT)
+    if REVIEWED not in index.columns:       # stored before corrections were flagged
+        index[REVIEWED] = False
+    return index
+
+
+def settled_rows(index):
+    """Boolean Series: stored rows to take as they are - corrections the
+    reviewer imported (even with the 🟨 left in), and rows the rules classified."""
+    reviewed = index[REVIEWED].fillna(False).astype(bool) if REVIEWED in index.columns else False
+    return ~review_rows(index) | reviewed
+
+
+def save_rows(account, rows, reviewed=False):
+    """Upsert classified rows (with a Fingerprint column) into the index.
+
+    reviewed: the rows are a reviewer's corrections, reused from now on.
+    """
+    if rows.empty:
+        return
+    rows = rows.drop(columns=[NEW], errors="ignore").set_index(FINGERPRINT)
+    rows[REVIEWED] = reviewed
+    index = load_index(account)
+    index = pd.concat([index[~index.index.isin(rows.index)], rows])
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    write_frame(index_path(account), index.reset_index())
+
+
+def classify_incremental(df, format_type, stats=None):
+    """Classify a statement, re-using rows already in the transaction index.
+
+    Stored rows are taken as they are (including manual corrections), unless
+    the rules left them for review and no correction was imported since, in
+    which case the rules get another go.
+    Only the remaining rows reach the rule engine; they are then stored.
+    Adds a "New" column (not in the index before) and the "Fingerprint".
+    """
+    process, _ = FORMATS[format_type]
+    desc_col = _first_column(df, _DESC_COLUMNS)
+    if desc_col is not None:
+        # processors drop these too; dropping first keeps output rows aligned with df
+        df = df[df[desc_col].notna()]
+
+    fps = pd.Index(fingerprints(df, format_type))
+    index = load_index(format_type)
+    reviewed = (index[settled_rows(index)] if len(index) else index).drop(columns=[REVIEWED])
+    reuse = fps.isin(reviewed.index)
+
+    fresh = process(df[~reuse], stats=stats)
+    fresh[FINGERPRINT] = fps[~reuse].to_numpy(dtype=object)
+    save_rows(format_type, fresh)
+
+    reused = reviewed.loc[fps[reuse]].reset_index()
+    columns = list(fresh.columns) + [c for c in reused.columns if c not in fresh.columns]
+    order = np.argsort(np.concatenate([np.flatnonzero(~reuse), np.flatnonzero(reuse)]), kind="stable")
+    result = pd.concat([fresh, reused], ignore_index=True).reindex(columns=columns)
+    result = result.iloc[order].reset_index(drop=True)
+
+    result[NEW] = ~fps.isin(index.index)
+    # keep the bookkeeping columns last
+    return result[[c for c in result.columns if c != FINGERPRINT] + [FINGERPRINT]]
+
+
+def import_corrections(df, account):
+    """Store a corrected export (needs its Fingerprint column); returns rows stored."""
+    if FINGERPRINT not in df.columns:
+        raise ValueError(f"The workbook has no '{FINGERPRINT}' column - export it with incremental mode")
+    rows = df[df[FINGERPRINT].notna()]
+    save_rows(account, rows, reviewed=True)
+    return len(rows)